@@ -3,6 +3,7 @@ from datetime import datetime
 from components.home import hero_section, journey_step, feature_card, roadmap_card, footer_section
 from components.sidebar import render_language_toggle
 from utils.home_utils import load_model_metadata, check_database_status, check_weather_api_status, get_last_prediction_info
+from utils.circuit_breaker import get_breaker_states
 from utils.translations_utils import get_translations   
 
 
@@ -43,7 +44,7 @@ st.markdown(hero_section(t), unsafe_allow_html=True)
 st.header(status["header"])
 st.caption(status["subtitle"])
 
-col1, col2, col3, col4 = st.columns(4)
+col1, col2, col3, col4, col5 = st.columns(5)
 
 # Fetch status with error handling
 @st.cache_data(ttl=60)
@@ -77,6 +78,8 @@ def get_all_status():
     return statuses
 
 statuses = get_all_status()
+# Breaker states change from one rerun to the next - read them live, not cached
+breakers = get_breaker_states()
 
 with col1:
     with st.container(border=True):
@@ -113,7 +116,14 @@ with col2:
 with col3:
     with st.container(border=True):
         api_status = statuses['api']
-        if api_status: 
+        weather_breaker_state = breakers['open_meteo']['state']
+        if weather_breaker_state != 'closed':
+            st.metric(
+                label=status["weather_label"],
+                value=status["weather_failed"],
+                delta=status["breaker_" + weather_breaker_state] + " · " + status["weather_cached"], delta_color="inverse"
+            )
+        elif api_status: 
             st.metric(
                 label=status["weather_label"],
                 value=status["weather_connected"],
@@ -142,6 +152,22 @@ with col4:
                 delta=status["database_not_operational"], delta_color="inverse"
             )
 
+with col5:
+    with st.container(border=True):
+        llm_breaker_state = breakers['anthropic']['state']
+        if llm_breaker_state == 'closed':
+            st.metric(
+                label=status["ai_label"],
+                value=status["ai_available"],
+                delta=status["breaker_closed"]
+            )
+        else:
+            st.metric(
+                label=status["ai_label"],
+                value=status["ai_fallback"],
+                delta=status["breaker_" + llm_breaker_state], delta_color="inverse"
+            )
+
 st.divider()
 
 # What is KitchenCopilot
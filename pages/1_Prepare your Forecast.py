@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from utils import prepare_data, render_badges, get_prediction, save_prediction, get_translations, split_veg_non_veg
+from utils import prepare_data, render_badges, get_prediction, save_prediction, get_translations, split_veg_non_veg, get_empirical_veg_ratios
+from utils.circuit_breaker import CircuitBreakerOpen
 from datetime import date
 from babel.dates import format_date
 from components.sidebar import render_language_toggle
@@ -129,6 +130,8 @@ if st.session_state['predictions_generated']:
     
     df = st.session_state['forecast_df']
     locale = st.session_state.lang.lower()
+    # One ratio read per rerun, shared by every day card and the save step below
+    veg_ratios = get_empirical_veg_ratios()
     
     # Create formatted date display if not already there
     if 'date_display' not in df.columns:
@@ -179,7 +182,7 @@ if st.session_state['predictions_generated']:
                         st.session_state.get(f"override_value_{date_key}", int(row['predicted_meals']))
                         if override_on else int(row['predicted_meals'])
                     )
-                    veg, non_veg = split_veg_non_veg(row.get('day_theme'), effective_total)
+                    veg, non_veg = split_veg_non_veg(row.get('day_theme'), effective_total, veg_ratios)
 
                     with pred_col:
                         st.markdown(
@@ -263,7 +266,7 @@ if st.session_state['predictions_generated']:
                         # Re-split veg/non-veg against the overridden total so
                         # they stay consistent with final_prediction instead
                         # of still summing to the original model prediction.
-                        veg, non_veg = split_veg_non_veg(row.get('day_theme'), override_value)
+                        veg, non_veg = split_veg_non_veg(row.get('day_theme'), override_value, veg_ratios)
                         df.at[idx, 'predicted_meals_veg'] = veg
                         df.at[idx, 'predicted_meals_non_veg'] = non_veg
                        
@@ -309,7 +312,12 @@ else:
     
     if submit:
         st.session_state['form_submitted'] = True
-        df = prepare_data(start_date, int(number_of_days))
+        try:
+            df = prepare_data(start_date, int(number_of_days))
+        except CircuitBreakerOpen:
+            # Open-Meteo is down and some of these days aren't in the weather cache
+            st.error(t["weather_unavailable"])
+            st.stop()
         df_pred = get_prediction(df)
         #Model does not produce this column, so it needs a default before the review screen renders
         df_pred['predicted_meals_salad'] = 0
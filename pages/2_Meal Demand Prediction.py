@@ -4,7 +4,10 @@ import numpy as np
 import json
 from datetime import datetime, timedelta
 from babel.dates import format_date
-from utils import get_future_predictions, get_llm_planning_insights, convert_df_to_pdf
+from utils import get_future_predictions, convert_df_to_pdf
+from utils.llm_insights import stream_llm_planning_insights
+from utils.streaming import start_streaming
+from utils.llm_payload import summarize_planning, to_payload
 from components.sidebar import render_language_toggle
 from utils.translations_utils import get_translations
 import plotly.graph_objects as go
@@ -24,6 +27,11 @@ st.title(t["predictions_page_title"])
 
 # Get predictions from the last 7 days
 data = get_future_predictions()
+if not data.empty:
+    # Start the insights now; the footer shows them as they come in
+    # Compact summary instead of the whole frame, so the prompt doesn't grow with the range
+    payload = to_payload(summarize_planning(data), name="planning")
+    insights_task = start_streaming(st.session_state, "planning_insights_task", stream_llm_planning_insights, payload, st.session_state.lang)
 # === TOP METRICS SECTION ===
 st.subheader(t["metrics_subheader"])
 
@@ -192,9 +200,7 @@ except Exception as e:
 st.divider()
 st.subheader(t["insights_subheader"])
 if not data.empty:
-    with st.spinner(t["spinner_message"]):
-            response = get_llm_planning_insights(data.to_json(),st.session_state.lang)
-        
-    st.info(response)
+    with st.spinner(t["spinner_message"]), st.container(border=True):
+        st.write_stream(insights_task.stream())
 else:
     st.error(t["insights_no_data"])
\ No newline at end of file
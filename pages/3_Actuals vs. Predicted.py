@@ -4,8 +4,11 @@ import json
 from babel.dates import format_date
 import plotly.graph_objects as go
 from datetime import timedelta, datetime, date 
-from utils import get_actuals_and_predictions, apply_custom_styling, calculate_metrics
-from utils.llm_insights import get_llm_insights_for_actuals_vs_predicted
+from utils import get_actuals_and_predictions, apply_custom_styling
+from utils.db_utils import MetricsAccumulator, calculate_period_metrics
+from utils.llm_insights import stream_llm_insights_for_actuals_vs_predicted
+from utils.streaming import start_streaming, iter_json_objects
+from utils.llm_payload import summarize_actuals_vs_predicted, to_payload
 from utils.translations_utils import get_translations
 from components.sidebar import render_language_toggle
 
@@ -19,6 +22,11 @@ daily_comparison_columns = t["daily_comparison_columns"]
 st.title(t["actuals_title"])
 st.write(t["actuals_subtitle"])
 
+# The charts, the daily table and the AI summary need every day of the period
+# in memory, so they get at most its last ANALYSIS_MAX_DAYS; the metrics are
+# streamed from the database and always cover the whole period.
+ANALYSIS_MAX_DAYS = 366
+
 # Calculated default dates: Last full week (Mon-Fri) 
 weekday = date.today().weekday()
 default_start = date.today() - timedelta(days=weekday+7)
@@ -46,8 +54,6 @@ if submit_button:
     # Clear old data first
     if 'analysis_df' in st.session_state:
         del st.session_state['analysis_df']
-    if 'previous_df' in st.session_state:
-        del st.session_state['previous_df']
     if 'current_metrics' in st.session_state:
         del st.session_state['current_metrics']
     if 'previous_metrics' in st.session_state:
@@ -65,30 +71,35 @@ if st.session_state['form_submitted']:
         start_date = st.session_state['start_date']
         end_date = st.session_state['end_date']
 
-        # Current period
-        df = get_actuals_and_predictions(start_date, end_date)
-        st.session_state['analysis_df'] = df
+        # Current period, day by day (the last ANALYSIS_MAX_DAYS of it)
+        shown_start = max(start_date, end_date - timedelta(days=ANALYSIS_MAX_DAYS - 1))
+        st.session_state['shown_start'] = shown_start
+        st.session_state['analysis_df'] = get_actuals_and_predictions(shown_start, end_date)
 
         # Previous period for comparison
         period_length = (end_date - start_date).days
         prev_end = start_date - timedelta(days=1)
         prev_start = prev_end - timedelta(days=period_length)
-        
-        prev_df = get_actuals_and_predictions(prev_start, prev_end)
-        st.session_state['previous_df'] = prev_df
-
-        # Calculate metrics for both periods
-        st.session_state['current_metrics'] = calculate_metrics(df)
-        if len(prev_df) > 0:
-            st.session_state['previous_metrics'] = calculate_metrics(prev_df)
-        else:
-            st.session_state['previous_metrics'] = None
+
+        # Metrics for both whole periods, streamed in chunks rather than loaded
+        current = calculate_period_metrics(start_date, end_date)
+        st.session_state['current_metrics'] = current if current is not None else MetricsAccumulator().result()
+        st.session_state['previous_metrics'] = calculate_period_metrics(prev_start, prev_end)
     
     # DISPLAY SECTION - runs every time, reads from session state
     df = st.session_state['analysis_df']
-    prev_df = st.session_state['previous_df']
     current = st.session_state['current_metrics']
     previous = st.session_state['previous_metrics']
+    if st.session_state['shown_start'] > st.session_state['start_date']:
+        st.warning(t["long_period_warning"].format(
+            days=ANALYSIS_MAX_DAYS,
+            start=format_date(st.session_state['shown_start'], format='medium', locale=st.session_state.lang.lower()),
+        ))
+
+    # Start the insights now; they are rendered at the bottom as they come in.
+    # Compact summary of the (unformatted) analysis frame, so the prompt doesn't grow with the period
+    payload = to_payload(summarize_actuals_vs_predicted(df), name="insights")
+    insights_task = start_streaming(st.session_state, "actuals_insights_task", stream_llm_insights_for_actuals_vs_predicted, payload, st.session_state.lang)
 
     # === TOP METRICS SECTION ===
     st.subheader("Performance Metrics")
@@ -317,18 +328,16 @@ if st.session_state['form_submitted']:
     st.divider()
 
     st.subheader(t["llm_title"])
+    # Built from the analysis frame, so only the last ANALYSIS_MAX_DAYS of a long period
+    st.caption(t["llm_period_caption"].format(
+        start=format_date(st.session_state['shown_start'], format='medium', locale=st.session_state.lang.lower()),
+        end=format_date(st.session_state['end_date'], format='medium', locale=st.session_state.lang.lower()),
+    ))
+    # Show each insight card as soon as its JSON object is complete
+    shown = 0
     with st.spinner(t["spinner_message"]):
-        response = get_llm_insights_for_actuals_vs_predicted(df.to_json(),st.session_state.lang)
-
-    # Strip code fences
-    response = response.strip()
-    if response.startswith("```"):
-        lines = response.split("\n")
-        response = "\n".join(lines[1:-1])
-
-    try:
-        insights = json.loads(response)
-        for insight in insights:
+        for insight in iter_json_objects(insights_task.stream()):
+            shown += 1
             if insight['type'] == 'success':
                 st.success(f"**{insight['title']}** — {insight['message']}")
             elif insight['type'] == 'info':
@@ -337,6 +346,16 @@ if st.session_state['form_submitted']:
                 st.warning(f"**{insight['title']}** — {insight['message']}")
             elif insight['type'] == 'error':
                 st.error(f"**{insight['title']}** — {insight['message']}")
-    except json.JSONDecodeError:
-        st.warning(t["json_error"])
-        st.markdown(response)
\ No newline at end of file
+
+    if shown == 0:
+        # Not a JSON array of insights (e.g. the fallback message)
+        response = insights_task.text().strip()
+        # Strip code fences
+        if response.startswith("```"):
+            lines = response.split("\n")
+            response = "\n".join(lines[1:-1])
+        try:
+            json.loads(response)
+        except json.JSONDecodeError:
+            st.warning(t["json_error"])
+            st.markdown(response)
@@ -0,0 +1,55 @@
+"""
+Compare inference latency of the pickled RandomForestRegressor against its
+flat NumPy export (utils/flat_forest.py) on the model in data/models/.
+
+Run from the project root: python scripts/benchmark_inference.py
+"""
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.flat_forest import FlatForest
+from utils.paths import MODEL_PATH, FEATURES_PATH, METADATA_PATH
+
+BATCH_SIZES = [1, 20, 10_000]
+REPEATS = 20
+
+
+def random_feature_rows(feature_columns, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2, (n_rows, len(feature_columns))).astype(float)
+    X[:, feature_columns.index("temperature_max")] = rng.normal(18, 6, n_rows)
+    return pd.DataFrame(X, columns=feature_columns)
+
+
+def best_of(fn, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    model = joblib.load(MODEL_PATH)
+    feature_columns = joblib.load(FEATURES_PATH)
+    with open(METADATA_PATH) as f:
+        training_timestamp = json.load(f)["training_timestamp"]
+    forest = FlatForest.from_sklearn(model, feature_columns, training_timestamp)
+
+    print(f"{'batch':>8} {'sklearn (ms)':>14} {'flat (ms)':>12} {'speedup':>9}  parity")
+    for n_rows in BATCH_SIZES:
+        X = random_feature_rows(feature_columns, n_rows)
+        X_array = X.to_numpy()
+        parity = np.array_equal(model.predict(X), forest.predict(X_array))
+        sklearn_s = best_of(lambda: model.predict(X))
+        flat_s = best_of(lambda: forest.predict(X_array))
+        print(f"{n_rows:>8} {sklearn_s * 1000:>14.3f} {flat_s * 1000:>12.3f} {sklearn_s / flat_s:>8.1f}x  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import sys
+from utils.weather_utils import CLIMATOLOGY_YEARS, DEFAULT_LATITUDE, DEFAULT_LONGITUDE, build_climatology
+
+
+# ============================================
+# BUILD WEATHER CLIMATOLOGY
+# ============================================
+# Days beyond the ~16-day forecast horizon get their weather from a
+# per-location climatology (median max temperature, most frequent weather
+# code per calendar day) in data/processed/weather_cache.sqlite. It's built
+# from the Open-Meteo archive on first use and rebuilt once a year old; run
+# this to build it ahead of time. Optional args: LATITUDE LONGITUDE
+# (defaults to the kitchen's location).
+
+if len(sys.argv) == 3:
+    latitude, longitude = float(sys.argv[1]), float(sys.argv[2])
+else:
+    latitude, longitude = DEFAULT_LATITUDE, DEFAULT_LONGITUDE
+
+try:
+    climatology = build_climatology(latitude, longitude)
+    print(f"Success: stored {len(climatology)} calendar days ({CLIMATOLOGY_YEARS} archive years) for {latitude}, {longitude}.")
+except Exception as e:
+    print(f"Building the climatology failed: {e}")
@@ -6,6 +6,8 @@ sql_query="DELETE FROM actual_sales;"
 try:
     with engine.begin() as connection:  # Now engine is valid and has .begin()
         connection.execute(text(sql_query))
+        # The per-theme ratio aggregate is derived from actual_sales - clear it too
+        connection.execute(text("DELETE FROM veg_ratio_by_theme;"))
         print(f"Success: All data in actuals sales database deleted.")
 except Exception as e:
-    print(f"Database operation failed: {e}")
\ No newline at end of file
+    print(f"Database operation failed: {e}")
@@ -1,36 +1,34 @@
+import sys
 from pathlib import Path
-from sqlalchemy import create_engine, text
-data_dir = Path('data')
-data_dir.mkdir(exist_ok=True)  # Creates dir if it doesn't exist
-
-print("Starting database initialization...")
-
-# Creates database and tables
-db_path = data_dir / 'kitchencopilot.db'
-engine = create_engine(f'sqlite:///{db_path}')
-
-#print(f"✓ Data directory ready at: {data_dir}")
-
-with engine.begin() as conn:
-    conn.execute(text('CREATE TABLE IF NOT EXISTS holidays '
-    '(date DATE, description TEXT, is_bank_holiday BOOLEAN, ' \
-    'is_school_break BOOLEAN, is_bridge_day BOOLEAN);'))
-
-    print("✓ Created 'holidays' table")
- 
-    conn.execute(text('CREATE TABLE IF NOT EXISTS predictions (date DATE PRIMARY KEY, weekday TEXT, month TEXT, ' \
-    'day_theme TEXT, temperature_max FLOAT, weather_condition TEXT, is_bank_holiday BOOLEAN, is_bridge_day BOOLEAN, is_school_break BOOLEAN, ' \
-    'holiday_desc TEXT, predicted_meals INTEGER, predicted_meals_veg INTEGER, predicted_meals_non_veg INTEGER, prediction_timestamp TIMESTAMP);'))
-
-    print("✓ Created 'predictions' table")
-
-    conn.execute(text('CREATE TABLE IF NOT EXISTS actual_sales(date DATE PRIMARY KEY, actual_meals INTEGER, ' \
-    'actual_meals_veg INTEGER, actual_meals_non_veg INTEGER)'))
-
-    print("✓ Created 'actual_sales' table")
-
-    conn.execute(text('ALTER TABLE predictions ADD COLUMN override_meal_prediction INTEGER;'))
-    conn.execute(text('ALTER TABLE predictions ADD COLUMN override_reason TEXT;'))
-    conn.execute(text('ALTER TABLE predictions ADD COLUMN final_prediction INTEGER'))
-
-print(f"✓ Database initialization complete: {db_path}")
\ No newline at end of file
+from sqlalchemy import create_engine
+from utils.db_conn import get_engine
+from utils.migrations import MIGRATIONS, migrate
+
+
+# ============================================
+# INITIALIZE / MIGRATE DATABASE
+# ============================================
+# Creates the schema, or brings an existing database up to date, by applying
+# the migrations in utils/migrations.py it hasn't recorded yet. Safe to run
+# any number of times. Defaults to the local SQLite database; pass --app-db
+# to migrate the Postgres database selected by APP_ENV (secrets.toml).
+
+if "--app-db" in sys.argv:
+    engine = get_engine()
+    target = engine.url.render_as_string(hide_password=True)
+else:
+    data_dir = Path('data')
+    data_dir.mkdir(exist_ok=True)  # Creates dir if it doesn't exist
+    db_path = data_dir / 'kitchencopilot.db'
+    engine = create_engine(f'sqlite:///{db_path}')
+    target = str(db_path)
+
+print(f"Migrating {target}...")
+
+try:
+    applied = migrate(engine)
+    for name in applied:
+        print(f"✓ Applied {name}")
+    print(f"✓ Database up to date ({len(applied)} of {len(MIGRATIONS)} migrations applied now): {target}")
+except Exception as e:
+    print(f"Migration failed: {e}")
@@ -0,0 +1,52 @@
+import pandas as pd
+from sqlalchemy import text
+from utils.db_conn import get_engine
+from utils.db_utils import _veg_ratio_contributions
+
+
+# ============================================
+# REBUILD VEG RATIO AGGREGATE
+# ============================================
+# veg_ratio_by_theme is normally kept current incrementally by
+# utils.db_utils.save_actuals. Run this once to create/backfill it, or
+# after any write to actual_sales that bypassed save_actuals (seed scripts,
+# manual SQL edits) to recompute it from the full history.
+
+create_query = text("""
+    CREATE TABLE IF NOT EXISTS veg_ratio_by_theme (
+        day_theme TEXT PRIMARY KEY,
+        veg_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        non_veg_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        day_count INTEGER NOT NULL DEFAULT 0
+    );
+""")
+
+insert_query = text("""
+    INSERT INTO veg_ratio_by_theme (day_theme, veg_sum, non_veg_sum, day_count)
+    VALUES (:day_theme, :veg_sum, :non_veg_sum, :day_count);
+""")
+
+#Spin up the database connection engine
+engine = get_engine()
+try:
+    with engine.begin() as connection:
+        connection.execute(create_query)
+        actuals = pd.read_sql(
+            text("SELECT date, actual_meals_veg, actual_meals_non_veg FROM actual_sales"), connection
+        )
+        aggregate = _veg_ratio_contributions(actuals).reset_index()
+        data_to_insert = [
+            {
+                "day_theme": row.day_theme,
+                "veg_sum": float(row.veg_sum),
+                "non_veg_sum": float(row.non_veg_sum),
+                "day_count": int(row.day_count),
+            }
+            for row in aggregate.itertuples(index=False)
+        ]
+        connection.execute(text("DELETE FROM veg_ratio_by_theme;"))
+        if data_to_insert:
+            connection.execute(insert_query, data_to_insert)
+    print(f"Success: Rebuilt veg_ratio_by_theme for {len(data_to_insert)} themes from {len(actuals)} actual_sales rows.")
+except Exception as e:
+    print(f"Database operation failed: {e}")
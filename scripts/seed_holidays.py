@@ -1,3 +1,4 @@
+import sys
 from pathlib import Path
 import pandas as pd
 from sqlalchemy import create_engine, text
@@ -8,8 +9,20 @@ from utils.db_conn import get_engine
 # SEED HOLIDAYS
 # ============================================
 
+# Usage: python scripts/seed_holidays.py [CSV] [--region NAME]
+# Without --region the rows are the kitchen's own calendar (region NULL);
+# with it, or with a `region` column in the CSV, they are that region's
+# calendar (utils/sites.py, Site.holiday_region). Re-seeding a region
+# replaces its rows.
+
 # 1. File Path and Data Loading
-csv_path = Path("data/raw/holidays/holidays_2025_2027.csv")
+args = sys.argv[1:]
+region = None
+if "--region" in args:
+    i = args.index("--region")
+    region = args[i + 1]
+    del args[i:i + 2]
+csv_path = Path(args[0] if args else "data/raw/holidays/holidays_2025_2027.csv")
 
 if not csv_path.exists():
     print(f"Error: CSV file not found at {csv_path.resolve()}")
@@ -17,6 +30,9 @@ if not csv_path.exists():
 
 # Read CSV
 df = pd.read_csv(csv_path)
+if region is not None or 'region' not in df.columns:
+    df['region'] = region
+df['region'] = df['region'].astype(object).where(df['region'].notna(), None)
 
 
 # 2. Securely Package Data into Parameters
@@ -28,15 +44,24 @@ data_to_insert = [
         "is_bank_hol_val": row["is_bank_holiday"], 
         "is_school_break_val": row["is_school_break"], 
         "is_bridge_day_val": row["is_bridge_day"], 
-
+        "region_val": row["region"],
     }
     for _, row in df.iterrows()
 ]
 
 # 3. Pure Parameterized SQL Statement (100% Injection Proof)
 secure_query = text("""
-    INSERT INTO holidays (date, description,is_bank_holiday, is_school_break, is_bridge_day) 
-    VALUES (:date_val, :desc_val, :is_bank_hol_val, :is_school_break_val, :is_bridge_day_val);
+    INSERT INTO holidays (date, description,is_bank_holiday, is_school_break, is_bridge_day, region) 
+    VALUES (:date_val, :desc_val, :is_bank_hol_val, :is_school_break_val, :is_bridge_day_val, :region_val);
+""")
+# A date is unique within its region, so clear the seeded regions first
+delete_query = text("DELETE FROM holidays WHERE COALESCE(region, '') = COALESCE(:region_val, '')")
+regions = [{"region_val": value} for value in dict.fromkeys(df['region'])]
+# Running apps key their in-memory holiday calendar on this counter
+# (utils/holiday_calendar.py) and reload once they see it change
+bump_version_query = text("""
+    INSERT INTO data_versions (name, version, updated_at) VALUES ('holidays', 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (name) DO UPDATE SET version = data_versions.version + 1, updated_at = excluded.updated_at;
 """)
 
 # 4. Execute directly via Engine Context Manager
@@ -45,7 +70,10 @@ secure_query = text("""
 engine = get_engine() 
 try:
     with engine.begin() as connection:  # Now engine is valid and has .begin()
+        connection.execute(delete_query, regions)
         connection.execute(secure_query, data_to_insert)
-    print(f"Success: Securely inserted {len(data_to_insert)} rows into the holidays database.")
+        connection.execute(bump_version_query)
+    seeded = ", ".join(value["region_val"] or "kitchen" for value in regions)
+    print(f"Success: Securely inserted {len(data_to_insert)} rows into the holidays database ({seeded}).")
 except Exception as e:
     print(f"Database operation failed: {e}")
@@ -20,7 +20,9 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 from utils.day_themes import DAY_THEMES
 from utils.weather_utils import get_weather
-from utils.paths import MODEL_PATH, FEATURES_PATH, METADATA_PATH, PROJECT_ROOT
+from utils.feature_encoder import FeatureEncoder
+from utils.flat_forest import FlatForest
+from utils.paths import MODEL_PATH, FEATURES_PATH, METADATA_PATH, ENCODER_PATH, FOREST_PATH, PROJECT_ROOT
 
 SALES_CSV = PROJECT_ROOT / "data" / "raw" / "sales_data" / "sales_pp.csv"
 HOLIDAYS_CSV = PROJECT_ROOT / "data" / "raw" / "holidays" / "holidays_2025_2027.csv"
@@ -124,18 +126,32 @@ def main():
           "treat as a rough signal, not a precise benchmark.")
 
     # Atomic write - write to .tmp, then rename, so a crash mid-write never corrupts the live model
+    # The encoder is what the app uses to build the model input at inference
+    # (utils/feature_encoder.py) - compiled from the same feature list.
+    # The flat forest is the same model exported as plain node arrays
+    # (utils/flat_forest.py), stamped with this run's training_timestamp so
+    # the app only serves it alongside the matching metadata.
+    training_timestamp = datetime.now().isoformat()
     model_tmp = MODEL_PATH.with_suffix(".pkl.tmp")
     features_tmp = FEATURES_PATH.with_suffix(".pkl.tmp")
+    encoder_tmp = ENCODER_PATH.with_suffix(".pkl.tmp")
+    forest_tmp = FOREST_PATH.with_suffix(".npz.tmp")
     joblib.dump(model, model_tmp)
     joblib.dump(feature_columns, features_tmp)
+    joblib.dump(FeatureEncoder(feature_columns), encoder_tmp)
+    FlatForest.from_sklearn(model, feature_columns, training_timestamp).save(forest_tmp)
     model_tmp.replace(MODEL_PATH)
     features_tmp.replace(FEATURES_PATH)
+    encoder_tmp.replace(ENCODER_PATH)
+    forest_tmp.replace(FOREST_PATH)
     print(f"Saved model to {MODEL_PATH}")
     print(f"Saved feature columns to {FEATURES_PATH}")
+    print(f"Saved feature encoder to {ENCODER_PATH}")
+    print(f"Saved flat forest export to {FOREST_PATH}")
 
     metadata = {
         "number_of_features": len(feature_columns),
-        "training_timestamp": datetime.now().isoformat(),
+        "training_timestamp": training_timestamp,
         "training_row_count": len(df),
         "holdout_row_count": len(test_df),
         "baseline_mae": mae,
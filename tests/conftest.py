@@ -37,8 +37,8 @@ def mock_st_connection(mocker):
     returns (st.connection(..., type='sql')): `.query()` for reads,
     `.session` as a context manager for writes. Patches get_connection in
     every place it's already been imported (utils.db_utils, and re-exported
-    from utils/__init__.py), and clears its @st.cache_resource cache so no
-    mock leaks into a later test.
+    from utils/__init__.py), and clears its @st.cache_resource cache and the
+    readers' query cache so no mock or mocked result leaks into a later test.
     """
     conn = MagicMock()
     conn.session.__enter__.return_value = conn.session
@@ -49,20 +49,97 @@ def mock_st_connection(mocker):
     # then patch it — mocker restores the original get_connection, cache and
     # all, when this test tears down.
     db_utils.get_connection.clear()
+    db_utils.clear_query_cache()
     mocker.patch("utils.db_utils.get_connection", return_value=conn)
 
     yield conn
 
 
+@pytest.fixture
+def sqlite_st_connection(mocker):
+    """Like mock_st_connection, but backed by a real in-memory SQLite
+    database migrated with utils/migrations.py: `.query()` reads through
+    pandas, `.session` is a SQLAlchemy Session. Yields the engine, for
+    checking table contents directly.
+    """
+    from types import SimpleNamespace
+
+    import pandas as pd
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+
+    from utils import db_utils
+    from utils.migrations import migrate
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    migrate(engine)
+    conn = SimpleNamespace(
+        session=Session(engine),
+        query=lambda sql, params=None, ttl=None: pd.read_sql(text(sql), engine, params=params),
+    )
+    db_utils.clear_query_cache()
+    mocker.patch("utils.db_utils.get_connection", return_value=conn)
+    yield engine
+    conn.session.close()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_llm_cache(tmp_path, monkeypatch):
+    """utils.llm_insights caches Anthropic responses in a persistent SQLite
+    file — give every test its own empty one, so one test's mocked response
+    can't leak into another's assertion and nothing lands in data/processed/.
+    """
+    from utils import llm_insights
+    from utils.llm_cache import LLMCache
+
+    monkeypatch.setattr(llm_insights, "_llm_cache", LLMCache(tmp_path / "llm_cache.sqlite"))
+
+
 @pytest.fixture(autouse=True)
-def _clear_llm_insights_cache():
-    """utils.llm_insights' two public functions are @st.cache_data-decorated
-    (keyed on their arguments) — clear between tests so one test's mocked
-    Anthropic response can't leak into another's assertion.
+def _fresh_anthropic_client():
+    """utils.llm_insights.get_client is @st.cache_resource - drop the cached
+    client around every test, so a mocked Anthropic class (or a stub server
+    URL) from one test is never reused by the next.
     """
     from utils import llm_insights
 
+    llm_insights.get_client.clear()
     yield
+    llm_insights.get_client.clear()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_weather_cache(tmp_path, monkeypatch):
+    """utils.weather_utils serves repeat requests from a persistent SQLite
+    cache — point it at a per-test file so every test starts cold and
+    nothing is written to the real data/processed/ cache.
+    """
+    from utils import weather_utils
+    from utils.weather_cache import WeatherCache
+
+    monkeypatch.setattr(weather_utils, "_weather_cache", WeatherCache(tmp_path / "weather_cache.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_feature_store(tmp_path, monkeypatch):
+    """utils.data_preparation_utils.prepare_data reads materialized features
+    from a SQLite store — give every test its own empty one, built against
+    a fixed holiday calendar version instead of the database's."""
+    from utils import data_preparation_utils
+    from utils.feature_store import FeatureStore
+
+    monkeypatch.setattr("utils.feature_store.holiday_calendar_version", lambda: 1)
+    monkeypatch.setattr(data_preparation_utils, "_feature_store", FeatureStore(tmp_path / "feature_store.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def _reset_circuit_breakers():
+    """Circuit breakers are process-wide: close them after every test so
+    failures counted in one test can't open a breaker in the next."""
+    yield
+
+    from utils.circuit_breaker import _breakers
 
-    llm_insights.get_llm_insights_for_actuals_vs_predicted.clear()
-    llm_insights.get_llm_planning_insights.clear()
+    for breaker in _breakers.values():
+        breaker.reset()
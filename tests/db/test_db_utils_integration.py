@@ -38,6 +38,7 @@ TEST_DATE = "2099-01-01"
 def _delete_test_row(conn):
     with conn.session as session:
         session.execute(text("DELETE FROM predictions WHERE date = :date"), {"date": TEST_DATE})
+        session.execute(text("DELETE FROM prediction_history WHERE date = :date"), {"date": TEST_DATE})
         session.commit()
 
 
@@ -4,28 +4,42 @@ the SQL/params the code constructs without proving the SQL is valid against
 real Postgres (that's what the small db-marked suite in
 test_db_utils_integration.py is for).
 """
+from datetime import date, timezone
+from unittest.mock import MagicMock
+
+import pandas as pd
 import pytest
 
-from utils.db_utils import save_prediction
-from tests.fixtures.dataframes import build_predictions_df, build_prediction_row
+from utils.day_themes import THEME_VEG_RATIO
+from utils.db_utils import (
+    COPY_THRESHOLD, QUERY_CACHE_MAX_ENTRIES, get_actuals_and_predictions, get_empirical_veg_ratios, get_missing_actuals,
+    save_actuals, save_prediction,
+)
+from utils.prediction_utils import get_prediction
+from tests.fixtures.dataframes import build_actual_sales_df, build_actual_sales_row, build_predictions_df, build_prediction_row
 
 pytestmark = pytest.mark.unit
 
 
-def test_save_prediction_upserts_and_commits(mock_st_connection):
+def test_save_prediction_appends_history_upserts_latest_and_commits(mock_st_connection):
     df = build_predictions_df()
 
     ok, err = save_prediction(df)
 
     assert ok is True
     assert err is None
-    mock_st_connection.session.execute.assert_called_once()
+    assert mock_st_connection.session.execute.call_count == 2
     mock_st_connection.session.commit.assert_called_once()
 
-    sql_text, records = mock_st_connection.session.execute.call_args.args
+    history_sql, history_params = mock_st_connection.session.execute.call_args_list[0].args
+    assert "INSERT INTO prediction_history" in str(history_sql)
+    assert "ON CONFLICT" not in str(history_sql)
+    assert history_params["saved_at_0"].tzinfo == timezone.utc
+
+    sql_text, params = mock_st_connection.session.execute.call_args.args
     assert "INSERT INTO predictions" in str(sql_text)
     assert "ON CONFLICT (date) DO UPDATE" in str(sql_text)
-    assert records[0]["day_theme"] == "Sausage"
+    assert params["day_theme_0"] == "Sausage"
 
 
 def test_save_prediction_uses_override_as_final_prediction_when_present(mock_st_connection):
@@ -35,8 +49,24 @@ def test_save_prediction_uses_override_as_final_prediction_when_present(mock_st_
 
     save_prediction(df)
 
-    _, records = mock_st_connection.session.execute.call_args.args
-    assert records[0]["final_prediction"] == 45
+    _, params = mock_st_connection.session.execute.call_args.args
+    assert params["final_prediction_0"] == 45
+
+
+def test_save_prediction_resolves_overrides_per_row(mock_st_connection):
+    df = build_predictions_df(
+        [
+            build_prediction_row(date="2026-07-13", predicted_meals=60, override_meal_prediction=45),
+            build_prediction_row(date="2026-07-14", predicted_meals=70),
+        ]
+    )
+
+    save_prediction(df)
+
+    _, params = mock_st_connection.session.execute.call_args.args
+    assert params["final_prediction_0"] == 45
+    assert params["final_prediction_1"] == 70
+    assert params["override_meal_prediction_1"] is None  # NaN never reaches the driver
 
 
 def test_save_prediction_returns_error_tuple_on_db_failure(mock_st_connection):
@@ -46,3 +76,191 @@ def test_save_prediction_returns_error_tuple_on_db_failure(mock_st_connection):
 
     assert ok is False
     assert err == "connection reset"
+
+
+def test_get_empirical_veg_ratios_reads_aggregate_once_and_falls_back_per_theme(mock_st_connection):
+    mock_st_connection.query.return_value = pd.DataFrame(
+        [{"day_theme": "Sausage", "veg_sum": 30.0, "non_veg_sum": 90.0, "day_count": 2}]
+    )
+
+    ratios = get_empirical_veg_ratios()
+
+    mock_st_connection.query.assert_called_once()
+    assert ratios["Sausage"] == pytest.approx((0.25, 0.75))
+    assert ratios["Fish"] == THEME_VEG_RATIO["Fish"]  # no history -> fallback
+
+
+def test_get_empirical_veg_ratios_falls_back_when_query_fails(mock_st_connection):
+    mock_st_connection.query.side_effect = Exception("relation does not exist")
+
+    assert get_empirical_veg_ratios() == THEME_VEG_RATIO
+
+
+def test_reads_are_cached_until_a_write_to_their_tables(mock_st_connection):
+    mock_st_connection.query.side_effect = lambda *args, **kwargs: pd.DataFrame({"date": ["2026-07-13"]})
+    mock_st_connection.session.execute.side_effect = lambda *args, **kwargs: _existing_actuals_result([])
+
+    get_missing_actuals()
+    get_missing_actuals()
+    assert mock_st_connection.query.call_count == 1
+
+    assert save_actuals(build_actual_sales_df())[0] is True
+    get_missing_actuals()
+    assert mock_st_connection.query.call_count == 2
+
+
+def test_query_cache_keeps_at_most_max_entries_per_reader(mock_st_connection):
+    columns = ["date", "final_prediction", "prediction_timestamp", "day_theme", "predicted_meals_veg",
+               "predicted_meals_non_veg", "predicted_meals_salad", "actual_meals", "actual_meals_veg",
+               "actual_meals_non_veg", "actual_meals_salad"]
+    mock_st_connection.query.side_effect = lambda *args, **kwargs: pd.DataFrame(columns=columns)
+    first_range = ("2026-01-01", "2026-01-31")
+
+    get_actuals_and_predictions(*first_range)
+    get_actuals_and_predictions(*first_range)
+    assert mock_st_connection.query.call_count == 1
+    for day in range(1, QUERY_CACHE_MAX_ENTRIES + 1):
+        get_actuals_and_predictions(f"2026-02-{day % 28 + 1:02d}", f"2026-03-{day // 28 + 1:02d}")
+
+    # The least recently used range was evicted and is read again
+    get_actuals_and_predictions(*first_range)
+    assert mock_st_connection.query.call_count == QUERY_CACHE_MAX_ENTRIES + 2
+
+
+def test_veg_ratios_are_not_reread_after_saving_predictions(mock_st_connection):
+    mock_st_connection.query.return_value = pd.DataFrame(
+        {"day_theme": ["Sausage"], "veg_sum": [30.0], "non_veg_sum": [70.0], "day_count": [3]}
+    )
+
+    first = get_empirical_veg_ratios()
+    assert save_prediction(build_predictions_df())[0] is True
+
+    assert get_empirical_veg_ratios() == first
+    mock_st_connection.query.assert_called_once()
+
+
+def test_save_actuals_applies_veg_ratio_delta_for_overwritten_rows(mock_st_connection):
+    # 2026-07-13 is a Monday ("Sausage") and already has 20/40 stored.
+    existing = MagicMock()
+    existing.mappings.return_value.all.return_value = [
+        {"date": "2026-07-13", "actual_meals_veg": 20, "actual_meals_non_veg": 40}
+    ]
+    mock_st_connection.session.execute.side_effect = lambda *args, **kwargs: existing
+
+    ok, err = save_actuals(build_actual_sales_df())
+
+    assert ok is True, err
+    sql_text, records = mock_st_connection.session.execute.call_args.args
+    assert "INSERT INTO veg_ratio_by_theme" in str(sql_text)
+    assert records == [{"day_theme": "Sausage", "veg_sum": 8.0, "non_veg_sum": -10.0, "day_count": 0}]
+    mock_st_connection.session.commit.assert_called_once()
+
+
+def _existing_actuals_result(rows):
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    return result
+
+
+def test_save_actuals_upserts_batch_in_one_statement_and_counts_rows(mock_st_connection):
+    mock_st_connection.session.execute.side_effect = lambda *args, **kwargs: _existing_actuals_result(
+        [{"date": "2026-07-13", "actual_meals_veg": 28, "actual_meals_non_veg": 30}]
+    )
+    df = build_actual_sales_df(
+        [build_actual_sales_row(date="2026-07-13"), build_actual_sales_row(date="2026-07-14")]
+    )
+
+    ok, counts = save_actuals(df)
+
+    assert ok is True
+    assert counts == {"inserted": 1, "updated": 1}
+    upserts = [
+        call for call in mock_st_connection.session.execute.call_args_list
+        if "INSERT INTO actual_sales" in str(call.args[0])
+    ]
+    assert len(upserts) == 1
+    assert upserts[0].args[1]["date_1"] == date(2026, 7, 14)
+
+
+def test_save_actuals_copies_large_batches_through_staging_table(mock_st_connection):
+    session = mock_st_connection.session
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.execute.side_effect = lambda *args, **kwargs: _existing_actuals_result([])
+    cursor = session.connection.return_value.connection.driver_connection.cursor.return_value
+    dates = pd.bdate_range("2026-01-01", periods=COPY_THRESHOLD + 1)
+    df = build_actual_sales_df([build_actual_sales_row(date=d, actual_meals_salad=None) for d in dates])
+
+    ok, counts = save_actuals(df)
+
+    assert ok is True
+    assert counts == {"inserted": COPY_THRESHOLD + 1, "updated": 0}
+    cursor.copy_expert.assert_called_once()
+    copied = cursor.copy_expert.call_args.args[1].getvalue().splitlines()
+    assert len(copied) == COPY_THRESHOLD + 1
+    assert copied[0] == r"2026-01-01,58,28,30,\N"
+    statements = [str(call.args[0]) for call in session.execute.call_args_list]
+    assert any("SELECT date, actual_meals" in sql and "ON CONFLICT (date)" in sql for sql in statements)
+
+
+def _copied_records(cursor, table):
+    """The rows COPYed into `table`'s staging table, as column -> text dicts."""
+    for call in cursor.copy_expert.call_args_list:
+        statement, buffer = call.args
+        if f"COPY _{table}_staging " in statement:
+            columns = statement.split("(", 1)[1].split(")", 1)[0].split(", ")
+            return [dict(zip(columns, line.split(","))) for line in buffer.getvalue().splitlines()]
+    raise AssertionError(f"nothing was copied into {table}")
+
+
+def test_save_prediction_copies_get_prediction_output_as_integers(mock_st_connection):
+    session = mock_st_connection.session
+    session.get_bind.return_value.dialect.name = "postgresql"
+    cursor = session.connection.return_value.connection.driver_connection.cursor.return_value
+    dates = pd.bdate_range("2026-01-01", periods=COPY_THRESHOLD + 1)
+    features = build_predictions_df([build_prediction_row(date=str(d.date())) for d in dates]).drop(
+        columns=["predicted_meals", "predicted_meals_veg", "predicted_meals_non_veg", "prediction_timestamp"]
+    )
+    features.attrs["veg_ratios"] = {}
+    df = get_prediction(features)
+    assert df["predicted_meals"].dtype == "float64"
+
+    ok, err = save_prediction(df)
+
+    assert ok is True, err
+    for table in ("predictions", "prediction_history"):
+        records = _copied_records(cursor, table)
+        assert len(records) == COPY_THRESHOLD + 1
+        for column in ("predicted_meals", "final_prediction"):
+            assert records[0][column] == str(int(df["predicted_meals"].iloc[0]))
+        assert records[0]["temperature_max"] == "22.5"
+
+
+def test_save_actuals_copies_counts_as_integers_when_a_nan_makes_them_float(mock_st_connection):
+    session = mock_st_connection.session
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.execute.side_effect = lambda *args, **kwargs: _existing_actuals_result([])
+    cursor = session.connection.return_value.connection.driver_connection.cursor.return_value
+    dates = pd.bdate_range("2026-01-01", periods=COPY_THRESHOLD + 1)
+    rows = [build_actual_sales_row(date=d, actual_meals_salad=None) for d in dates]
+    rows[-1].update(actual_meals_veg=None, actual_meals_non_veg=None)
+    df = build_actual_sales_df(rows)
+    assert df["actual_meals_veg"].dtype == "float64"
+
+    ok, counts = save_actuals(df)
+
+    assert ok is True, counts
+    records = _copied_records(cursor, "actual_sales")
+    assert (records[0]["actual_meals_veg"], records[0]["actual_meals_non_veg"]) == ("28", "30")
+    assert (records[-1]["actual_meals_veg"], records[-1]["actual_meals_non_veg"]) == (r"\N", r"\N")
+
+
+def test_save_actuals_locks_actual_sales_before_reading_existing_rows_on_postgres(mock_st_connection):
+    session = mock_st_connection.session
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.execute.side_effect = lambda *args, **kwargs: _existing_actuals_result([])
+
+    assert save_actuals(build_actual_sales_df())[0] is True
+
+    statements = [str(call.args[0]) for call in session.execute.call_args_list]
+    assert statements[0] == "LOCK TABLE actual_sales IN SHARE ROW EXCLUSIVE MODE"
+    assert "SELECT date, actual_meals_veg" in statements[1]
@@ -5,8 +5,8 @@ no mocking required at all.
 """
 import pytest
 
-from utils.db_utils import calculate_metrics, style_difference
-from tests.fixtures.dataframes import build_actuals_vs_predictions_df
+from utils.db_utils import _copy_field, _veg_ratio_deltas, calculate_metrics, style_difference
+from tests.fixtures.dataframes import build_actual_sales_df, build_actual_sales_row, build_actuals_vs_predictions_df
 
 pytestmark = pytest.mark.unit
 
@@ -73,3 +73,30 @@ def test_calculate_metrics_accuracy_rate_tolerance_is_percentage_points_not_frac
 @pytest.mark.parametrize("val,expected_color", [(5, "green"), (-5, "red"), (0, "red")])
 def test_style_difference(val, expected_color):
     assert style_difference(val) == f"color: {expected_color}"
+
+
+def test_veg_ratio_deltas_nets_out_replaced_rows_and_skips_incomplete_ones():
+    new_rows = build_actual_sales_df(
+        [
+            build_actual_sales_row(date="2026-07-13", actual_meals_veg=30, actual_meals_non_veg=30),  # Monday
+            build_actual_sales_row(date="2026-07-17", actual_meals_veg=25, actual_meals_non_veg=35),  # Friday
+            build_actual_sales_row(date="2026-07-14", actual_meals_veg=None, actual_meals_non_veg=40),  # incomplete
+        ]
+    )
+    existing_rows = build_actual_sales_df(
+        [build_actual_sales_row(date="2026-07-13", actual_meals_veg=20, actual_meals_non_veg=30)]
+    )
+
+    deltas = _veg_ratio_deltas(new_rows, existing_rows).set_index("day_theme")
+
+    assert set(deltas.index) == {"Sausage", "Fish"}
+    assert deltas.loc["Sausage"].tolist() == [10, 0, 0]  # replaced, not double-counted
+    assert deltas.loc["Fish"].tolist() == [25, 35, 1]
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(None, r"\N"), ("", '""'), ('Say "hi", all', '"Say ""hi"", all"'), (45, "45"), (True, "True")],
+)
+def test_copy_field_keeps_empty_strings_distinct_from_null(value, expected):
+    assert _copy_field(value) == expected
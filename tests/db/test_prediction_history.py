@@ -0,0 +1,51 @@
+"""prediction_history end to end on a migrated in-memory SQLite database
+(tests/conftest.py): save_prediction keeps the latest forecast in
+predictions and every saved forecast in prediction_history, and
+get_prediction_vintages reads them back with their lead time.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from utils.db_utils import get_future_predictions, get_prediction_vintages, save_actuals, save_prediction
+from tests.fixtures.dataframes import build_actual_sales_df, build_prediction_row, build_predictions_df
+
+pytestmark = pytest.mark.unit
+
+
+def test_every_save_is_kept_but_predictions_holds_the_latest(sqlite_st_connection, frozen_today):
+    frozen_today("2026-07-13")
+    assert save_prediction(build_predictions_df([build_prediction_row(predicted_meals=60, prediction_timestamp="2026-07-06T08:00:00")]))[0]
+    assert save_prediction(build_predictions_df([build_prediction_row(predicted_meals=70, prediction_timestamp="2026-07-12T08:00:00")]))[0]
+
+    latest = get_future_predictions()
+    assert latest["final_prediction"].tolist() == [70]
+
+    with sqlite_st_connection.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM prediction_history")).scalar() == 2
+
+
+def test_vintages_carry_lead_time_and_actuals(sqlite_st_connection):
+    assert save_prediction(build_predictions_df([build_prediction_row(predicted_meals=60, prediction_timestamp="2026-07-06T08:00:00")]))[0]
+    assert save_prediction(build_predictions_df([build_prediction_row(predicted_meals=50, override_meal_prediction=55,
+                                                                      prediction_timestamp="2026-07-12T08:00:00")]))[0]
+    assert get_prediction_vintages(date(2026, 7, 13), date(2026, 7, 13))["actual_meals"].isna().all()
+
+    assert save_actuals(build_actual_sales_df())[0]
+    vintages = get_prediction_vintages(date(2026, 7, 13), date(2026, 7, 13))
+
+    assert vintages["lead_days"].tolist() == [7, 1]
+    assert vintages["final_prediction"].tolist() == [60, 55]
+    assert vintages["actual_meals"].tolist() == [58, 58]
+
+
+def test_lead_time_falls_back_to_saved_at_in_utc(sqlite_st_connection, frozen_today):
+    frozen_today("2026-07-06 23:30:00")
+    assert save_prediction(build_predictions_df([build_prediction_row(predicted_meals=60, prediction_timestamp=None)]))[0]
+
+    vintages = get_prediction_vintages(date(2026, 7, 13), date(2026, 7, 13))
+
+    assert vintages["prediction_timestamp"].isna().all()
+    assert vintages["saved_at"].iloc[0].isoformat() == "2026-07-06T23:30:00+00:00"
+    assert vintages["lead_days"].tolist() == [7]
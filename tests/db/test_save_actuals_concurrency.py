@@ -0,0 +1,65 @@
+"""Two save_actuals of the same new dates at the same time, on a file-backed
+SQLite database (one connection per session, as with separate Streamlit
+sessions): the second waits for the first, so veg_ratio_by_theme counts
+each date once."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from utils import db_utils
+from utils.migrations import migrate
+from tests.fixtures.dataframes import build_actual_sales_df, build_actual_sales_row
+
+pytestmark = pytest.mark.unit
+
+
+class _Connection:
+    """st.connection stand-in handing out a new Session per use."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @property
+    def session(self):
+        return Session(self.engine)
+
+
+def test_concurrent_imports_of_new_dates_count_them_once(tmp_path, mocker):
+    engine = create_engine(f"sqlite:///{tmp_path / 'kc.db'}", connect_args={"timeout": 10})
+    migrate(engine)
+    mocker.patch("utils.db_utils.get_connection", return_value=_Connection(engine))
+    db_utils.clear_query_cache()
+
+    first_has_read = threading.Event()
+    read_existing = db_utils._read_existing_actuals
+
+    def slow_first_read(session, dates):
+        existing = read_existing(session, dates)
+        if not first_has_read.is_set():
+            first_has_read.set()
+            time.sleep(0.3)  # the other import starts in the meantime
+        return existing
+
+    mocker.patch("utils.db_utils._read_existing_actuals", side_effect=slow_first_read)
+    dates = pd.bdate_range("2026-07-13", periods=5)
+    results = []
+
+    def import_actuals():
+        df = build_actual_sales_df([build_actual_sales_row(date=d) for d in dates])
+        results.append(db_utils.save_actuals(df))
+
+    first = threading.Thread(target=import_actuals)
+    first.start()
+    first_has_read.wait(5)
+    second = threading.Thread(target=import_actuals)
+    second.start()
+    first.join(10)
+    second.join(10)
+
+    assert sorted(counts["updated"] for _, counts in results) == [0, 5]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(day_count) FROM veg_ratio_by_theme")).scalar() == 5
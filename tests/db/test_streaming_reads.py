@@ -0,0 +1,57 @@
+"""Chunked reads (iter_actuals_and_predictions) and the incremental metrics
+built on them, against a migrated in-memory SQLite database (tests/conftest.py)."""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.db_utils import (
+    MetricsAccumulator, calculate_metrics, calculate_period_metrics, get_actuals_and_predictions,
+    iter_actuals_and_predictions, save_actuals, save_prediction,
+)
+from tests.fixtures.dataframes import build_actual_sales_row, build_prediction_row
+
+pytestmark = pytest.mark.unit
+
+START = date(2026, 7, 1)
+
+
+@pytest.fixture
+def ten_days(sqlite_st_connection):
+    days = [START + timedelta(days=i) for i in range(10)]
+    predictions = pd.DataFrame([build_prediction_row(date=str(d), predicted_meals=100) for d in days])
+    actuals = pd.DataFrame([build_actual_sales_row(date=str(d), actual_meals=90 + 3 * i) for i, d in enumerate(days)])
+    assert save_prediction(predictions)[0]
+    assert save_actuals(actuals)[0]
+    return days
+
+
+def test_chunks_cover_the_range_in_order_with_error_columns(ten_days):
+    chunks = list(iter_actuals_and_predictions(START, ten_days[-1], chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, get_actuals_and_predictions(START, ten_days[-1]), check_dtype=False)
+
+
+def test_metrics_over_chunks_match_metrics_over_whole_frame(ten_days):
+    metrics = MetricsAccumulator()
+    for chunk in iter_actuals_and_predictions(START, ten_days[-1], chunk_size=3):
+        metrics.update(chunk)
+
+    assert metrics.result() == pytest.approx(calculate_metrics(get_actuals_and_predictions(START, ten_days[-1])))
+    assert calculate_period_metrics(START, ten_days[-1]) == pytest.approx(metrics.result())
+
+
+def test_period_without_rows_has_no_metrics(ten_days):
+    assert calculate_period_metrics(date(2025, 1, 1), date(2025, 1, 31)) is None
+
+
+def test_empty_accumulator_matches_calculate_metrics_on_empty_frame():
+    empty = pd.DataFrame({"actual_meals": pd.Series(dtype=float), "final_prediction": pd.Series(dtype=float)})
+
+    result = MetricsAccumulator().result()
+
+    assert np.isnan(result["mae"]) and np.isnan(calculate_metrics(empty)["mae"])
+    assert result["over_predicted"] == 0
@@ -0,0 +1,92 @@
+"""A local HTTP server that stands in for the Anthropic Messages API and
+replays canned server-sent-event streams, so the real SDK client can be
+exercised end to end (utils/llm_insights.py streaming) without network.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def text_stream_events(chunks, model="claude-stub", cache_read_input_tokens=0):
+    """The SSE events the Messages API sends for a streamed text reply made
+    of the given chunks."""
+    events = [
+        ("message_start", {"type": "message_start", "message": {
+            "id": "msg_stub", "type": "message", "role": "assistant", "model": model,
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 0, "cache_read_input_tokens": cache_read_input_tokens,
+                      "cache_creation_input_tokens": 0},
+        }}),
+        ("content_block_start", {"type": "content_block_start", "index": 0,
+                                 "content_block": {"type": "text", "text": ""}}),
+    ]
+    for chunk in chunks:
+        events.append(("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                               "delta": {"type": "text_delta", "text": chunk}}))
+    events += [
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": len(chunks)}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    return events
+
+
+class AnthropicStub:
+    """Serves POST /v1/messages from a queue of canned replies, in order.
+
+    A reply is a list of text chunks (streamed as SSE), a (chunks, error type)
+    pair for a stream that breaks off with an error event after the chunks,
+    or an int HTTP status for an error. The request bodies received are kept in .requests.
+    Streamed replies report cached_prompt_tokens as cache_read_input_tokens.
+    """
+
+    def __init__(self, cached_prompt_tokens=0):
+        self.cached_prompt_tokens = cached_prompt_tokens
+        self.replies = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests.append(json.loads(body or b"{}"))
+                reply = stub.replies.pop(0) if stub.replies else 500
+                if isinstance(reply, int):
+                    payload = json.dumps({"type": "error", "error": {"type": "api_error", "message": "stub"}}).encode()
+                    self.send_response(reply)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                error_type = None
+                if isinstance(reply, tuple):
+                    reply, error_type = reply
+                events = text_stream_events(reply, cache_read_input_tokens=stub.cached_prompt_tokens)
+                if error_type is not None:
+                    # Cut off after the last text delta, the way an overloaded stream ends
+                    events = events[:2 + len(reply)] + [
+                        ("error", {"type": "error", "error": {"type": error_type, "message": "stub"}}),
+                    ]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for event, data in events:
+                    self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                    self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
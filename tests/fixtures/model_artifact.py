@@ -28,3 +28,56 @@ def build_synthetic_model_and_features():
 
     model = LinearRegression().fit(X, y)
     return model, feature_columns
+
+
+def build_synthetic_forest_and_features(n_estimators=25, with_missing_values=False, seed=0):
+    """A small RandomForestRegressor on random rows shaped like the real
+    feature set (a temperature column plus 0/1 dummies), for the flat
+    forest parity tests. with_missing_values puts NaNs in the training
+    temperatures so the trees learn a per-node missing-value direction.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(seed)
+    feature_columns = ["temperature_max", "is_bridge_day", "weather_condition_Sunny", "day_theme_Sausage", "day_theme_Fish"]
+    X = np.column_stack([rng.normal(18, 6, 300), rng.integers(0, 2, (300, 4))]).astype(float)
+    y = 50 + 0.8 * np.nan_to_num(X[:, 0]) - 15 * X[:, 1] + 10 * X[:, 3] + rng.normal(0, 3, 300)
+    if with_missing_values:
+        X[rng.random(300) < 0.1, 0] = np.nan
+
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=6, min_samples_leaf=2, random_state=seed)
+    model.fit(X, y)
+    return model, feature_columns
+
+
+def write_model_artifacts(directory, model=None, feature_columns=None, training_timestamp="2026-07-01T08:00:00"):
+    """Write model/feature/metadata/encoder files shaped like
+    scripts/train_model.py's output into `directory`; returns their
+    (model, features, metadata, encoder, flat forest) paths. The flat forest
+    export is only written for a RandomForestRegressor, as in training.
+    """
+    import json
+
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+
+    from utils.feature_encoder import FeatureEncoder
+    from utils.flat_forest import FlatForest
+
+    if model is None or feature_columns is None:
+        model, feature_columns = build_synthetic_model_and_features()
+
+    model_path = directory / "random_forest_model.pkl"
+    features_path = directory / "feature_columns.pkl"
+    metadata_path = directory / "model_metadata.json"
+    encoder_path = directory / "feature_encoder.pkl"
+    forest_path = directory / "flat_forest.npz"
+    joblib.dump(model, model_path)
+    joblib.dump(feature_columns, features_path)
+    joblib.dump(FeatureEncoder(feature_columns), encoder_path)
+    if isinstance(model, RandomForestRegressor):
+        FlatForest.from_sklearn(model, feature_columns, training_timestamp).save(forest_path)
+    metadata_path.write_text(
+        json.dumps({"training_timestamp": training_timestamp, "feature_columns": feature_columns})
+    )
+    return model_path, features_path, metadata_path, encoder_path, forest_path
@@ -19,8 +19,8 @@ def valid_daily_response(dates=None, temps=None, codes=None):
 
 def response_missing_daily_key():
     """What Open-Meteo returns on a malformed/out-of-range request: no 'daily'
-    key at all. Reproduces the UnboundLocalError characterized in
-    tests/unit/test_weather_utils.py.
+    key at all. get_weather used to fail with an UnboundLocalError on it (see
+    tests/unit/test_weather_utils.py).
     """
     return {
         "latitude": 50.13,
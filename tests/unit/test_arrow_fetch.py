@@ -0,0 +1,156 @@
+"""utils/arrow_fetch.py and the Arrow path of db_utils' readers. The ADBC
+driver is replaced by a mock that returns a pyarrow table."""
+import datetime
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from utils import arrow_fetch, db_utils
+from utils.arrow_fetch import arrow_available, to_positional
+
+pytestmark = pytest.mark.unit
+
+
+def test_to_positional_numbers_each_name_once_and_keeps_casts():
+    sql, values = to_positional(
+        "SELECT * FROM t WHERE d >= :start AND d <= :end AND d::date <> :start", {"start": 1, "end": 2}
+    )
+
+    assert sql == "SELECT * FROM t WHERE d >= $1 AND d <= $2 AND d::date <> $1"
+    assert values == [1, 2]
+
+
+def test_arrow_path_needs_the_driver_and_postgres(monkeypatch):
+    postgres = create_engine("postgresql://user:pw@localhost/db")
+    monkeypatch.setattr(arrow_fetch, "adbc_postgresql", None)
+    assert not arrow_available(postgres)
+
+    monkeypatch.setattr(arrow_fetch, "adbc_postgresql", MagicMock())
+    assert arrow_available(postgres)
+    assert not arrow_available(create_engine("sqlite://"))
+    assert not arrow_available(None)
+
+
+@pytest.fixture
+def adbc(monkeypatch, mock_st_connection):
+    """A mocked ADBC driver, and mock_st_connection made to look like Postgres."""
+    pa = pytest.importorskip("pyarrow")
+    driver = MagicMock()
+    cursor = driver.connect.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetch_arrow_table.return_value = pa.table({
+        "date": pa.array([datetime.date(2026, 7, 13)]),
+        "prediction_timestamp": pa.array([datetime.datetime(2026, 7, 6, 8)]),
+        "final_prediction": pa.array([60]),
+    })
+    monkeypatch.setattr(arrow_fetch, "adbc_postgresql", driver)
+    mock_st_connection.engine = create_engine("postgresql+psycopg2://user:pw@localhost/db")
+    arrow_fetch._get_adbc_pool.clear()
+    yield cursor
+    arrow_fetch._get_adbc_pool.clear()
+
+
+def test_reader_takes_typed_columns_from_arrow(adbc, mock_st_connection):
+    result = db_utils.get_future_predictions()
+
+    mock_st_connection.query.assert_not_called()
+    sql, values = adbc.execute.call_args.args
+    assert "date >= $1" in sql and len(values) == 1
+    assert pd.api.types.is_datetime64_dtype(result["date"])
+    assert pd.api.types.is_datetime64_dtype(result["prediction_timestamp"])
+    assert arrow_fetch.adbc_postgresql.connect.call_args.args[0] == "postgresql://user:pw@localhost/db"
+
+
+def test_reader_falls_back_to_conn_query_when_arrow_fetch_fails(adbc, mock_st_connection):
+    adbc.execute.side_effect = RuntimeError("driver error")
+    mock_st_connection.query.return_value = pd.DataFrame(
+        {"date": ["2026-07-13"], "prediction_timestamp": ["2026-07-06T08:00:00"], "final_prediction": [60]}
+    )
+
+    result = db_utils.get_future_predictions()
+
+    mock_st_connection.query.assert_called_once()
+    assert result["date"].tolist() == [pd.Timestamp("2026-07-13")]
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """A mocked ADBC driver handing out a new connection per connect()."""
+    pa = pytest.importorskip("pyarrow")
+    opened = []
+
+    def connect(uri, autocommit):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetch_arrow_table.return_value = pa.table({"n": pa.array([1])})
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(arrow_fetch, "adbc_postgresql", MagicMock(connect=MagicMock(side_effect=connect)))
+    arrow_fetch._get_adbc_pool.clear()
+    yield opened
+    arrow_fetch._get_adbc_pool.clear()
+
+
+def _cursor(connection):
+    return connection.cursor.return_value.__enter__.return_value
+
+
+POSTGRES = create_engine("postgresql+psycopg2://user:pw@localhost/db")
+
+
+def test_concurrent_reads_get_their_own_connection_and_reuse_idle_ones(connections):
+    nested = []
+
+    def read_meanwhile(*args):
+        # A read that starts while another is running doesn't wait for it
+        if not nested:
+            nested.append(arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 2"))
+
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    _cursor(connections[0]).execute.side_effect = read_meanwhile
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    for _ in range(3):
+        arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 3")
+
+    assert len(nested) == 1
+    assert len(connections) == 2  # both were idle again, so later reads reuse them
+
+
+def test_failed_read_drops_the_pooled_connections_and_reconnects(connections):
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    _cursor(connections[0]).execute.side_effect = RuntimeError("server closed the connection")
+
+    with pytest.raises(RuntimeError):
+        arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    result = arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+
+    connections[0].close.assert_called_once()
+    assert len(connections) == 2
+    assert result["n"].tolist() == [1]
+
+
+def test_connection_returned_to_a_discarded_pool_is_closed(connections):
+    connect = arrow_fetch.adbc_postgresql.connect.side_effect
+
+    def fail_meanwhile(*args):
+        # Another read fails while this one still holds its connection
+        def failing_connect(*args, **kwargs):
+            connection = connect(*args, **kwargs)
+            _cursor(connection).execute.side_effect = RuntimeError("server closed the connection")
+            return connection
+
+        arrow_fetch.adbc_postgresql.connect.side_effect = failing_connect
+        with pytest.raises(RuntimeError):
+            arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 2")
+        arrow_fetch.adbc_postgresql.connect.side_effect = connect
+
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    _cursor(connections[0]).execute.side_effect = fail_meanwhile
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 1")
+    arrow_fetch.fetch_arrow_frame(POSTGRES, "SELECT 3")
+
+    connections[0].close.assert_called_once()
+    connections[1].close.assert_called_once()
+    assert len(connections) == 3  # the last read reconnected rather than reusing either
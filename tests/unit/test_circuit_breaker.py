@@ -0,0 +1,166 @@
+"""utils/circuit_breaker.py, and the Open-Meteo / Anthropic breakers wired
+into weather_utils, home_utils and llm_insights. HTTP is mocked with
+`responses`, the Anthropic client with pytest-mock."""
+import threading
+import time
+
+import pytest
+import requests
+import responses
+from freezegun import freeze_time
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerOpen
+from utils.home_utils import check_weather_api_status
+from utils.weather_utils import get_weather, weather_breaker
+from tests.fixtures.weather_responses import valid_daily_response
+
+pytestmark = pytest.mark.unit
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+
+def _fail():
+    raise ConnectionError("upstream down")
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("test-open", probe=_fail, probe_interval=60)
+    calls = []
+
+    _trip(breaker)
+
+    assert breaker.snapshot()["state"] == OPEN
+    with pytest.raises(CircuitBreakerOpen):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    breaker.reset()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test-reset", probe=_fail, failure_threshold=2)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    breaker.call(lambda: None)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+
+    assert breaker.snapshot()["state"] == CLOSED
+
+
+def test_errors_that_are_not_outages_do_not_count():
+    breaker = CircuitBreaker("test-filter", probe=_fail, is_failure=lambda e: isinstance(e, ConnectionError))
+
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            breaker.call(lambda: {}["daily"])
+
+    assert breaker.snapshot() == {"state": CLOSED, "failures": 0, "opened_at": None}
+
+
+def test_background_probe_closes_the_breaker_once_upstream_recovers():
+    recovered = threading.Event()
+    probing = threading.Event()
+
+    def probe():
+        probing.set()
+        if not recovered.is_set():
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("test-probe", probe=probe, probe_interval=0.01)
+    _trip(breaker)
+    assert probing.wait(5)
+
+    recovered.set()
+    deadline = time.monotonic() + 5
+    while breaker.snapshot()["state"] != CLOSED:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert breaker.call(lambda: "ok") == "ok"
+
+
+def test_half_open_while_probing():
+    release = threading.Event()
+    breaker = CircuitBreaker("test-half-open", probe=lambda: release.wait(5), probe_interval=0.01)
+    _trip(breaker)
+
+    deadline = time.monotonic() + 5
+    while breaker.snapshot()["state"] != HALF_OPEN:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    with pytest.raises(CircuitBreakerOpen):
+        breaker.call(lambda: None)
+    release.set()
+
+
+@responses.activate
+def test_get_weather_serves_stale_forecast_while_open_meteo_is_down():
+    responses.add(responses.GET, FORECAST_URL, json=valid_daily_response(), status=200)
+    with freeze_time("2026-07-10 08:00:00"):
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    responses.replace(responses.GET, FORECAST_URL, body=requests.exceptions.ConnectTimeout("timed out"))
+    with freeze_time("2026-07-10 12:00:00"):  # cached forecast is past its TTL
+        for _ in range(weather_breaker.failure_threshold):
+            with pytest.raises(requests.exceptions.ConnectTimeout):
+                get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+        calls_before = len(responses.calls)
+
+        df = get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    assert len(responses.calls) == calls_before  # answered without touching the network
+    assert list(df["temperature_max"]) == [22.5, 19.0]
+
+
+@responses.activate
+def test_open_meteo_server_errors_open_the_breaker():
+    responses.add(responses.GET, FORECAST_URL, json={"error": True, "reason": "overloaded"}, status=503)
+
+    for _ in range(weather_breaker.failure_threshold):
+        with pytest.raises(requests.exceptions.HTTPError):
+            get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    assert weather_breaker.state == OPEN
+    with pytest.raises(CircuitBreakerOpen):
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+    assert len(responses.calls) == weather_breaker.failure_threshold
+
+
+def test_get_weather_fails_fast_for_uncached_days_while_open(mocker):
+    fetch = mocker.patch("utils.weather_utils._fetch_weather")
+    mocker.patch.object(weather_breaker, "state", OPEN)
+
+    with pytest.raises(CircuitBreakerOpen, match="isn't cached"):
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+    fetch.assert_not_called()
+
+
+@responses.activate
+def test_weather_status_check_is_instant_while_open():
+    weather_breaker.state = OPEN
+
+    assert check_weather_api_status() is False
+    assert len(responses.calls) == 0
+
+
+def test_llm_insights_return_fallback_while_anthropic_is_down(mocker):
+    from anthropic import APIConnectionError
+    from utils import llm_insights
+
+    mocker.patch("utils.llm_insights.st")
+    client = mocker.patch("utils.llm_insights.Anthropic").return_value
+    client.messages.create.side_effect = APIConnectionError(request=mocker.Mock())
+
+    for i in range(llm_insights.llm_breaker.failure_threshold + 1):
+        result = llm_insights.get_llm_planning_insights(f'[{{"day": {i}}}]', "DE")
+
+    assert result == llm_insights._PLANNING_FALLBACK["DE"]
+    assert client.messages.create.call_count == llm_insights.llm_breaker.failure_threshold
+    assert llm_insights.llm_breaker.snapshot()["state"] == OPEN
@@ -0,0 +1,50 @@
+"""utils/concurrency.py — run_concurrently's fan-out, per-call timeouts and
+error propagation. Plain callables with short sleeps, no I/O."""
+import time
+
+import pytest
+
+from utils.concurrency import run_concurrently
+
+pytestmark = pytest.mark.unit
+
+
+def _sleep_then(seconds, value):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def test_returns_results_by_name():
+    assert run_concurrently({"a": lambda: 1, "b": lambda: 2}) == {"a": 1, "b": 2}
+
+
+def test_wall_clock_is_the_slowest_call_not_the_sum():
+    started = time.monotonic()
+    run_concurrently({name: _sleep_then(0.2, name) for name in ("weather", "holidays", "veg_ratios")})
+
+    assert time.monotonic() - started < 0.5
+
+
+def test_call_past_its_timeout_raises_timeout_error_naming_it():
+    with pytest.raises(TimeoutError, match="weather did not finish within 0.05s"):
+        run_concurrently({"weather": _sleep_then(0.5, None), "holidays": lambda: 1}, timeouts={"weather": 0.05})
+
+
+def test_exception_is_reraised_with_the_failing_call_noted():
+    def boom():
+        raise ValueError("no daily data")
+
+    with pytest.raises(ValueError, match="no daily data") as excinfo:
+        run_concurrently({"weather": boom, "holidays": lambda: 1})
+
+    assert "raised by concurrent call 'weather'" in excinfo.value.__notes__
+
+
+def test_timeout_raised_inside_a_call_is_not_reported_as_our_timeout():
+    def socket_timeout():
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError, match="read timed out"):
+        run_concurrently({"weather": socket_timeout})
@@ -0,0 +1,87 @@
+"""utils/feature_encoder.py — must produce exactly what the previous
+pd.get_dummies + add-missing-columns + reorder path in get_prediction did.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from utils.feature_encoder import FeatureEncoder
+
+pytestmark = pytest.mark.unit
+
+# Same shape as data/models/feature_columns.pkl, including a numeric feature
+# (is_semester_break) that the inference frame doesn't carry.
+FEATURE_COLUMNS = [
+    "temperature_max", "is_semester_break", "is_bridge_day",
+    "month_April", "month_June", "month_May",
+    "weather_condition_Cloudy", "weather_condition_Rainy", "weather_condition_Sunny",
+    "day_theme_Chicken", "day_theme_Fish", "day_theme_Sausage", "day_theme_Schnitzel", "day_theme_Vital",
+]
+
+
+def _get_dummies_reference(new_data, feature_columns):
+    """The encoding get_prediction used before FeatureEncoder existed."""
+    df_prepared = pd.get_dummies(
+        new_data.drop(columns=["weekday"]),
+        columns=["month", "weather_condition", "day_theme"],
+    )
+    for col in feature_columns:
+        if col not in df_prepared.columns:
+            df_prepared[col] = 0
+    return df_prepared[feature_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _forecast_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2026-04-01", periods=n_rows)
+    return pd.DataFrame({
+        "date": dates,
+        "weekday": dates.day_name(),
+        "month": dates.month_name(),  # includes months the model never saw
+        "day_theme": dates.day_name().map({
+            "Monday": "Sausage", "Tuesday": "Vital", "Wednesday": "Chicken",
+            "Thursday": "Schnitzel", "Friday": "Fish",
+        }),
+        "weather_icon": "☀️",
+        "temperature_max": rng.normal(18, 6, n_rows).round(1),
+        "weather_condition": rng.choice(["Sunny", "Cloudy", "Rainy", "Snowy"], n_rows),
+        "is_school_break": pd.array(rng.random(n_rows) < 0.2, dtype="boolean"),
+        "is_bridge_day": pd.array(rng.random(n_rows) < 0.05, dtype="boolean"),
+        "holiday_desc": "",
+    })
+
+
+def test_transform_matches_get_dummies_path():
+    df = _forecast_frame(40)
+
+    encoded = FeatureEncoder(FEATURE_COLUMNS).transform(df)
+
+    assert_array_equal(encoded, _get_dummies_reference(df, FEATURE_COLUMNS))
+
+
+def test_transform_matches_get_dummies_path_with_missing_weather():
+    df = _forecast_frame(10)
+    df.loc[[2, 5], ["temperature_max", "weather_condition"]] = np.nan
+
+    encoded = FeatureEncoder(FEATURE_COLUMNS).transform(df)
+
+    assert_array_equal(encoded, _get_dummies_reference(df, FEATURE_COLUMNS))
+    assert encoded[2, 6:9].sum() == 0  # no weather dummy set
+
+
+def test_transform_matches_get_dummies_path_on_large_batch():
+    df = _forecast_frame(25_000, seed=1)
+
+    encoded = FeatureEncoder(FEATURE_COLUMNS).transform(df)
+
+    assert_array_equal(encoded, _get_dummies_reference(df, FEATURE_COLUMNS))
+
+
+def test_transform_frame_keeps_feature_names_and_index():
+    df = _forecast_frame(3).set_index(pd.Index([10, 11, 12]))
+
+    frame = FeatureEncoder(FEATURE_COLUMNS).transform_frame(df)
+
+    assert list(frame.columns) == FEATURE_COLUMNS
+    assert list(frame.index) == [10, 11, 12]
@@ -0,0 +1,152 @@
+"""utils/feature_store.py and prepare_data's read-through use of it.
+Weather and holidays are mocked where prepare_data imports them; the store
+itself is a per-test SQLite file (see the autouse fixture in conftest.py).
+"""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+import pytest
+from freezegun import freeze_time
+
+from utils.data_preparation_utils import (
+    build_data_features, clean_holidays_data, merge_and_clean_holidays, merge_weather, prepare_data,
+)
+from utils.day_themes import DAY_THEMES
+from utils.feature_store import FeatureStore
+from utils.holiday_calendar import HolidayCalendar
+
+pytestmark = pytest.mark.unit
+
+HOLIDAYS = pd.DataFrame({
+    "date": ["2026-06-04", "2026-06-05"],
+    "description": ["Fronleichnam", "Bridge Day (Fronleichnam)"],
+    "is_bank_holiday": [True, False],
+    "is_school_break": [False, False],
+    "is_bridge_day": [False, True],
+})
+
+
+def _weather(start_date, end_date, today=None):
+    dates = pd.bdate_range(start_date, end_date)
+    return pd.DataFrame({
+        "date": dates,
+        "temperature_max": [20.0 + i for i in range(len(dates))],
+        "weather_code": [0] * len(dates),
+        "weather_icon": ["☀️"] * len(dates),
+        "weather_condition": ["Sunny"] * len(dates),
+        "weather_source": ["forecast"] * len(dates),
+    })
+
+
+@pytest.fixture
+def live_sources(mocker):
+    mocker.patch("utils.data_preparation_utils.get_empirical_veg_ratios", return_value={})
+    mocker.patch("utils.data_preparation_utils.get_holiday_calendar",
+                 return_value=HolidayCalendar.from_frame(HOLIDAYS))
+    return mocker.patch("utils.data_preparation_utils.get_weather_range", side_effect=_weather)
+
+
+def _live(start, end):
+    df = build_data_features(pd.bdate_range(start, end))
+    df = merge_weather(df, _weather(start, end))
+    return merge_and_clean_holidays(df, clean_holidays_data(HOLIDAYS.copy()))
+
+
+@freeze_time("2026-06-01 08:00:00")
+def test_prepare_data_matches_live_computation_cold_and_warm(live_sources):
+    expected = _live("2026-06-01", "2026-06-05")
+
+    cold = prepare_data("2026-06-01", 5)
+    warm = prepare_data("2026-06-01", 5)
+
+    assert_frame_equal(cold, expected)
+    assert_frame_equal(warm, expected)
+    assert live_sources.call_count == 1  # second call is a pure store read
+
+
+def test_prepare_data_only_computes_missing_days(live_sources):
+    with freeze_time("2026-06-01 08:00:00"):
+        prepare_data("2026-06-01", 3)
+        prepare_data("2026-06-01", 5)
+
+    assert live_sources.call_args_list[1].kwargs["start_date"] == "2026-06-04"
+    assert live_sources.call_args_list[1].kwargs["end_date"] == "2026-06-05"
+
+
+def test_prepare_data_recomputes_forecast_rows_after_ttl(live_sources):
+    with freeze_time("2026-06-01 08:00:00"):
+        prepare_data("2026-06-01", 5)
+    with freeze_time("2026-06-01 12:00:00"):  # past the 3h forecast TTL
+        prepare_data("2026-06-01", 5)
+
+    assert live_sources.call_count == 2
+
+
+def test_forecast_rows_are_not_served_once_their_day_is_archive_territory(tmp_path):
+    store = FeatureStore(tmp_path / "fs.sqlite")
+    now = datetime(2026, 6, 1, 8, tzinfo=timezone.utc)
+    store.put(_live("2026-06-01", "2026-06-05").assign(is_bank_holiday=False), "forecast", now=now)
+
+    assert len(store.get("2026-06-01", "2026-06-05", archive_before="2026-05-27", now=now)) == 4
+    served = store.get("2026-06-01", "2026-06-05", archive_before="2026-06-03", now=now)
+    assert served["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-06-03", "2026-06-05"]
+
+
+def test_archive_rows_never_expire(tmp_path):
+    store = FeatureStore(tmp_path / "fs.sqlite")
+    now = datetime(2026, 6, 1, 8, tzinfo=timezone.utc)
+    store.put(_live("2026-06-01", "2026-06-05").assign(is_bank_holiday=False), "past", now=now)
+
+    assert len(store.get("2026-06-01", "2026-06-05", archive_before="2027-05-27", now=now + timedelta(days=365))) == 4
+
+
+def test_rows_without_weather_are_not_stored(tmp_path):
+    store = FeatureStore(tmp_path / "fs.sqlite")
+    df = _live("2026-06-01", "2026-06-03").assign(is_bank_holiday=False)
+    df.loc[0, "temperature_max"] = None
+
+    store.put(df, "past")
+
+    assert store.get("2026-06-01", "2026-06-03", archive_before="2026-05-27")["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-06-02", "2026-06-03"]
+
+
+def test_rows_from_an_older_holiday_calendar_are_recomputed(tmp_path, monkeypatch):
+    store = FeatureStore(tmp_path / "fs.sqlite")
+    store.put(_live("2026-06-01", "2026-06-03").assign(is_bank_holiday=False), "past")
+
+    assert len(store.get("2026-06-01", "2026-06-03", archive_before="2026-05-27")) == 3
+    monkeypatch.setattr("utils.feature_store.holiday_calendar_version", lambda: 2)  # re-seeded
+
+    assert store.get("2026-06-01", "2026-06-03", archive_before="2026-05-27").empty
+
+
+def test_archive_rows_are_recomputed_after_a_theme_change(tmp_path, monkeypatch):
+    store = FeatureStore(tmp_path / "fs.sqlite")
+    store.put(_live("2026-06-01", "2026-06-03").assign(is_bank_holiday=False), "past")
+
+    monkeypatch.setitem(DAY_THEMES, "Tuesday", "Pasta")
+
+    assert store.get("2026-06-01", "2026-06-03", archive_before="2026-05-27").empty
+
+
+def test_store_from_before_feature_versions_is_reset(tmp_path):
+    path = tmp_path / "fs.sqlite"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE daily_features (date TEXT PRIMARY KEY, holiday_version INTEGER)")
+        conn.execute("INSERT INTO daily_features VALUES ('2026-06-01', 1)")
+    store = FeatureStore(path)
+
+    store.put(_live("2026-06-01", "2026-06-03").assign(is_bank_holiday=False), "past")
+
+    assert len(store.get("2026-06-01", "2026-06-03", archive_before="2026-05-27")) == 3
+
+
+@freeze_time("2026-06-01 08:00:00")
+def test_prepare_data_hands_veg_ratios_to_get_prediction(live_sources, mocker):
+    mocker.patch("utils.data_preparation_utils.get_empirical_veg_ratios", return_value={"Fish": (0.7, 0.3)})
+
+    df = prepare_data("2026-06-01", 5)
+
+    assert df.attrs["veg_ratios"] == {"Fish": (0.7, 0.3)}
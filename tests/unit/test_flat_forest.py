@@ -0,0 +1,68 @@
+"""utils/flat_forest.py — the NumPy forest evaluator must reproduce
+RandomForestRegressor.predict exactly, since get_prediction ceil()s its
+output and a last-bit difference can change a whole meal.
+"""
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from utils.flat_forest import FlatForest
+from utils.model_registry import ModelRegistry
+from tests.fixtures.model_artifact import build_synthetic_forest_and_features, write_model_artifacts
+
+pytestmark = pytest.mark.unit
+
+
+def _rows(n_rows, seed=1, nan_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.normal(18, 8, n_rows), rng.integers(0, 2, (n_rows, 4))]).astype(float)
+    X[rng.random(n_rows) < nan_fraction, 0] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("n_rows", [1, 20, 2_000])
+def test_predict_matches_sklearn(n_rows):
+    model, _ = build_synthetic_forest_and_features()
+    X = _rows(n_rows)
+
+    assert_array_equal(FlatForest.from_sklearn(model).predict(X), model.predict(X))
+
+
+def test_predict_matches_sklearn_with_missing_values():
+    model, _ = build_synthetic_forest_and_features(with_missing_values=True)
+    X = _rows(500, nan_fraction=0.2)
+
+    assert_array_equal(FlatForest.from_sklearn(model).predict(X), model.predict(X))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model, feature_columns = build_synthetic_forest_and_features()
+    path = tmp_path / "flat_forest.npz"
+
+    FlatForest.from_sklearn(model, feature_columns, "2026-07-01T08:00:00").save(path)
+    loaded = FlatForest.load(path)
+
+    assert loaded.feature_columns == feature_columns
+    assert loaded.training_timestamp == "2026-07-01T08:00:00"
+    assert_array_equal(loaded.predict(_rows(50)), model.predict(_rows(50)))
+
+
+def test_registry_serves_flat_forest_without_unpickling_the_model(tmp_path, mocker):
+    model, feature_columns = build_synthetic_forest_and_features()
+    registry = ModelRegistry(*write_model_artifacts(tmp_path, model, feature_columns))
+    load_spy = mocker.spy(__import__("joblib"), "load")
+
+    bundle = registry.get()
+
+    assert isinstance(bundle.model, FlatForest)
+    assert registry.model_path not in [call.args[0] for call in load_spy.call_args_list]
+
+
+def test_registry_ignores_flat_forest_from_another_training_run(tmp_path):
+    model, feature_columns = build_synthetic_forest_and_features()
+    paths = write_model_artifacts(tmp_path, model, feature_columns)
+    FlatForest.from_sklearn(model, feature_columns, "1999-01-01T00:00:00").save(paths[-1])
+
+    bundle = ModelRegistry(*paths).get()
+
+    assert not isinstance(bundle.model, FlatForest)
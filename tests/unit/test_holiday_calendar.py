@@ -0,0 +1,128 @@
+"""utils/holiday_calendar.py — the in-memory holiday index that replaces
+prepare_data's per-forecast holidays query. Built from plain DataFrames
+shaped like the holidays table; the version counter it's cached on is read
+from an in-memory SQLite database.
+"""
+import pandas as pd
+import pytest
+
+from utils.data_preparation_utils import build_data_features, merge_and_clean_holidays
+from utils.holiday_calendar import HolidayCalendar
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def calendar():
+    # Deliberately unsorted, with 0/1 flags as Postgres may return them
+    holidays = pd.DataFrame({
+        "date": ["2026-06-04", "2026-01-01", "2026-06-05", "2026-03-30"],
+        "description": ["Fronleichnam", "New Year", "Bridge Day (Fronleichnam)", "Easter Break Start"],
+        "is_bank_holiday": [1, 1, 0, 0],
+        "is_school_break": [0, 0, 0, 1],
+        "is_bridge_day": [0, 0, 1, 0],
+    })
+    return HolidayCalendar.from_frame(holidays)
+
+
+def test_lookup_is_inclusive_on_both_ends(calendar):
+    result = calendar.lookup("2026-03-30", "2026-06-04")
+
+    assert result["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-03-30", "2026-06-04"]
+    assert result["description"].tolist() == ["Easter Break Start", "Fronleichnam"]
+
+
+def test_lookup_decodes_flags_to_booleans(calendar):
+    result = calendar.lookup("2026-06-01", "2026-06-30").set_index("date")
+
+    assert result.loc["2026-06-04", ["is_bank_holiday", "is_school_break", "is_bridge_day"]].tolist() == [True, False, False]
+    assert result.loc["2026-06-05", ["is_bank_holiday", "is_school_break", "is_bridge_day"]].tolist() == [False, False, True]
+
+
+def test_lookup_outside_calendar_returns_empty_frame_with_expected_columns(calendar):
+    result = calendar.lookup("2027-01-01", "2027-01-31")
+
+    assert result.empty
+    assert list(result.columns) == ["date", "description", "is_bank_holiday", "is_school_break", "is_bridge_day"]
+
+
+def test_lookup_feeds_merge_and_clean_holidays(calendar):
+    df = build_data_features(pd.bdate_range("2026-06-03", "2026-06-05"))
+
+    merged = merge_and_clean_holidays(df, calendar.lookup("2026-06-03", "2026-06-05"))
+
+    # Fronleichnam (bank holiday) is dropped, the bridge day is flagged
+    assert merged["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-06-03", "2026-06-05"]
+    assert merged["is_bridge_day"].tolist() == [False, True]
+    assert merged["holiday_desc"].tolist() == ["", "Bridge Day (Fronleichnam)"]
+
+
+def test_region_calendar_filters_on_region(mock_st_connection, mocker):
+    from utils import holiday_calendar
+
+    mocker.patch("utils.holiday_calendar.get_connection", return_value=mock_st_connection)
+    holiday_calendar._load_holiday_calendar.clear()
+    mock_st_connection.query.return_value = pd.DataFrame(
+        columns=["date", "description", "is_bank_holiday", "is_school_break", "is_bridge_day"]
+    )
+
+    holiday_calendar.get_holiday_calendar("bavaria")
+
+    sql_query = mock_st_connection.query.call_args.args[0]
+    assert "WHERE region = :region" in sql_query
+    assert mock_st_connection.query.call_args.kwargs["params"] == {"region": "bavaria"}
+    holiday_calendar._load_holiday_calendar.clear()
+
+
+def test_default_calendar_is_the_rows_without_a_region(mock_st_connection, mocker):
+    from utils import holiday_calendar
+
+    mocker.patch("utils.holiday_calendar.get_connection", return_value=mock_st_connection)
+    holiday_calendar._load_holiday_calendar.clear()
+    mock_st_connection.query.return_value = pd.DataFrame(
+        columns=["date", "description", "is_bank_holiday", "is_school_break", "is_bridge_day"]
+    )
+
+    holiday_calendar.get_holiday_calendar()
+
+    assert "WHERE region IS NULL" in mock_st_connection.query.call_args.args[0]
+    holiday_calendar._load_holiday_calendar.clear()
+
+
+def test_version_is_read_from_data_versions_and_bumped_by_a_reseed(sqlite_st_connection, mocker):
+    from sqlalchemy import text
+
+    from utils import db_utils, holiday_calendar
+
+    mocker.patch("utils.holiday_calendar.get_connection", side_effect=lambda: db_utils.get_connection())
+    holiday_calendar.holiday_calendar_version.clear()
+    assert holiday_calendar.holiday_calendar_version() == 1
+
+    # What scripts/seed_holidays.py runs after inserting the rows
+    with sqlite_st_connection.begin() as conn:
+        conn.execute(text("INSERT INTO data_versions (name, version, updated_at) VALUES ('holidays', 1, CURRENT_TIMESTAMP) "
+                          "ON CONFLICT (name) DO UPDATE SET version = data_versions.version + 1, updated_at = excluded.updated_at"))
+    holiday_calendar.holiday_calendar_version.clear()
+
+    assert holiday_calendar.holiday_calendar_version() == 2
+    holiday_calendar.holiday_calendar_version.clear()
+
+
+def test_calendar_reloads_when_the_version_changes(mock_st_connection, mocker):
+    from utils import holiday_calendar
+
+    mocker.patch("utils.holiday_calendar.get_connection", return_value=mock_st_connection)
+    version = mocker.patch("utils.holiday_calendar.holiday_calendar_version", return_value=1)
+    holiday_calendar._load_holiday_calendar.clear()
+    mock_st_connection.query.return_value = pd.DataFrame(
+        columns=["date", "description", "is_bank_holiday", "is_school_break", "is_bridge_day"]
+    )
+
+    holiday_calendar.get_holiday_calendar()
+    holiday_calendar.get_holiday_calendar()
+    assert mock_st_connection.query.call_count == 1
+
+    version.return_value = 2
+    holiday_calendar.get_holiday_calendar()
+    assert mock_st_connection.query.call_count == 2
+    holiday_calendar._load_holiday_calendar.clear()
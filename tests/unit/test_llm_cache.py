@@ -0,0 +1,96 @@
+"""utils/llm_cache.py, and its use in utils/llm_insights. Each test gets its
+own cache file (tests/conftest.py); the Anthropic client is mocked."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import llm_insights
+from utils.llm_cache import LLMCache, normalize_payload
+
+pytestmark = pytest.mark.unit
+
+NOW = datetime(2026, 7, 13, 8, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(tmp_path / "cache.sqlite", ttl=timedelta(days=30), max_entries=2)
+
+
+def test_key_ignores_json_formatting_but_not_language_model_or_version():
+    key = LLMCache.key("insights", 1, '{"b": 1, "a": [1, 2]}', "EN", "model-a")
+
+    assert key == LLMCache.key("insights", 1, '{"a":[1,2],"b":1}', "EN", "model-a")
+    assert key != LLMCache.key("insights", 2, '{"a":[1,2],"b":1}', "EN", "model-a")
+    assert key != LLMCache.key("insights", 1, '{"a":[1,2],"b":1}', "DE", "model-a")
+    assert key != LLMCache.key("insights", 1, '{"a":[1,2],"b":1}', "EN", "model-b")
+    assert key != LLMCache.key("planning", 1, '{"a":[1,2],"b":1}', "EN", "model-a")
+
+
+def test_normalize_payload_keeps_non_json_text():
+    assert normalize_payload("  not json \n") == "not json"
+
+
+def test_entries_expire_after_ttl_and_are_counted(cache):
+    cache.put("k", "insight", now=NOW)
+
+    assert cache.get("k", now=NOW + timedelta(days=29)) == "insight"
+    assert cache.get("k", now=NOW + timedelta(days=31)) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put("a", "A", now=NOW)
+    cache.put("b", "B", now=NOW + timedelta(minutes=1))
+    cache.get("a", now=NOW + timedelta(minutes=2))  # a is now the most recently used
+
+    cache.put("c", "C", now=NOW + timedelta(minutes=3))
+
+    assert cache.get("a", now=NOW + timedelta(minutes=4)) == "A"
+    assert cache.get("b", now=NOW + timedelta(minutes=4)) is None
+    assert cache.get("c", now=NOW + timedelta(minutes=4)) == "C"
+
+
+def test_cache_is_shared_between_instances_on_the_same_file(tmp_path):
+    LLMCache(tmp_path / "shared.sqlite").put("k", "insight")
+
+    assert LLMCache(tmp_path / "shared.sqlite").get("k") == "insight"
+
+
+def _mock_client(mocker, text="- Check Friday"):
+    mocker.patch("utils.llm_insights.st")
+    client = mocker.patch("utils.llm_insights.Anthropic").return_value
+    client.messages.create.return_value.content = [mocker.Mock(text=text)]
+    return client
+
+
+def test_planning_insights_are_answered_from_cache_on_repeat(mocker):
+    client = _mock_client(mocker)
+
+    first = llm_insights.get_llm_planning_insights('{"day": 1}', "EN")
+    second = llm_insights.get_llm_planning_insights('{"day":1}', "EN")
+
+    assert first == second == "- Check Friday"
+    assert client.messages.create.call_count == 1
+    assert llm_insights._llm_cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_fallback_is_not_cached(mocker):
+    client = _mock_client(mocker)
+    client.messages.create.return_value.content = []
+
+    assert llm_insights.get_llm_insights_for_actuals_vs_predicted('{"day": 1}', "DE") == llm_insights._INSIGHTS_FALLBACK["DE"]
+    assert llm_insights._llm_cache.stats()["entries"] == 0
+
+
+def test_one_client_is_shared_and_instructions_are_a_shared_system_prompt(mocker):
+    client = _mock_client(mocker)
+
+    llm_insights.get_llm_planning_insights('{"day": 1}', "EN")
+    llm_insights.get_llm_planning_insights('{"day": 2}', "DE")
+
+    assert llm_insights.Anthropic.call_count == 1
+    first, second = (call.kwargs for call in client.messages.create.call_args_list)
+    assert first["system"] == second["system"]
+    assert "cache_control" not in first["system"][0]  # below the API's minimum cacheable length
+    assert second["messages"][0]["content"] == 'Respond in German. Here is the data: {"day": 2}'
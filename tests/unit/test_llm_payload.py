@@ -0,0 +1,125 @@
+"""utils/llm_payload.py — the compact prompt payloads for llm_insights.
+Pure pandas, built from small hand-made frames."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.llm_payload import MAX_HOLIDAY_RUNS, MAX_SAMPLE_ROWS, summarize_actuals_vs_predicted, summarize_planning, to_payload
+
+pytestmark = pytest.mark.unit
+
+THEMES = {"Monday": "Sausage", "Tuesday": "Vital", "Wednesday": "Chicken", "Thursday": "Schnitzel", "Friday": "Fish"}
+
+
+def _actuals(days, friday_extra=0):
+    dates = pd.bdate_range("2026-01-05", periods=days)
+    predicted = np.full(days, 100)
+    actual = predicted + np.where(dates.day_name() == "Friday", friday_extra, 0)
+    return pd.DataFrame({
+        "date": dates,
+        "weekday": dates.day_name(),
+        "day_theme": dates.day_name().map(THEMES),
+        "final_prediction": predicted,
+        "actual_meals": actual,
+        "predicted_meals_veg": predicted // 2,
+        "actual_meals_veg": actual // 2,
+        "predicted_meals_non_veg": predicted // 2,
+        "actual_meals_non_veg": actual - actual // 2,
+        "predicted_meals_salad": np.zeros(days),
+        "actual_meals_salad": np.zeros(days),
+    })
+
+
+def _plan(days):
+    dates = pd.bdate_range("2026-07-13", periods=days)
+    return pd.DataFrame({
+        "date": dates,
+        "day_theme": dates.day_name().map(THEMES),
+        "final_prediction": np.full(days, 100),
+        "predicted_meals_veg": np.full(days, 50),
+        "predicted_meals_non_veg": np.full(days, 50),
+        "predicted_meals_salad": np.zeros(days),
+        "temperature_max": np.linspace(18, 30, days),
+        "weather_condition": ["Sunny"] * days,
+        "holiday_desc": [""] * days,
+        "is_school_break": [False] * days,
+        "is_bridge_day": [False] * days,
+    })
+
+
+def test_actuals_summary_reports_weekday_and_theme_bias():
+    summary = summarize_actuals_vs_predicted(_actuals(20, friday_extra=10))
+
+    assert summary["by_weekday"]["Friday"] == {"days": 4, "bias": 10.0, "mean_pct_error": 10.0}
+    assert summary["by_weekday"]["Monday"]["bias"] == 0.0
+    assert summary["by_theme"]["Fish"]["bias"] == 10.0
+    assert summary["by_category"]["total"]["bias_per_day"] == 2.0
+    assert summary["by_category"]["salad"]["mean_abs_pct_error"] is None  # nothing predicted, no ratio
+    assert [day["weekday"] for day in summary["outlier_days"]] == ["Friday"] * 4
+
+
+def test_payload_size_does_not_grow_with_the_period():
+    short = to_payload(summarize_actuals_vs_predicted(_actuals(20, friday_extra=10)))
+    long = to_payload(summarize_actuals_vs_predicted(_actuals(500, friday_extra=10)))
+
+    assert len(json.loads(long)["sample_rows"]) == MAX_SAMPLE_ROWS
+    assert len(long) < 1.2 * len(short)
+    assert len(long) < len(_actuals(500).to_json()) / 10
+
+
+def test_planning_summary_flags_holidays_and_unusual_days():
+    plan = _plan(15)
+    plan.loc[2, "holiday_desc"] = "Summer Break"
+    plan.loc[2, "is_school_break"] = True
+    plan.loc[7, "final_prediction"] = 150  # Wednesday, theme median is 100
+
+    summary = summarize_planning(plan)
+
+    assert summary["holiday_or_break_days"] == 1
+    assert summary["holiday_or_break_periods"] == [{
+        "start": "2026-07-15", "end": "2026-07-15", "days": 1,
+        "holiday_desc": "Summer Break", "is_school_break": True, "is_bridge_day": False,
+    }]
+    assert summary["unusual_days"] == [{
+        "date": "2026-07-22", "weekday": "Wednesday", "day_theme": "Chicken",
+        "final_prediction": 150, "pct_vs_theme_median": 50.0,
+    }]
+    assert summary["weather"]["temperature_max_min"] == 18.0
+    sample_dates = [row["date"] for row in summary["sample_rows"]]
+    assert "2026-07-15" in sample_dates and "2026-07-22" in sample_dates
+
+
+def test_planning_payload_stays_bounded_over_a_long_break():
+    short = _plan(20)
+    long = _plan(200)
+    long["holiday_desc"] = "Summer Break"
+    long["is_school_break"] = True
+    long.loc[::10, "is_bridge_day"] = True  # breaks the break into many runs
+
+    summary = summarize_planning(long)
+
+    assert summary["holiday_or_break_days"] == 200
+    assert len(summary["holiday_or_break_periods"]) == MAX_HOLIDAY_RUNS
+    assert summary["holiday_or_break_periods"][1] == {
+        "start": "2026-07-14", "end": "2026-07-24", "days": 9,
+        "holiday_desc": "Summer Break", "is_school_break": True, "is_bridge_day": False,
+    }
+    assert len(to_payload(summary)) < 1.5 * len(to_payload(summarize_planning(short)))
+
+
+def test_periods_without_outliers_list_none():
+    assert summarize_actuals_vs_predicted(_actuals(200))["outlier_days"] == []
+    assert summarize_planning(_plan(200))["unusual_days"] == []
+
+
+def test_empty_frames_give_an_empty_summary():
+    assert summarize_actuals_vs_predicted(_actuals(0))["period"]["days"] == 0
+    assert summarize_planning(_plan(0))["sample_rows"] == []
+
+
+def test_to_payload_reports_its_size(capsys):
+    payload = to_payload(summarize_planning(_plan(5)), name="planning")
+
+    assert f"LLM payload 'planning': {len(payload.encode('utf-8'))} bytes for 5 days" in capsys.readouterr().out
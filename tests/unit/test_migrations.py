@@ -0,0 +1,83 @@
+"""utils/migrations.py against in-memory SQLite: a fresh database, a second
+run, and a hand-made pre-runner schema with duplicate holidays and saved
+forecasts."""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from utils.migrations import MIGRATIONS, applied_versions, migrate
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+
+def test_fresh_database_gets_full_schema(engine):
+    assert migrate(engine) == [name for _, name, _ in MIGRATIONS]
+
+    schema = inspect(engine)
+    assert {"holidays", "predictions", "actual_sales", "veg_ratio_by_theme", "schema_migrations"} <= set(schema.get_table_names())
+    assert {"predicted_meals_salad", "final_prediction", "override_reason"} <= {c["name"] for c in schema.get_columns("predictions")}
+    assert "actual_meals_salad" in {c["name"] for c in schema.get_columns("actual_sales")}
+    assert "predictions_prediction_timestamp_idx" in {i["name"] for i in schema.get_indexes("predictions")}
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT version FROM data_versions WHERE name = 'holidays'")).scalar() == 1
+
+
+def test_second_run_is_a_no_op(engine):
+    migrate(engine)
+
+    assert migrate(engine) == []
+    assert applied_versions(engine) == {version for version, _, _ in MIGRATIONS}
+
+
+def test_existing_schema_is_upgraded_and_duplicate_holidays_dropped(engine):
+    # What the old init_db.py created, with the holidays seeded twice
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE holidays (date DATE, description TEXT, is_bank_holiday BOOLEAN, "
+                          "is_school_break BOOLEAN, is_bridge_day BOOLEAN)"))
+        conn.execute(text("CREATE TABLE predictions (date DATE PRIMARY KEY, predicted_meals INTEGER, "
+                          "prediction_timestamp TIMESTAMP, override_reason TEXT)"))
+        conn.execute(text("CREATE TABLE actual_sales (date DATE PRIMARY KEY, actual_meals INTEGER)"))
+        for _ in range(2):
+            conn.execute(text("INSERT INTO holidays (date, description) VALUES ('2026-12-25', 'Christmas')"))
+        conn.execute(text("INSERT INTO predictions (date, predicted_meals, prediction_timestamp) "
+                          "VALUES ('2026-07-13', 60, '2026-07-06 08:00:00')"))
+
+    migrate(engine)
+
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM holidays")).scalar() == 1
+        # Saved forecasts are carried over as their first vintage
+        assert conn.execute(text("SELECT predicted_meals FROM prediction_history")).scalars().all() == [60]
+        with pytest.raises(Exception):
+            conn.execute(text("INSERT INTO holidays (date, description) VALUES ('2026-12-25', 'Christmas')"))
+
+
+def test_failed_migration_is_rolled_back_and_not_recorded(engine):
+    def broken(conn):
+        conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        migrate(engine, MIGRATIONS + [(99, "broken", broken)])
+
+    assert 99 not in applied_versions(engine)
+    assert "half_done" not in inspect(engine).get_table_names()
+    assert migrate(engine) == []
+
+
+def test_holiday_dates_are_unique_per_region(engine):
+    migrate(engine)
+
+    with engine.begin() as conn:
+        for region in (None, "bavaria", "hesse"):
+            conn.execute(text("INSERT INTO holidays (date, description, region) VALUES ('2026-06-04', 'Fronleichnam', :region)"),
+                         {"region": region})
+        assert conn.execute(text("SELECT COUNT(*) FROM holidays")).scalar() == 3
+    for region in (None, "bavaria"):
+        with pytest.raises(Exception), engine.begin() as conn:
+            conn.execute(text("INSERT INTO holidays (date, description, region) VALUES ('2026-06-04', 'Again', :region)"),
+                         {"region": region})
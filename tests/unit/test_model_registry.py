@@ -0,0 +1,56 @@
+"""utils/model_registry.py — loads the model artifacts once per process and
+hot-reloads them after a retrain. Uses synthetic artifacts written to
+tmp_path, never the real data/models/ files.
+"""
+import os
+
+import joblib
+import pytest
+
+from utils.model_registry import ModelRegistry
+from tests.fixtures.model_artifact import write_model_artifacts
+
+pytestmark = pytest.mark.unit
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(*write_model_artifacts(tmp_path))
+
+
+def test_get_loads_artifacts_once(registry, mocker):
+    load_spy = mocker.spy(joblib, "load")
+
+    first = registry.get()
+    second = registry.get()
+
+    assert first is second
+    assert load_spy.call_count == 3  # model, feature list and encoder, a single time
+    assert first.training_timestamp == "2026-07-01T08:00:00"
+
+
+def test_get_reloads_after_retrain(registry, tmp_path):
+    old = registry.get()
+
+    write_model_artifacts(tmp_path, training_timestamp="2026-08-01T08:00:00")
+    for path in (registry.model_path, registry.features_path, registry.metadata_path):
+        _bump_mtime(path)
+
+    new = registry.get()
+    assert new is not old
+    assert new.training_timestamp == "2026-08-01T08:00:00"
+
+
+def test_get_keeps_previous_bundle_while_retrain_is_mid_swap(registry):
+    old = registry.get()
+
+    # New feature list is on disk but the metadata still describes the old run
+    joblib.dump(old.feature_columns + ["is_bridge_day"], registry.features_path)
+    _bump_mtime(registry.features_path)
+
+    assert registry.get() is old
@@ -0,0 +1,126 @@
+"""utils/single_flight.py — concurrent callers with the same key share one
+run. Threads are synchronised with Events, so nothing depends on timing."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils import weather_utils
+from utils.single_flight import SingleFlight, coalesce, get_single_flight_metrics
+
+pytestmark = pytest.mark.unit
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def _run_in_threads(n, target):
+    results = [None] * n
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_callers_share_one_run():
+    group = SingleFlight("test-share")
+    release = threading.Event()
+    runs = []
+
+    def slow_call():
+        runs.append(1)
+        release.wait(5)
+        return "weather"
+
+    threads, results = _run_in_threads(5, lambda: group.do("key", slow_call))
+    _wait_for(lambda: group.metrics()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["weather"] * 5
+    assert len(runs) == 1
+    assert group.metrics() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    group = SingleFlight("test-error")
+    release = threading.Event()
+
+    def failing_call():
+        release.wait(5)
+        raise ConnectionError("open-meteo down")
+
+    threads, results = _run_in_threads(3, lambda: group.do("key", failing_call))
+    _wait_for(lambda: group.metrics()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert group.metrics()["in_flight"] == 0
+
+
+def test_sequential_calls_are_not_cached():
+    group = SingleFlight("test-sequential")
+    counter = iter(range(10))
+
+    assert group.do("key", lambda: next(counter)) == 0
+    assert group.do("key", lambda: next(counter)) == 1
+    assert group.metrics()["coalesced"] == 0
+
+
+def test_coalesce_matches_positional_and_keyword_arguments():
+    group = SingleFlight("test-bind")
+    release = threading.Event()
+
+    @coalesce(group)
+    def fetch(start, end, type="forecast"):
+        release.wait(5)
+        return (start, end, type)
+
+    first = threading.Thread(target=fetch, args=("2026-07-13", "2026-07-14"))
+    first.start()
+    _wait_for(lambda: group.metrics()["in_flight"] == 1)
+    second = threading.Thread(target=fetch, kwargs={"start": "2026-07-13", "end": "2026-07-14", "type": "forecast"})
+    second.start()
+    _wait_for(lambda: group.metrics()["coalesced"] == 1)
+    release.set()
+    first.join()
+    second.join()
+
+    assert group.metrics()["executed"] == 1
+
+
+def test_concurrent_get_weather_calls_fetch_once(mocker):
+    release = threading.Event()
+
+    def slow_fetch(start_date, end_date, type, latitude, longitude):
+        release.wait(5)
+        return pd.DataFrame({"time": ["2026-07-13"], "temperature_2m_max": [22.5], "weather_code": [0]})
+
+    fetch = mocker.patch("utils.weather_utils._fetch_weather", side_effect=slow_fetch)
+    before = get_single_flight_metrics()["weather"]["coalesced"]
+
+    threads, results = _run_in_threads(
+        3, lambda: weather_utils.get_weather(start_date="2026-07-13", end_date="2026-07-13", type="forecast")
+    )
+    _wait_for(lambda: get_single_flight_metrics()["weather"]["coalesced"] == before + 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.call_count == 1
+    assert [list(result["weather_condition"]) for result in results] == [["Sunny"]] * 3
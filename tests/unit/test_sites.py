@@ -0,0 +1,94 @@
+"""utils/sites.py — forecast_sites' batch path against the single-kitchen
+prepare_data + get_prediction path. Uses the committed model artifacts;
+weather, holidays and veg ratios are mocked."""
+import pandas as pd
+from pandas.testing import assert_series_equal
+import pytest
+from freezegun import freeze_time
+
+from utils import sites
+from utils.data_preparation_utils import prepare_data
+from utils.holiday_calendar import HolidayCalendar
+from utils.prediction_utils import get_prediction
+from utils.sites import Site, forecast_sites
+
+pytestmark = pytest.mark.unit
+
+HOLIDAYS = pd.DataFrame({
+    "date": ["2026-06-04", "2026-06-05"],
+    "description": ["Fronleichnam", "Bridge Day (Fronleichnam)"],
+    "is_bank_holiday": [True, False],
+    "is_school_break": [False, False],
+    "is_bridge_day": [False, True],
+})
+
+
+def _weather(start_date, end_date, type, latitude=50.1330, longitude=8.6807):
+    dates = pd.bdate_range(start_date, end_date)
+    # Warmer further south, so sites' rows can be told apart
+    temperature = 20.0 + (50.1330 - latitude)
+    return pd.DataFrame({
+        "date": dates,
+        "temperature_max": [temperature] * len(dates),
+        "weather_code": [0] * len(dates),
+        "weather_icon": ["☀️"] * len(dates),
+        "weather_condition": ["Sunny"] * len(dates),
+    })
+
+
+def _weather_range_batch(locations, start_date, end_date):
+    return pd.concat(
+        [_weather(start_date, end_date, "forecast", *coords).assign(site_id=site_id, weather_source="forecast")
+         for site_id, coords in locations.items()],
+        ignore_index=True,
+    )
+
+
+@pytest.fixture
+def mocked_sources(mocker):
+    calendar = HolidayCalendar.from_frame(HOLIDAYS)
+    mocker.patch("utils.sites.get_weather_range_batch", side_effect=_weather_range_batch)
+    mocker.patch("utils.data_preparation_utils.get_weather_range",
+                 side_effect=lambda start_date, end_date, today: _weather(start_date, end_date, "forecast").assign(weather_source="forecast"))
+    for module in ("utils.sites", "utils.data_preparation_utils"):
+        mocker.patch(f"{module}.get_empirical_veg_ratios", return_value={})
+    mocker.patch("utils.sites.get_holiday_calendar", return_value=calendar)
+    mocker.patch("utils.data_preparation_utils.get_holiday_calendar", return_value=calendar)
+
+
+@freeze_time("2026-06-01 08:00:00")
+def test_forecast_sites_is_indexed_by_site_and_date(mocked_sources):
+    forecast = forecast_sites([Site("frankfurt"), Site("munich", latitude=48.14, longitude=11.58)], "2026-06-01", 5)
+
+    assert forecast.index.names == ["site_id", "date"]
+    # Fronleichnam (bank holiday) is dropped for both sites
+    assert forecast.loc["frankfurt"].index.strftime("%Y-%m-%d").tolist() == ["2026-06-01", "2026-06-02", "2026-06-03", "2026-06-05"]
+    assert len(forecast.loc["munich"]) == 4
+
+
+@freeze_time("2026-06-01 08:00:00")
+def test_forecast_sites_matches_single_site_path_with_one_model_pass(mocked_sources, mocker):
+    spy = mocker.spy(sites, "get_prediction")
+    munich = Site("munich", latitude=48.14, longitude=11.58)
+
+    forecast = forecast_sites([Site("frankfurt"), munich], "2026-06-01", 5)
+
+    assert spy.call_count == 1
+    expected = get_prediction(prepare_data("2026-06-01", 5)).set_index("date")
+    assert_series_equal(forecast.loc["frankfurt", "predicted_meals"], expected["predicted_meals"])
+    assert (forecast.loc["munich", "temperature_max"] == 20.0 + (50.1330 - 48.14)).all()
+
+
+@freeze_time("2026-06-01 08:00:00")
+def test_forecast_sites_uses_each_sites_theme_calendar(mocked_sources):
+    fish_every_day = {day: "Fish" for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]}
+
+    forecast = forecast_sites([Site("a"), Site("b", day_themes=fish_every_day)], "2026-06-01", 5)
+
+    assert forecast.loc["a", "day_theme"].tolist() == ["Sausage", "Vital", "Chicken", "Fish"]
+    assert forecast.loc["b", "day_theme"].tolist() == ["Fish"] * 4
+
+
+def test_forecast_sites_rejects_duplicate_site_ids():
+    with pytest.raises(ValueError, match="site_id must be unique"):
+        forecast_sites([Site("a"), Site("a")], "2026-06-01", 5)
@@ -0,0 +1,35 @@
+"""utils/sqlite_store.py, the connection helper behind the weather cache,
+feature store and LLM cache. Each test uses its own SQLite file."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils import sqlite_store
+
+pytestmark = pytest.mark.unit
+
+
+def test_schema_is_created_once_per_path(tmp_path):
+    path = tmp_path / "nested" / "store.sqlite"
+    create_schema = MagicMock(side_effect=lambda conn: conn.execute("CREATE TABLE t (n INTEGER)"))
+
+    for n in range(3):
+        with sqlite_store.connect(path, create_schema) as conn:
+            conn.execute("INSERT INTO t VALUES (?)", (n,))
+
+    create_schema.assert_called_once()
+    with sqlite_store.connect(str(path), create_schema) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 3
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    create_schema.assert_called_once()
+
+
+def test_failed_schema_is_retried_on_the_next_connection(tmp_path):
+    path = tmp_path / "store.sqlite"
+    create_schema = MagicMock(side_effect=[RuntimeError("disk I/O error"), None])
+
+    with pytest.raises(RuntimeError):
+        sqlite_store.connect(path, create_schema)
+    sqlite_store.connect(path, create_schema).close()
+
+    assert create_schema.call_count == 2
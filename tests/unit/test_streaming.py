@@ -0,0 +1,157 @@
+"""utils/streaming.py, and the streamed Anthropic calls in utils/llm_insights
+run against a local stub server replaying canned SSE responses
+(tests/fixtures/anthropic_stub.py)."""
+import json
+import threading
+
+import pytest
+
+from tests.fixtures.anthropic_stub import AnthropicStub
+from utils import llm_insights
+from utils.streaming import StreamingTask, iter_json_objects, shared_task, start_streaming
+
+pytestmark = pytest.mark.unit
+
+INSIGHTS = [
+    {"type": "warning", "title": "Fridays", "message": "Fridays run 4% high. Trim the Friday order."},
+    {"type": "success", "title": "Veg split", "message": "The split {veg/non-veg} is \"on target\". Keep it."},
+]
+
+
+@pytest.fixture
+def anthropic_stub(monkeypatch, mocker):
+    st = mocker.patch("utils.llm_insights.st")
+    st.secrets = {"ANTHROPIC_API_KEY": "test-key"}
+    with AnthropicStub() as stub:
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", stub.url)
+        yield stub
+
+
+def split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_iter_json_objects_yields_cards_split_across_chunks():
+    text = "```json\n" + json.dumps(INSIGHTS, ensure_ascii=False) + "\n```"
+
+    assert list(iter_json_objects(split(text, 3))) == INSIGHTS
+
+
+def test_iter_json_objects_skips_non_json_and_broken_objects():
+    assert list(iter_json_objects(["No issues found.", " [{broken}, {\"type\": ", "\"info\"}"])) == [{"type": "info"}]
+
+
+def test_task_replays_chunks_to_every_reader():
+    release = threading.Event()
+
+    def produce():
+        yield "a"
+        release.wait(5)
+        yield "b"
+
+    task = StreamingTask(produce)
+    first = task.stream()
+    assert next(first) == "a"
+    release.set()
+
+    assert list(first) == ["b"]
+    assert list(task.stream()) == ["a", "b"]
+    assert task.done and task.text() == "ab"
+
+
+def test_start_streaming_reuses_task_until_arguments_change():
+    store = {}
+    first = start_streaming(store, "task", lambda x: iter([x]), "a")
+
+    assert start_streaming(store, "task", lambda x: iter([x]), "a") is first
+    second = start_streaming(store, "task", lambda x: iter([x]), "b")
+    assert second is not first and list(second.stream()) == ["b"]
+
+
+def test_stream_yields_deltas_and_caches_full_text(anthropic_stub):
+    text = json.dumps(INSIGHTS)
+    anthropic_stub.replies.append(split(text, 7))
+
+    chunks = list(llm_insights.stream_llm_insights_for_actuals_vs_predicted('{"days": 5}', "EN"))
+
+    assert len(chunks) == len(split(text, 7))
+    assert list(iter_json_objects(chunks)) == INSIGHTS
+    assert anthropic_stub.requests[0]["stream"] is True
+    # Served from the cache the second time, in one piece
+    assert list(llm_insights.stream_llm_insights_for_actuals_vs_predicted('{"days": 5}', "EN")) == [text]
+    assert len(anthropic_stub.requests) == 1
+
+
+def test_stream_falls_back_on_api_error_without_caching(anthropic_stub):
+    anthropic_stub.replies += [400, ["- Monday looks low"]]
+
+    assert list(llm_insights.stream_llm_planning_insights('{"days": 5}', "DE")) == [llm_insights._PLANNING_FALLBACK["DE"]]
+    assert list(llm_insights.stream_llm_planning_insights('{"days": 5}', "DE")) == ["- Monday looks low"]
+
+
+def test_background_task_streams_from_stub(anthropic_stub):
+    anthropic_stub.replies.append(["- Monday ", "looks ", "low"])
+
+    task = StreamingTask(llm_insights.stream_llm_planning_insights, '{"days": 5}', "EN")
+
+    assert "".join(task.stream()) == "- Monday looks low"
+
+
+def test_stream_records_cache_read_tokens(anthropic_stub):
+    anthropic_stub.cached_prompt_tokens = 1200
+    anthropic_stub.replies.append(["- Monday ", "looks ", "low"])
+    before = llm_insights.get_llm_usage()
+
+    list(llm_insights.stream_llm_planning_insights('{"days": 5}', "EN"))
+
+    after = llm_insights.get_llm_usage()
+    assert after["calls"] - before["calls"] == 1
+    assert after["cache_read_input_tokens"] - before["cache_read_input_tokens"] == 1200
+    assert after["output_tokens"] - before["output_tokens"] == 3
+    assert "cache_control" not in anthropic_stub.requests[0]["system"][0]
+
+
+def test_shared_task_is_reused_until_it_finishes():
+    release = threading.Event()
+
+    def produce(x):
+        release.wait(5)
+        yield x
+
+    first = shared_task("key", produce, "a")
+    assert shared_task("key", produce, "b") is first
+    release.set()
+    assert list(first.stream()) == ["a"]
+
+    assert shared_task("key", produce, "c") is not first
+
+
+def test_concurrent_streams_of_the_same_prompt_share_one_response(mocker):
+    release = threading.Event()
+    calls = []
+
+    def response(*args):
+        calls.append(args)
+        yield "- Monday "
+        release.wait(5)
+        yield "looks low"
+
+    mocker.patch("utils.llm_insights._stream_response", side_effect=response)
+    first = llm_insights.stream_llm_planning_insights('{"days": 6}', "EN")
+    second = llm_insights.stream_llm_planning_insights('{"days": 6}', "EN")
+
+    assert next(first) == next(second) == "- Monday "
+    release.set()
+    assert list(first) == list(second) == ["looks low"]
+    assert len(calls) == 1
+
+
+def test_stream_that_breaks_off_counts_as_an_anthropic_failure(anthropic_stub):
+    anthropic_stub.replies += [(["- Monday "], "overloaded_error")] * llm_insights.llm_breaker.failure_threshold
+
+    for i in range(llm_insights.llm_breaker.failure_threshold):
+        chunks = list(llm_insights.stream_llm_planning_insights(f'{{"days": {i}}}', "EN"))
+        assert chunks == ["- Monday "]  # shown as far as it got
+
+    assert llm_insights.llm_breaker.state == "open"
+    assert list(llm_insights.stream_llm_planning_insights('{"days": 9}', "EN")) == [llm_insights._PLANNING_FALLBACK["EN"]]
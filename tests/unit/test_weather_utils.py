@@ -1,38 +1,42 @@
 """utils/weather_utils.py — spans three phases of the roadmap in one file,
 since the module is small and each phase applies naturally to it:
 
-- Phase 0: characterization tests pinning down two known bugs (no fix yet,
-  per team decision — these tests exist to document current behavior so a
-  future fix has a clear "before" to diff against).
+- Phase 0: characterization tests for two former bugs, now asserting the
+  clear errors that replaced them.
 - Phase 1: pure boundary-value tests for categorize_weather.
-- Phase 3: mocked-HTTP happy-path test for get_weather (via `responses`).
+- Phase 3: mocked-HTTP happy-path test for get_weather (via `responses`),
+  plus its persistent cache (tests/conftest.py gives each test a cold one).
 """
 import pytest
 import responses
+from freezegun import freeze_time
 
-from utils.weather_utils import categorize_weather, get_weather
+import pandas as pd
+
+from utils import weather_utils
+from utils.weather_utils import (
+    build_climatology, categorize_weather, categorize_weather_codes, get_climatology_weather, get_weather,
+    get_weather_batch, get_weather_range, get_weather_range_batch, weather_segments,
+)
 from tests.fixtures.weather_responses import response_missing_daily_key,valid_daily_response
 
 pytestmark = pytest.mark.unit
 
 
-# --- Phase 0: characterization tests for known bugs ---------------------
+# --- Phase 0: characterization tests for (now fixed) bugs ---------------
 
 def test_get_weather_raises_on_unrecognized_type():
-    # BUG (characterized, not yet fixed): `type` is only handled for
-    # "forecast"/"past" in weather_utils.get_weather — anything else leaves
-    # `url` unassigned before it's used in requests.get(), raising
-    # UnboundLocalError instead of a clear validation error.
-    with pytest.raises(UnboundLocalError):
+    # Fixed: an unknown `type` used to leave `url` unassigned and raise
+    # UnboundLocalError; it is now rejected with a clear validation error.
+    with pytest.raises(ValueError, match="Unknown weather type"):
         get_weather(start_date="2026-07-13", end_date="2026-07-14", type="bogus")
 
 
 @responses.activate
 def test_get_weather_raises_when_response_missing_daily_key():
-    # BUG (characterized, not yet fixed): if the Open-Meteo response has no
-    # "daily" key (e.g. an out-of-range date request), `weather_df` is never
-    # assigned but is still referenced two lines later, raising
-    # UnboundLocalError instead of a clear error about the bad response.
+    # Fixed: a response without a "daily" key (e.g. an out-of-range date
+    # request) used to leave `weather_df` unassigned and raise
+    # UnboundLocalError; it now raises a clear error about the bad response.
     responses.add(
         responses.GET,
         "https://api.open-meteo.com/v1/forecast",
@@ -40,7 +44,7 @@ def test_get_weather_raises_when_response_missing_daily_key():
         status=200,
     )
 
-    with pytest.raises(UnboundLocalError):
+    with pytest.raises(ValueError, match="no daily data"):
         get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
 
 
@@ -103,3 +107,241 @@ def test_get_weather_past_hits_archive_endpoint():
     df = get_weather(start_date="2026-01-01", end_date="2026-01-02", type="past")
 
     assert len(df) == 2
+
+
+# --- Persistent weather cache ---------------------------------------------
+
+@responses.activate
+def test_get_weather_serves_repeat_requests_from_cache():
+    responses.add(
+        responses.GET,
+        "https://api.open-meteo.com/v1/forecast",
+        json=valid_daily_response(),
+        status=200,
+    )
+
+    first = get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+    second = get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    assert len(responses.calls) == 1
+    assert list(second["weather_condition"]) == list(first["weather_condition"])
+    assert list(second["temperature_max"]) == list(first["temperature_max"])
+
+
+@responses.activate
+def test_get_weather_only_fetches_days_missing_from_cache():
+    responses.add(
+        responses.GET,
+        "https://archive-api.open-meteo.com/v1/archive",
+        json=valid_daily_response(),
+        status=200,
+    )
+    get_weather(start_date="2026-07-13", end_date="2026-07-14", type="past")
+    responses.replace(
+        responses.GET,
+        "https://archive-api.open-meteo.com/v1/archive",
+        json=valid_daily_response(dates=["2026-07-15"], temps=[25.0], codes=[95]),
+        status=200,
+    )
+
+    df = get_weather(start_date="2026-07-13", end_date="2026-07-15", type="past")
+
+    assert responses.calls[-1].request.params["start_date"] == "2026-07-15"
+    assert list(df["weather_condition"]) == ["Sunny", "Rainy", "Stormy"]
+
+
+@responses.activate
+def test_get_weather_refetches_forecast_after_ttl_but_keeps_archive():
+    for url in ("https://api.open-meteo.com/v1/forecast", "https://archive-api.open-meteo.com/v1/archive"):
+        responses.add(responses.GET, url, json=valid_daily_response(), status=200)
+
+    with freeze_time("2026-07-10 08:00:00"):
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="past")
+
+    with freeze_time("2026-07-10 12:00:00"):  # 4h later - past the 3h forecast TTL
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+        get_weather(start_date="2026-07-13", end_date="2026-07-14", type="past")
+
+    called_urls = [call.request.url.split("?")[0] for call in responses.calls]
+    assert called_urls.count("https://api.open-meteo.com/v1/forecast") == 2
+    assert called_urls.count("https://archive-api.open-meteo.com/v1/archive") == 1
+
+
+def test_categorize_weather_codes_matches_categorize_weather():
+    codes = list(range(-5, 106)) + [float("nan"), 2.5, 1e6]
+
+    icons, labels = categorize_weather_codes(codes)
+
+    expected = [categorize_weather(code) for code in codes]
+    assert list(zip(icons, labels)) == expected
+
+
+# --- Batched multi-location fetch -------------------------------------------
+
+SITES = {"frankfurt": (50.1330, 8.6807), "munich": (48.1374, 11.5755)}
+
+
+@responses.activate
+def test_get_weather_batch_fetches_all_sites_in_one_request():
+    responses.add(
+        responses.GET,
+        "https://api.open-meteo.com/v1/forecast",
+        json=[valid_daily_response(), valid_daily_response(temps=[30.0, 31.0], codes=[95, 95])],
+        status=200,
+    )
+
+    df = get_weather_batch(SITES, start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.params["latitude"] == "50.133,48.1374"
+    assert df.groupby("site_id")["temperature_max"].apply(list).to_dict() == {
+        "frankfurt": [22.5, 19.0], "munich": [30.0, 31.0],
+    }
+    assert list(df.loc[df["site_id"] == "munich", "weather_condition"]) == ["Stormy", "Stormy"]
+
+
+@responses.activate
+def test_get_weather_batch_shares_the_cache_with_get_weather():
+    responses.add(responses.GET, "https://api.open-meteo.com/v1/forecast", json=valid_daily_response(), status=200)
+    get_weather(start_date="2026-07-13", end_date="2026-07-14", type="forecast")  # caches frankfurt
+
+    # Only munich is missing - and a single location comes back as an object, not a list
+    df = get_weather_batch(SITES, start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+    get_weather_batch(SITES, start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.params["latitude"] == "48.1374"
+    assert len(df) == 4
+
+
+@responses.activate
+def test_get_weather_batch_fetches_a_shared_point_once():
+    responses.add(responses.GET, "https://archive-api.open-meteo.com/v1/archive", json=valid_daily_response(), status=200)
+
+    df = get_weather_batch(
+        {"canteen_a": (50.1330, 8.6807), "canteen_b": (50.13300001, 8.6807)},
+        start_date="2026-07-13", end_date="2026-07-14", type="past",
+    )
+
+    assert responses.calls[0].request.params["latitude"] == "50.133"
+    assert df["site_id"].tolist() == ["canteen_a", "canteen_a", "canteen_b", "canteen_b"]
+
+
+@responses.activate
+def test_get_weather_batch_raises_when_a_location_has_no_daily_data():
+    responses.add(
+        responses.GET,
+        "https://api.open-meteo.com/v1/forecast",
+        json=[valid_daily_response(), response_missing_daily_key()],
+        status=200,
+    )
+
+    with pytest.raises(ValueError, match="no daily data"):
+        get_weather_batch(SITES, start_date="2026-07-13", end_date="2026-07-14", type="forecast")
+
+
+def test_get_weather_batch_rejects_unknown_type():
+    with pytest.raises(ValueError, match="Unknown weather type"):
+        get_weather_batch(SITES, start_date="2026-07-13", end_date="2026-07-14", type="tomorrow")
+
+
+# --- Archive / forecast / climatology segments -----------------------------
+
+def test_weather_segments_split_a_range_straddling_today_and_the_horizon():
+    assert weather_segments("2026-06-30", "2026-08-05", today="2026-07-10") == [
+        ("past", "2026-06-30", "2026-07-04"),
+        ("forecast", "2026-07-05", "2026-07-25"),
+        ("climatology", "2026-07-26", "2026-08-05"),
+    ]
+
+
+def test_weather_segments_leave_out_empty_segments():
+    assert weather_segments("2026-07-13", "2026-07-17", today="2026-07-10") == [("forecast", "2026-07-13", "2026-07-17")]
+
+
+@responses.activate
+def test_build_climatology_takes_median_temperature_and_modal_code_per_calendar_day():
+    responses.add(
+        responses.GET,
+        "https://archive-api.open-meteo.com/v1/archive",
+        json=valid_daily_response(
+            dates=["2023-08-01", "2024-08-01", "2025-08-01", "2023-08-02", "2024-08-02", "2025-08-02"],
+            temps=[20.0, 30.0, 24.0, 18.0, 19.0, 21.0],
+            codes=[61, 0, 61, 3, 0, 95],
+        ),
+        status=200,
+    )
+
+    climatology = build_climatology(today="2026-07-10")
+
+    assert responses.calls[0].request.params["start_date"] == "2016-01-01"
+    assert responses.calls[0].request.params["end_date"] == "2025-12-31"
+    assert climatology.set_index("month_day").to_dict("index") == {
+        "08-01": {"temperature_max": 24.0, "weather_code": 61},
+        "08-02": {"temperature_max": 19.0, "weather_code": 0},  # three-way tie -> lowest code
+    }
+
+
+def test_climatology_weather_is_served_from_the_local_table(mocker):
+    weather_utils._weather_cache.put_climatology(
+        weather_utils.DEFAULT_LATITUDE, weather_utils.DEFAULT_LONGITUDE,
+        pd.DataFrame({"month_day": ["08-01", "08-02"], "temperature_max": [24.0, 19.0], "weather_code": [61, 0]}),
+    )
+    fetch = mocker.patch("utils.weather_utils._fetch_weather")
+
+    df = get_climatology_weather("2026-08-01", "2026-08-02")
+
+    fetch.assert_not_called()
+    assert list(df["temperature_max"]) == [24.0, 19.0]
+    assert list(df["weather_condition"]) == ["Rainy", "Sunny"]
+
+
+@responses.activate
+def test_get_weather_range_stitches_the_three_segments():
+    responses.add(
+        responses.GET, "https://archive-api.open-meteo.com/v1/archive",
+        json=valid_daily_response(dates=["2026-07-04"], temps=[25.0], codes=[0]), status=200,
+    )
+    responses.add(
+        responses.GET, "https://api.open-meteo.com/v1/forecast",
+        json=valid_daily_response(dates=["2026-07-05"], temps=[26.0], codes=[61]), status=200,
+    )
+    weather_utils._weather_cache.put_climatology(
+        weather_utils.DEFAULT_LATITUDE, weather_utils.DEFAULT_LONGITUDE,
+        pd.DataFrame({"month_day": ["07-26"], "temperature_max": [23.0], "weather_code": [3]}),
+    )
+
+    with freeze_time("2026-07-10"):
+        df = get_weather_range("2026-07-04", "2026-07-26", today="2026-07-10")
+
+    by_source = df.dropna(subset=["temperature_max"]).set_index("weather_source")["temperature_max"].to_dict()
+    assert by_source == {"past": 25.0, "forecast": 26.0, "climatology": 23.0}
+    assert df["date"].is_monotonic_increasing
+
+
+@responses.activate
+def test_get_weather_range_batch_splits_sites_weather_into_segments():
+    responses.add(
+        responses.GET, "https://archive-api.open-meteo.com/v1/archive",
+        json=[valid_daily_response(dates=["2026-07-04"], temps=[25.0], codes=[0])] * 2, status=200,
+    )
+    responses.add(
+        responses.GET, "https://api.open-meteo.com/v1/forecast",
+        json=[valid_daily_response(dates=["2026-07-05"], temps=[26.0], codes=[61])] * 2, status=200,
+    )
+    for latitude, longitude in SITES.values():
+        weather_utils._weather_cache.put_climatology(
+            latitude, longitude,
+            pd.DataFrame({"month_day": ["07-26"], "temperature_max": [23.0], "weather_code": [3]}),
+        )
+
+    with freeze_time("2026-07-10"):
+        df = get_weather_range_batch(SITES, "2026-07-04", "2026-07-26", today="2026-07-10")
+
+    # One request per API segment for both sites, the climatology from the local table
+    assert len(responses.calls) == 2
+    for site_id, site_df in df.groupby("site_id"):
+        by_source = site_df.dropna(subset=["temperature_max"]).set_index("weather_source")["temperature_max"].to_dict()
+        assert by_source == {"past": 25.0, "forecast": 26.0, "climatology": 23.0}
+        assert site_df["date"].is_monotonic_increasing
@@ -1,6 +1,6 @@
 # utils/__init__.py
 from .weather_utils import get_weather, categorize_weather
-from .db_utils import get_holidays, save_prediction, get_future_predictions, get_actuals_and_predictions, apply_custom_styling, calculate_metrics, get_missing_actuals, save_actuals
+from .db_utils import get_holidays, save_prediction, get_future_predictions, get_actuals_and_predictions, apply_custom_styling, calculate_metrics, get_missing_actuals, save_actuals, get_empirical_veg_ratios
 from .prediction_utils import get_prediction, split_veg_non_veg
 from .data_preparation_utils import prepare_data, render_badges
 from .home_utils import load_model_metadata, check_database_status, check_weather_api_status, get_last_prediction_info
@@ -9,6 +9,7 @@ from .llm_insights import get_llm_insights_for_actuals_vs_predicted, get_llm_pla
 from .translations_utils import get_translations
 from .import_utils import csv_validation
 from .export_pdf import convert_df_to_pdf
+from .sites import Site, forecast_sites
 
 
 
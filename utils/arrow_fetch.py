@@ -0,0 +1,126 @@
+"""Optional Arrow-native read path for Postgres.
+
+conn.query builds its DataFrame from SQLAlchemy row objects, one Python
+object per value, and the readers then parse their date columns with
+pd.to_datetime. When the ADBC Postgres driver is installed
+(`pip install adbc-driver-postgresql`), the readers in db_utils fetch
+their results through it instead: the server's binary COPY output goes
+straight into Arrow columns and then into pandas, already typed - dates and
+timestamps included. Without the driver, or on SQLite, nothing changes.
+"""
+import contextlib
+import queue
+import re
+import threading
+
+import streamlit as st
+
+try:
+    import adbc_driver_postgresql.dbapi as adbc_postgresql
+except ImportError:  # optional - db_utils falls back to conn.query
+    adbc_postgresql = None
+
+# :name bind parameters, but not the :: of a cast
+_NAMED_PARAM = re.compile(r"(?<!:):([A-Za-z_]\w*)")
+
+# Idle ADBC connections kept per database. A connection serves one read at a
+# time; a read that finds none idle opens another, so sessions never queue
+# behind each other.
+POOL_SIZE = 4
+
+def arrow_available(engine):
+    """Whether reads against `engine` can take the Arrow path."""
+    return adbc_postgresql is not None and getattr(engine, 'dialect', None) is not None \
+        and engine.dialect.name == 'postgresql'
+
+
+def to_positional(sql, params):
+    """Rewrite :name parameters as Postgres $1, $2, ... and return the SQL
+    with the values in matching order."""
+    params = params or {}
+    order = []
+
+    def number(match):
+        name = match.group(1)
+        if name not in order:
+            order.append(name)
+        return f"${order.index(name) + 1}"
+
+    return _NAMED_PARAM.sub(number, sql), [params[name] for name in order]
+
+
+def _close(connection):
+    with contextlib.suppress(Exception):  # it may well be dead already
+        connection.close()
+
+
+class _ConnectionPool:
+    """The idle connections to one database. Once closed, connections still
+    checked out by other reads are closed when they're handed back instead
+    of being kept."""
+
+    def __init__(self, size):
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def get(self):
+        """An idle connection, or None."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return None
+
+    def put(self, connection):
+        with self._lock:
+            if not self.closed:
+                try:
+                    self._idle.put_nowait(connection)
+                    return
+                except queue.Full:
+                    pass
+        _close(connection)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            idle = []
+            while (connection := self.get()) is not None:
+                idle.append(connection)
+        for connection in idle:
+            _close(connection)
+
+
+@st.cache_resource
+def _get_adbc_pool(uri):
+    return _ConnectionPool(POOL_SIZE)
+
+
+def _discard_pool(pool):
+    # After a failed read the server may have restarted or the network
+    # dropped: drop the pool, and the next read reconnects
+    _get_adbc_pool.clear()
+    pool.close()
+
+
+def fetch_arrow_frame(engine, sql, params=None):
+    """Run `sql` over ADBC and return the result as a typed DataFrame."""
+    uri = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+    positional_sql, values = to_positional(sql, params)
+    pool = _get_adbc_pool(uri)
+    connection = pool.get()
+    if connection is None:
+        # Autocommit, so a read doesn't leave the connection idle in a transaction
+        connection = adbc_postgresql.connect(uri, autocommit=True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(positional_sql, values)
+            table = cursor.fetch_arrow_table()
+    except Exception:
+        _close(connection)
+        _discard_pool(pool)
+        raise
+    pool.put(connection)
+    # date columns become datetime64 as well, matching the pd.to_datetime
+    # the fallback path applies
+    return table.to_pandas(date_as_object=False)
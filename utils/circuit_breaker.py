@@ -0,0 +1,126 @@
+"""Circuit breakers for the external services (Open-Meteo, Anthropic).
+
+While an upstream is healthy the breaker is closed and calls go straight
+through. After FAILURE_THRESHOLD consecutive upstream failures it opens:
+calls fail fast with CircuitBreakerOpen, so the caller can serve a cached
+value or its fallback text right away, instead of every rerun blocking for
+the full HTTP timeout. While open, a background thread runs the breaker's
+probe every PROBE_INTERVAL seconds (state "half_open" while probing), and
+the breaker closes again as soon as a probe succeeds.
+
+Breakers are process-wide, so one session's outage spares everyone else the
+timeout. get_breaker_states() feeds the Home page status grid.
+"""
+import threading
+import time
+
+FAILURE_THRESHOLD = 3
+PROBE_INTERVAL = 30  # seconds
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breakers = {}
+
+
+class CircuitBreakerOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, probe, is_failure=lambda e: True,
+                 failure_threshold=FAILURE_THRESHOLD, probe_interval=PROBE_INTERVAL):
+        self.name = name
+        self.probe = probe              # zero-argument call that raises while the upstream is down
+        self.is_failure = is_failure    # which exceptions count as the upstream being down
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()  # stops the current probe thread
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        _breakers[name] = self
+
+    def call(self, fn):
+        """fn() through the breaker; raises CircuitBreakerOpen without calling fn while open."""
+        self.check()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    # check / record_failure / record_success are call() in pieces, for work
+    # that doesn't fit in one function call (a streamed response is only a
+    # success once its last chunk has arrived)
+
+    def check(self):
+        """Raise CircuitBreakerOpen unless the breaker is closed."""
+        with self._lock:
+            if self.state != CLOSED:
+                raise CircuitBreakerOpen(f"{self.name} is unavailable (circuit {self.state})")
+
+    def record_failure(self, e):
+        if self.is_failure(e):
+            self._record_failure()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.time()
+                print(f"Circuit breaker '{self.name}' opened after {self.failures} failures")
+                self._stop = threading.Event()
+                threading.Thread(
+                    target=self._probe_until_closed, args=(self._stop,),
+                    name=f"breaker-probe-{self.name}", daemon=True,
+                ).start()
+
+    def _probe_until_closed(self, stop):
+        while not stop.wait(self.probe_interval):
+            with self._lock:
+                if stop.is_set():
+                    return
+                self.state = HALF_OPEN
+            try:
+                self.probe()
+            except Exception as e:
+                print(f"Circuit breaker '{self.name}' probe failed: {e}")
+                with self._lock:
+                    if not stop.is_set():
+                        self.state = OPEN
+                continue
+            with self._lock:
+                if stop.is_set():
+                    return
+                self.state = CLOSED
+                self.failures = 0
+                self.opened_at = None
+            print(f"Circuit breaker '{self.name}' closed, upstream recovered")
+            return
+
+    def reset(self):
+        """Close the breaker and stop probing (tests, or after a manual fix)."""
+        self._stop.set()
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'opened_at': self.opened_at}
+
+
+def get_breaker_states():
+    """{breaker name: snapshot()} for every breaker in the process."""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
@@ -0,0 +1,52 @@
+"""Run independent I/O calls (HTTP, SQL) side by side on a small bounded
+thread pool, so a page waits for the slowest call rather than their sum.
+
+Each call gets its own timeout, counted from the moment the batch is
+submitted. The first failure is re-raised as-is with a note naming the call
+that failed, and the calls that haven't started yet are cancelled.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 30  # seconds
+
+
+def run_concurrently(calls, timeouts=None, default_timeout=DEFAULT_TIMEOUT):
+    """Run {name: zero-argument callable} concurrently and return {name: result}.
+
+    timeouts maps a name to its timeout in seconds (default_timeout otherwise).
+    Raises the first exception (or TimeoutError) in submission order.
+    """
+    timeouts = timeouts or {}
+    # Streamlit caches and connections look up the session of the running
+    # script; hand the caller's context to the worker threads.
+    ctx = get_script_run_ctx(suppress_warning=True)
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(calls), MAX_WORKERS)),
+        thread_name_prefix="kc-io",
+        initializer=(lambda: add_script_run_ctx(ctx=ctx)) if ctx is not None else None,
+    )
+    submitted = time.monotonic()
+    futures = {name: executor.submit(fn) for name, fn in calls.items()}
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            deadline = submitted + timeouts.get(name, default_timeout)
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError as e:
+                if not future.done():
+                    raise TimeoutError(f"{name} did not finish within {timeouts.get(name, default_timeout)}s") from e
+                e.add_note(f"raised by concurrent call '{name}'")
+                raise
+            except Exception as e:
+                e.add_note(f"raised by concurrent call '{name}'")
+                raise
+    finally:
+        # Don't wait for a call that timed out; queued calls are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
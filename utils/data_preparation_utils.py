@@ -1,20 +1,59 @@
 import pandas as pd
 from datetime import datetime
-from utils import get_holidays, get_weather, day_themes
+from functools import partial
+from utils import day_themes
+from utils.weather_utils import forecast_window, get_weather_range
+from utils.concurrency import run_concurrently
+from utils.db_utils import get_empirical_veg_ratios
+from utils.feature_store import FeatureStore
+from utils.holiday_calendar import get_holiday_calendar
+
+_feature_store = FeatureStore()
+
+# Per-call timeouts (seconds) for prepare_data's concurrent fetches
+FETCH_TIMEOUTS = {'weather': 30, 'holidays': 10, 'veg_ratios': 10}
 
 def prepare_data(start_date, number_of_days):
-    start, end, weather_type, business_days = compute_date_range_and_weather_type(start_date, number_of_days, today=None)
-
-    # Fetch weather data using those dates
-    weather_df = get_weather(start_date=start, end_date=end, type=weather_type)
-    # Fetch holidays from the database
-    holidays = get_holidays(start, end)
-    
-    df = build_data_features(business_days)
+    start, end, _, business_days = compute_date_range_and_weather_type(start_date, number_of_days, today=None)
+    today = datetime.today().date()
+    first_forecast_day, _ = forecast_window(today)
+
+    # Read what's already materialized, only the missing/stale days are computed live
+    df = _feature_store.get(start, end, archive_before=first_forecast_day.strftime('%Y-%m-%d'))
+    missing_days = business_days[~business_days.isin(df['date'])]
+
+    # Weather (HTTP), holidays and the veg ratios get_prediction needs (SQL)
+    # are independent: fetch them side by side, merge once all have arrived.
+    # The weather range is split into archive / forecast / climatology days.
+    calls = {'veg_ratios': get_empirical_veg_ratios}
+    if len(missing_days):
+        missing_start = missing_days.min().strftime('%Y-%m-%d')
+        missing_end = missing_days.max().strftime('%Y-%m-%d')
+        calls['weather'] = partial(get_weather_range, start_date=missing_start, end_date=missing_end, today=today)
+        calls['holidays'] = partial(_lookup_holidays, missing_start, missing_end)
+    results = run_concurrently(calls, timeouts=FETCH_TIMEOUTS)
+
+    if len(missing_days):
+        computed = build_features(missing_days, results['weather'], results['holidays'])
+        weather_sources = computed['date'].map(results['weather'].set_index('date')['weather_source'])
+        _feature_store.put(computed, weather_sources)
+        df = pd.concat([df, computed]) if len(df) else computed
+        df = df.sort_values('date').reset_index(drop=True)
+
+    df = drop_bank_holidays(df)
+    # Picked up by get_prediction, so it doesn't query the ratios again
+    df.attrs['veg_ratios'] = results['veg_ratios']
+    return df
+
+def _lookup_holidays(start, end):
+    # In-memory calendar, loaded from the database once per process
+    return get_holiday_calendar().lookup(start, end)
+
+def build_features(business_days, weather_df, holidays, themes=None):
+    df = build_data_features(business_days, themes)
     df = merge_weather(df, weather_df)
     holidays = clean_holidays_data(holidays)
-    df = merge_and_clean_holidays(df, holidays)
-    return df
+    return merge_holidays(df, holidays)
 
 def compute_date_range_and_weather_type(start_date, number_of_days, today):
     business_days = pd.date_range(start=start_date, periods=number_of_days, freq='B')
@@ -30,7 +69,8 @@ def compute_date_range_and_weather_type(start_date, number_of_days, today):
 
     return start_date_str, end_date_str, weather_type, business_days
 
-def build_data_features(business_days):
+def build_data_features(business_days, themes=None):
+    # themes: weekday -> day theme for the site, the kitchen's DAY_THEMES by default
     df = pd.DataFrame({'date': business_days})
     df['date'] = pd.to_datetime(df['date'])
 
@@ -39,7 +79,7 @@ def build_data_features(business_days):
 
     df['weekday'] = df['date'].dt.day_name()
     df['month'] = df['date'].dt.month_name()
-    df['day_theme'] = df['weekday'].map(day_themes.DAY_THEMES)
+    df['day_theme'] = df['weekday'].map(themes if themes is not None else day_themes.DAY_THEMES)
     return df
 
 def merge_weather(df, weather_df):
@@ -62,7 +102,11 @@ def clean_holidays_data(holidays):
 
     return holidays
 
-def merge_and_clean_holidays(df, holidays): 
+def merge_and_clean_holidays(df, holidays):
+    df = merge_holidays(df, holidays)
+    return drop_bank_holidays(df)
+
+def merge_holidays(df, holidays):
     # Merge holiday data
     df = df.merge(
         holidays[['date', 'description', 'is_bank_holiday', 'is_school_break', 'is_bridge_day']],
@@ -70,20 +114,22 @@ def merge_and_clean_holidays(df, holidays):
         on='date'
     ).rename(columns={'description': 'holiday_desc'})
 
-    # Remove bank holidays - ADD THIS LINE
-    df = df[(df['is_bank_holiday'] != 1) | (df['is_bank_holiday'].isna())]
-    # Drop the column if you don't need it anymore
-    df = df.drop('is_bank_holiday', axis=1)
-
     df = df.infer_objects(copy=False)
 
     # Handle missing values
+    df['is_bank_holiday'] = df['is_bank_holiday'].astype('boolean').fillna(False)
     df['is_school_break'] = df['is_school_break'].astype('boolean').fillna(False)
     df['is_bridge_day'] = df['is_bridge_day'].astype('boolean').fillna(False)
     df['holiday_desc'] = df['holiday_desc'].fillna('').astype(str)
 
     return df
 
+def drop_bank_holidays(df):
+    # Remove bank holidays, the kitchen is closed
+    df = df[~df['is_bank_holiday']]
+    # Drop the column if you don't need it anymore
+    return df.drop('is_bank_holiday', axis=1)
+
 def render_badges(row,t):
     badges = []
     condition = row['weather_condition'].lower()  # "Cloudy" → "cloudy"
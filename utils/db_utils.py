@@ -1,17 +1,85 @@
+import io
+import threading
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import numpy as np
 from utils.day_themes import DAY_THEMES, THEME_VEG_RATIO
 from utils.db_conn import get_active_connection_name
+from utils.arrow_fetch import arrow_available, fetch_arrow_frame
 from sqlalchemy import text
 
+# Batches up to this many rows are upserted with multi-row INSERTs; larger
+# ones (on Postgres) are COPY'd into a staging table and upserted in one go.
+COPY_THRESHOLD = 1000
+# Rows per multi-row INSERT statement - keeps bind parameters well under
+# the driver limits (65535 on Postgres, 32766 on SQLite).
+UPSERT_PAGE_SIZE = 500
+
+# The readers below (get_future_predictions, get_missing_actuals,
+# get_actuals_and_predictions, get_empirical_veg_ratios) cache their results
+# per parameters and per version of the tables they read. save_prediction and
+# save_actuals bump those versions after committing, so a rerun never shows
+# data from before a write; the TTL only covers writes made elsewhere (other
+# processes, scripts, the SQL console).
+QUERY_CACHE_TTL = timedelta(minutes=10)
+# Per reader. Every write leaves the entries of the old versions behind until
+# their TTL runs out, and each date range a user picks adds one; beyond this
+# the least recently used go first, so a busy day can't grow the cache unbounded.
+QUERY_CACHE_MAX_ENTRIES = 32
+_table_versions = {'predictions': 0, 'prediction_history': 0, 'actual_sales': 0, 'veg_ratio_by_theme': 0}
+_table_versions_lock = threading.Lock()
+
+
+# What prediction_history keeps of each saved forecast row
+HISTORY_COLUMNS = [
+    'date', 'prediction_timestamp', 'saved_at', 'day_theme', 'temperature_max', 'weather_condition',
+    'predicted_meals', 'predicted_meals_veg', 'predicted_meals_non_veg', 'predicted_meals_salad',
+    'override_meal_prediction', 'override_reason', 'final_prediction'
+]
+
 
 @st.cache_resource
 def get_connection():
     # Connects to the prod or test Postgres DB, selected via APP_ENV (see utils/db_conn.py).
     return st.connection(get_active_connection_name(), type='sql')
 
+def table_versions(*tables):
+    with _table_versions_lock:
+        return tuple(_table_versions[table] for table in tables)
+
+
+def bump_table_versions(*tables):
+    """Invalidate every cached read of `tables` in this process."""
+    with _table_versions_lock:
+        for table in tables:
+            _table_versions[table] += 1
+
+
+def clear_query_cache():
+    for reader in (_read_future_predictions, _read_missing_actuals, _read_actuals_and_predictions,
+                   _read_period_metrics, _read_prediction_vintages, _read_veg_ratio_aggregate):
+        reader.clear()
+
+
+def _query_frame(sql_query, params=None, date_columns=()):
+    """conn.query with `date_columns` parsed to datetime64 - or, on Postgres
+    with the ADBC driver installed, the same result fetched as Arrow, where
+    the columns arrive typed and nothing needs parsing (see utils/arrow_fetch.py)."""
+    conn = get_connection()
+    engine = getattr(conn, 'engine', None)
+    if arrow_available(engine):
+        try:
+            return fetch_arrow_frame(engine, sql_query, params)
+        except Exception as e:
+            print(f"Arrow fetch failed, falling back to conn.query: {e}")
+
+    df = conn.query(sql_query, params=params, ttl=0)
+    for col in date_columns:
+        df[col] = pd.to_datetime(df[col], format="ISO8601")
+    return df
+
+
 def style_difference(val):
     # Highlighting max and min values
     if val > 0:
@@ -37,7 +105,7 @@ def apply_custom_styling(df):
 def get_holidays(start_date, end_date): 
     conn = get_connection()
 
-    sql_query = "SELECT * FROM holidays WHERE date >= :start_date AND date <= :end_date"
+    sql_query = "SELECT * FROM holidays WHERE date >= :start_date AND date <= :end_date AND region IS NULL"
     params = {"start_date": start_date, "end_date": end_date}
     result = conn.query(sql_query, params=params)
     
@@ -54,37 +122,32 @@ def save_prediction(df):
             if 'override_reason' not in df.columns:
                 df['override_reason'] = None
 
-            df['final_prediction'] = df.apply(
-                lambda row: row['override_meal_prediction'] if pd.notna(row['override_meal_prediction'])
-                else row['predicted_meals'],
-                axis=1
-                )
+            # Override wins wherever one was entered, the model prediction elsewhere
+            df['final_prediction'] = df['override_meal_prediction'].where(
+                df['override_meal_prediction'].notna(), df['predicted_meals']
+            )
 
             # Upsert: `date` is the primary key, and re-saving a forecast for
             # an already-predicted date used to fail outright (to_sql append
             # raised a UniqueViolation, dropping the whole batch). This
             # replaces that date's row instead, so re-generating/overriding a
-            # forecast for the same week works - at the cost of losing older
-            # predictions for that date.
+            # forecast for the same week works; predictions always holds
+            # the latest forecast per date...
             columns = [
                 'date', 'weekday', 'month', 'day_theme', 'temperature_max', 'weather_condition',
                 'is_bridge_day', 'is_school_break', 'holiday_desc',
                 'predicted_meals', 'predicted_meals_veg', 'predicted_meals_non_veg','predicted_meals_salad',
                 'prediction_timestamp', 'override_meal_prediction', 'override_reason', 'final_prediction'
             ]
-            columns_sql = ", ".join(columns)
-            placeholders_sql = ", ".join(f":{col}" for col in columns)
-            update_sql = ", ".join(f"{col} = excluded.{col}" for col in columns if col != 'date')
-
-            sql_query = text(f"""
-                INSERT INTO predictions ({columns_sql})
-                VALUES ({placeholders_sql})
-                ON CONFLICT (date) DO UPDATE SET {update_sql}
-            """)
-
-            records_df = df[columns].astype(object).where(pd.notnull(df[columns]), None)
-            session.execute(sql_query, records_df.to_dict('records'))
+            df = df.drop_duplicates(subset='date', keep='last')
+            # ...but every saved forecast is also appended to
+            # prediction_history, for accuracy by lead time.
+            saved_at = datetime.now(timezone.utc)
+            history = [dict(record, saved_at=saved_at) for record in _to_params(df, [col for col in HISTORY_COLUMNS if col != 'saved_at'])]
+            _upsert_rows(session, 'prediction_history', HISTORY_COLUMNS, history, conflict_column=None)
+            _upsert_rows(session, 'predictions', columns, _to_params(df, columns))
             session.commit()
+            bump_table_versions('predictions', 'prediction_history')
             return (True, None)
 
         except Exception as e:
@@ -92,62 +155,213 @@ def save_prediction(df):
             return (False, str(e))
         
 def save_actuals(df): 
+    """Upsert actual sales by date. Returns (True, {"inserted": n, "updated": m})
+    on success, (False, error message) on failure."""
     conn = get_connection()
 
     with conn.session as session:
         try:
             df['date'] = pd.to_datetime(df['date']).dt.date
-            sql_query = text("""
-                INSERT INTO actual_sales (date, actual_meals, actual_meals_veg, actual_meals_non_veg, actual_meals_salad)
-                VALUES (:date, :actual_meals, :actual_meals_veg, :actual_meals_non_veg, :actual_meals_salad)
-                ON CONFLICT(date) DO UPDATE SET
-                    actual_meals = excluded.actual_meals,
-                    actual_meals_veg = excluded.actual_meals_veg,
-                    actual_meals_non_veg = excluded.actual_meals_non_veg,
-                    actual_meals_salad = excluded.actual_meals_salad
-                    
-            """)
-
-            for _, row in df.iterrows():
-                session.execute(sql_query,
-                    {
-                        "date": row["date"],
-                        "actual_meals": row["actual_meals"],
-                        "actual_meals_veg": row["actual_meals_veg"],
-                        "actual_meals_non_veg": row["actual_meals_non_veg"],
-                        "actual_meals_salad": row["actual_meals_salad"]
-                    }
-                )
+            df = df.drop_duplicates(subset='date', keep='last')
+            _lock_actual_sales(session)
+            # Read the rows this batch is about to overwrite first, so the
+            # per-theme ratio aggregate can subtract their old contribution.
+            existing = _read_existing_actuals(session, df['date'])
+
+            columns = ['date', 'actual_meals', 'actual_meals_veg', 'actual_meals_non_veg', 'actual_meals_salad']
+            _upsert_rows(session, 'actual_sales', columns, _to_params(df, columns))
+
+            _update_veg_ratio_aggregate(session, _veg_ratio_deltas(df, existing))
             session.commit()
-            return (True, None)
+            bump_table_versions('actual_sales', 'veg_ratio_by_theme')
+            updated = len(existing)
+            return (True, {"inserted": len(df) - updated, "updated": updated})
         
         except Exception as e:
             # what to do when it fails
             return (False, str(e))
 
 
+def _to_params(df, columns):
+    """df[columns] as a list of bind-parameter dicts, converted column by
+    column (no object-dtype copy of the whole frame), with NaN/NA/NaT as None."""
+    values = []
+    for col in columns:
+        series = df[col]
+        if series.hasnans:
+            series = series.astype(object).where(series.notna(), None)
+        values.append(series.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _upsert_rows(session, table, columns, records, conflict_column='date'):
+    """INSERT ... ON CONFLICT DO UPDATE `records` into `table` in as few round
+    trips as possible: one multi-row statement per UPSERT_PAGE_SIZE rows, or,
+    above COPY_THRESHOLD rows on Postgres, COPY plus a single set-based upsert.
+    A record's conflict key must not repeat within `records`. With
+    conflict_column=None the records are appended as they are."""
+    columns_sql = ", ".join(columns)
+    if conflict_column is None:
+        conflict_sql = ""
+    else:
+        update_sql = ", ".join(f"{col} = excluded.{col}" for col in columns if col != conflict_column)
+        conflict_sql = f"ON CONFLICT ({conflict_column}) DO UPDATE SET {update_sql}"
+
+    if len(records) > COPY_THRESHOLD and session.get_bind().dialect.name == 'postgresql':
+        _copy_upsert(session, table, columns, records, conflict_sql)
+        return
+
+    for start in range(0, len(records), UPSERT_PAGE_SIZE):
+        page = records[start:start + UPSERT_PAGE_SIZE]
+        values_sql = ", ".join(
+            "(" + ", ".join(f":{col}_{i}" for col in columns) + ")" for i in range(len(page))
+        )
+        params = {f"{col}_{i}": record[col] for i, record in enumerate(page) for col in columns}
+        session.execute(text(f"""
+            INSERT INTO {table} ({columns_sql})
+            VALUES {values_sql}
+            {conflict_sql}
+        """), params)
+
+
+def _copy_field(value):
+    # COPY ... (FORMAT csv, NULL '\N'): strings are always quoted, so an empty
+    # string stays an empty string and only None becomes NULL.
+    if value is None:
+        return r'\N'
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    # Count columns come out of pandas as float64 (np.ceil in get_prediction,
+    # or a NaN anywhere in the column) and the INTEGER columns' input
+    # function rejects '42.0', where a bound parameter would have been cast
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _copy_upsert(session, table, columns, records, conflict_sql):
+    columns_sql = ", ".join(columns)
+    staging = f"_{table}_staging"
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write(",".join(_copy_field(record[col]) for col in columns) + "\n")
+    buffer.seek(0)
+
+    session.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    session.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    # COPY runs on the session's own DBAPI connection, i.e. inside its transaction
+    cursor = session.connection().connection.driver_connection.cursor()
+    cursor.copy_expert(f"COPY {staging} ({columns_sql}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    session.execute(text(f"""
+        INSERT INTO {table} ({columns_sql})
+        SELECT {columns_sql} FROM {staging}
+        {conflict_sql}
+    """))
+
+
+def _lock_actual_sales(session):
+    """Keep other writers out of actual_sales until this transaction ends.
+
+    Two imports of the same new dates would otherwise both read them as new
+    and both add their contribution to veg_ratio_by_theme. SELECT ... FOR
+    UPDATE can't prevent that - there are no rows to lock yet - so the second
+    import waits for the first to commit and then sees its rows. Reads of
+    the table are not blocked."""
+    if session.get_bind().dialect.name == 'postgresql':
+        # Conflicts with itself and with plain writes, not with SELECTs
+        session.execute(text("LOCK TABLE actual_sales IN SHARE ROW EXCLUSIVE MODE"))
+    else:
+        # SQLite has one writer at a time; take the write lock before the read
+        session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _read_existing_actuals(session, dates):
+    """The veg/non-veg values currently stored for the dates in `dates`
+    (one range read rather than one lookup per date)."""
+    if len(dates) == 0:
+        return pd.DataFrame(columns=['date', 'actual_meals_veg', 'actual_meals_non_veg'])
+
+    result = session.execute(
+        text("SELECT date, actual_meals_veg, actual_meals_non_veg FROM actual_sales "
+             "WHERE date >= :start_date AND date <= :end_date"),
+        {"start_date": min(dates), "end_date": max(dates)},
+    )
+    existing = pd.DataFrame(result.mappings().all(), columns=['date', 'actual_meals_veg', 'actual_meals_non_veg'])
+    existing['date'] = pd.to_datetime(existing['date']).dt.date
+    return existing[existing['date'].isin(set(dates))]
+
+
+def _veg_ratio_contributions(df):
+    """Per-theme veg/non-veg sums and day counts for the rows in `df`.
+    Rows missing either split value don't count, same as the original
+    full-table computation in get_empirical_veg_ratio."""
+    rows = df.dropna(subset=['actual_meals_veg', 'actual_meals_non_veg'])
+    themes = pd.to_datetime(rows['date']).dt.day_name().map(DAY_THEMES)
+    return rows.assign(day_theme=themes).dropna(subset=['day_theme']).groupby('day_theme').agg(
+        veg_sum=('actual_meals_veg', 'sum'),
+        non_veg_sum=('actual_meals_non_veg', 'sum'),
+        day_count=('date', 'size'),
+    )
+
+
+def _veg_ratio_deltas(new_rows, existing_rows):
+    """How veg_ratio_by_theme changes when `new_rows` replace `existing_rows`
+    (the previously stored values for the same dates, if any)."""
+    new_rows = new_rows.drop_duplicates(subset='date', keep='last')
+    added = _veg_ratio_contributions(new_rows)
+    removed = _veg_ratio_contributions(existing_rows)
+    deltas = added.sub(removed, fill_value=0)
+    deltas = deltas[(deltas != 0).any(axis=1)]
+    return deltas.reset_index()
+
+
+def _update_veg_ratio_aggregate(session, deltas):
+    """Apply per-theme deltas to veg_ratio_by_theme inside the caller's transaction."""
+    if deltas.empty:
+        return
+
+    sql_query = text("""
+        INSERT INTO veg_ratio_by_theme (day_theme, veg_sum, non_veg_sum, day_count)
+        VALUES (:day_theme, :veg_sum, :non_veg_sum, :day_count)
+        ON CONFLICT (day_theme) DO UPDATE SET
+            veg_sum = veg_ratio_by_theme.veg_sum + excluded.veg_sum,
+            non_veg_sum = veg_ratio_by_theme.non_veg_sum + excluded.non_veg_sum,
+            day_count = veg_ratio_by_theme.day_count + excluded.day_count
+    """)
+    records = [
+        {
+            "day_theme": row.day_theme,
+            "veg_sum": float(row.veg_sum),
+            "non_veg_sum": float(row.non_veg_sum),
+            "day_count": int(row.day_count),
+        }
+        for row in deltas.itertuples(index=False)
+    ]
+    session.execute(sql_query, records)
+
+
 def get_future_predictions():
-    conn = get_connection()
     #Take Todays timestamp
     today = datetime.now().date()
     monday = today - timedelta(days=today.weekday())
+    return _read_future_predictions(monday, table_versions('predictions'))
+
 
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_future_predictions(monday, versions):
     # predictions.date is upserted (one row per date - see save_prediction),
     # so no dedup is needed here anymore.
     sql_query = "SELECT * FROM predictions WHERE date >= :today ORDER BY date"
 
     params = {"today": monday}
-    result = conn.query(sql_query, params=params, ttl=0)
+    return _query_frame(sql_query, params, date_columns=['date', 'prediction_timestamp'])
 
-    if result.empty:
-        return result
-
-    result['date'] = pd.to_datetime(result['date'], format="ISO8601")
-    result['prediction_timestamp'] = pd.to_datetime(result['prediction_timestamp'], format="ISO8601")
+def get_missing_actuals():
+    return _read_missing_actuals(table_versions('predictions', 'actual_sales'))
 
-    return result
 
-def get_missing_actuals():
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_missing_actuals(versions):
     conn = get_connection()
     sql_query = "SELECT p.date, p.final_prediction, p.day_theme, p.predicted_meals_veg, " \
     "p.predicted_meals_non_veg, predicted_meals_salad,"\
@@ -159,21 +373,49 @@ def get_missing_actuals():
 
 
 def get_actuals_and_predictions(start_date, end_date):
-    conn = get_connection()
+    return _read_actuals_and_predictions(start_date, end_date, table_versions('predictions', 'actual_sales'))
 
-    # predictions.date is upserted (one row per date - see save_prediction),
-    # so no "keep latest prediction_timestamp per date" filtering is needed.
-    sql_query = "SELECT p.date, p.final_prediction, p.prediction_timestamp, p.day_theme, " \
+
+# predictions.date is upserted (one row per date - see save_prediction),
+# so no "keep latest prediction_timestamp per date" filtering is needed.
+ACTUALS_AND_PREDICTIONS_SQL = "SELECT p.date, p.final_prediction, p.prediction_timestamp, p.day_theme, " \
     "p.predicted_meals_veg, p.predicted_meals_non_veg, p.predicted_meals_salad, " \
     "a.actual_meals, a.actual_meals_veg, a.actual_meals_non_veg, a.actual_meals_salad " \
     "FROM predictions p INNER JOIN actual_sales a ON p.date = a.date " \
     "WHERE a.date >= :start_date AND a.date <= :end_date " \
     "ORDER BY p.date ASC"
 
+# Rows per DataFrame chunk for the streaming readers
+CHUNK_SIZE = 5000
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_actuals_and_predictions(start_date, end_date, versions):
     params={"start_date": start_date, "end_date": end_date}
-    df = conn.query(sql_query, params=params,ttl=0)
+    df = _query_frame(ACTUALS_AND_PREDICTIONS_SQL, params, date_columns=['date'])
+    return _add_error_columns(df)
 
-    df['date'] = pd.to_datetime(df['date'])
+
+def iter_actuals_and_predictions(start_date, end_date, chunk_size=CHUNK_SIZE):
+    """get_actuals_and_predictions as DataFrame chunks of up to chunk_size
+    rows, read through a server-side cursor - only one chunk is held in
+    memory at a time, however long the range. Not cached."""
+    conn = get_connection()
+    params = {"start_date": start_date, "end_date": end_date}
+    with conn.session as session:
+        result = session.execute(
+            text(ACTUALS_AND_PREDICTIONS_SQL), params,
+            execution_options={"stream_results": True},
+        )
+        columns = list(result.keys())
+        for rows in result.partitions(chunk_size):
+            chunk = pd.DataFrame(rows, columns=columns)
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            yield _add_error_columns(chunk)
+
+
+def _add_error_columns(df):
+    # df['date'] is already datetime64
     df['weekday'] = df['date'].dt.strftime('%A')
     df['difference'] = df['actual_meals'] - df['final_prediction']
     df['pct_error'] = (df['actual_meals'] - df['final_prediction'])/df['final_prediction'].replace(0, np.nan)
@@ -190,6 +432,69 @@ def get_actuals_and_predictions(start_date, end_date):
 
     return df
 
+def get_prediction_vintages(start_date, end_date):
+    """Every forecast saved for the dates in [start_date, end_date] (from
+    prediction_history, oldest first per date), with its lead time in days
+    and the actual meals where they've been imported - for accuracy by lead time."""
+    return _read_prediction_vintages(start_date, end_date, table_versions('prediction_history', 'actual_sales'))
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_prediction_vintages(start_date, end_date, versions):
+    sql_query = "SELECT h.date, h.prediction_timestamp, h.saved_at, h.day_theme, h.predicted_meals, " \
+    "h.override_meal_prediction, h.final_prediction, a.actual_meals " \
+    "FROM prediction_history h LEFT JOIN actual_sales a ON h.date = a.date " \
+    "WHERE h.date >= :start_date AND h.date <= :end_date " \
+    "ORDER BY h.date ASC, h.saved_at ASC"
+
+    params = {"start_date": start_date, "end_date": end_date}
+    df = _query_frame(sql_query, params, date_columns=['date'])
+
+    # Both saved tz-aware in UTC (prediction_utils, save_prediction), so normalize to UTC either way
+    for col in ['prediction_timestamp', 'saved_at']:
+        df[col] = pd.to_datetime(df[col], format="ISO8601", utc=True)
+    # Lead time from when the forecast was generated (saved_at when unknown)
+    generated = df['prediction_timestamp'].fillna(df['saved_at']).dt.tz_localize(None)
+    df['lead_days'] = (df['date'] - generated.dt.normalize()).dt.days
+    df['pct_error'] = (df['actual_meals'] - df['final_prediction']) / df['final_prediction'].replace(0, np.nan)
+    return df
+
+
+class MetricsAccumulator:
+    """calculate_metrics, computed incrementally over DataFrame chunks
+    (e.g. from iter_actuals_and_predictions) - keeps running sums only."""
+
+    def __init__(self, tolerance_pct=0.05):
+        self.tolerance_pct = tolerance_pct
+        self.rows = 0
+        self.abs_error_sum = 0.0
+        self.abs_error_count = 0
+        self.over_predicted = 0
+        self.under_predicted = 0
+        self.within_tolerance = 0
+
+    def update(self, df):
+        abs_error = (df['actual_meals'] - df['final_prediction']).abs()
+        denominator = df['final_prediction'].replace(0, np.nan)
+        pct_error = (abs_error / denominator) * 100
+
+        self.rows += len(df)
+        self.abs_error_sum += abs_error.sum()
+        self.abs_error_count += abs_error.count()
+        self.over_predicted += (df['final_prediction'] > df['actual_meals']).sum()
+        self.under_predicted += (df['final_prediction'] < df['actual_meals']).sum()
+        self.within_tolerance += (pct_error <= self.tolerance_pct).sum()
+        return self
+
+    def result(self):
+        return {
+            'mae': self.abs_error_sum / self.abs_error_count if self.abs_error_count else np.nan,
+            'over_predicted': self.over_predicted,
+            'under_predicted': self.under_predicted,
+            'accuracy_rate': self.within_tolerance / self.rows * 100 if self.rows else np.nan
+        }
+
+
 def calculate_metrics(df, tolerance_pct=0.05):
     """Calculate prediction metrics.
     
@@ -197,55 +502,53 @@ def calculate_metrics(df, tolerance_pct=0.05):
         df: DataFrame with actual_meals and final_prediction columns
         tolerance_pct: Percentage tolerance (0.05 = within 5%)
     """
+    return MetricsAccumulator(tolerance_pct).update(df).result()
 
-    numerator = (df['actual_meals'] - df['final_prediction']).abs()
-    denominator = df['final_prediction'].replace(0, np.nan)
-    pct_error= (numerator / denominator) * 100
-  
-    return {
-        'mae': (df['actual_meals'] - df['final_prediction']).abs().mean(),
-        'over_predicted': (df['final_prediction'] > df['actual_meals']).sum(),
-        'under_predicted': (df['final_prediction'] < df['actual_meals']).sum(),
-        'accuracy_rate': (pct_error <= tolerance_pct).mean() * 100
-    }
-
-def get_empirical_veg_ratio(theme: str) -> tuple[float, float]:
-    """Compute the empirical veg/non-veg ratio for a theme from actual_sales history.
-    Derives day_theme from each row's date directly 
-    Falls back to THEME_VEG_RATIO[theme] if zero historical rows exist for this theme."""
-   
-
-    fallback = THEME_VEG_RATIO.get(theme, (0.5, 0.5))
-    conn = get_connection()
 
-    sql_query = "SELECT date, actual_meals_veg, actual_meals_non_veg FROM actual_sales " \
-    "WHERE actual_meals_veg IS NOT NULL AND actual_meals_non_veg IS NOT NULL"
+def calculate_period_metrics(start_date, end_date, tolerance_pct=0.05):
+    """calculate_metrics for [start_date, end_date], streamed chunk by chunk
+    from the database instead of loading the period. None if it has no rows."""
+    return _read_period_metrics(start_date, end_date, tolerance_pct, table_versions('predictions', 'actual_sales'))
 
-    try:
-        result = conn.query(sql_query, ttl=0)
-    except Exception as e:
-        print(f"get_empirical_veg_ratio query failed: {e}")
-        return fallback
 
-    if result.empty:
-        return fallback
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_period_metrics(start_date, end_date, tolerance_pct, versions):
+    metrics = MetricsAccumulator(tolerance_pct)
+    for chunk in iter_actuals_and_predictions(start_date, end_date):
+        metrics.update(chunk)
+    return metrics.result() if metrics.rows else None
 
-    result['date'] = pd.to_datetime(result['date'])
-    result['day_theme'] = result['date'].dt.day_name().map(DAY_THEMES)
-    theme_rows = result[result['day_theme'] == theme]
+def get_empirical_veg_ratios() -> dict[str, tuple[float, float]]:
+    """Empirical veg/non-veg ratio for every theme, in one read of the
+    veg_ratio_by_theme aggregate (kept up to date by save_actuals, rebuilt
+    from scratch by scripts/rebuild_veg_ratios.py).
+    Themes with no usable history fall back to THEME_VEG_RATIO."""
 
-    if theme_rows.empty:
-        return fallback
+    ratios = dict(THEME_VEG_RATIO)
 
-    avg_veg = theme_rows['actual_meals_veg'].mean()
-    avg_non_veg = theme_rows['actual_meals_non_veg'].mean()
-    total = avg_veg + avg_non_veg
+    try:
+        result = _read_veg_ratio_aggregate(table_versions('veg_ratio_by_theme'))
+    except Exception as e:
+        print(f"get_empirical_veg_ratios query failed: {e}")
+        return ratios
 
-    if total == 0:
-        return fallback
+    for row in result.itertuples(index=False):
+        total = row.veg_sum + row.non_veg_sum
+        if row.day_count > 0 and total > 0:
+            ratios[row.day_theme] = (row.veg_sum / total, row.non_veg_sum / total)
 
-    return (avg_veg / total, avg_non_veg / total)
+    return ratios
 
 
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_veg_ratio_aggregate(versions):
+    # A failed read raises and so is never cached
+    conn = get_connection()
+    sql_query = "SELECT day_theme, veg_sum, non_veg_sum, day_count FROM veg_ratio_by_theme"
+    return conn.query(sql_query, ttl=0)
 
 
+def get_empirical_veg_ratio(theme: str) -> tuple[float, float]:
+    """Empirical veg/non-veg ratio for a single theme - see get_empirical_veg_ratios.
+    Prefer fetching all ratios once when splitting more than one row."""
+    return get_empirical_veg_ratios().get(theme, THEME_VEG_RATIO.get(theme, (0.5, 0.5)))
@@ -0,0 +1,70 @@
+"""Precompiled one-hot encoder for model inference.
+
+get_prediction used to pd.get_dummies the forecast frame, add every missing
+feature column one at a time and reorder the result to match
+feature_columns.pkl. FeatureEncoder works that mapping out once from the
+feature list (scripts/train_model.py saves it next to the model) and then
+writes each row straight into a preallocated matrix: numeric features are
+copied column-wise, categorical values are looked up to a column index.
+Output is identical to the get_dummies path - unseen categories and
+missing values leave their dummy columns at 0, missing numeric features
+are 0.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns one-hot encoded at training time (weekday is dropped, see train_model.py)
+CATEGORICAL_COLUMNS = ('month', 'weather_condition', 'day_theme')
+
+
+class FeatureEncoder:
+    def __init__(self, feature_columns, categorical_columns=CATEGORICAL_COLUMNS):
+        self.feature_columns = list(feature_columns)
+        self.categorical_columns = tuple(categorical_columns)
+
+        # Longest prefix first, so a categorical column whose name starts with
+        # another's can never steal its dummies.
+        prefixes = sorted(self.categorical_columns, key=len, reverse=True)
+        self.numeric_features = []          # [(matrix column index, input column)]
+        categories = {col: ([], []) for col in self.categorical_columns}
+        for index, feature in enumerate(self.feature_columns):
+            prefix = next((p for p in prefixes if feature.startswith(f"{p}_")), None)
+            if prefix is None:
+                self.numeric_features.append((index, feature))
+            else:
+                levels, indexes = categories[prefix]
+                levels.append(feature[len(prefix) + 1:])
+                indexes.append(index)
+
+        # {input column: (Index of category values, matrix column index per value)}
+        self.categories = {
+            col: (pd.Index(levels), np.asarray(indexes, dtype=np.intp))
+            for col, (levels, indexes) in categories.items()
+        }
+
+    def transform(self, df):
+        """Encode `df` into a float64 matrix with one column per feature_columns entry."""
+        n_rows = len(df)
+        X = np.zeros((n_rows, len(self.feature_columns)), dtype=np.float64)
+
+        for index, col in self.numeric_features:
+            if col in df.columns:
+                X[:, index] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        rows = np.arange(n_rows)
+        for col, (levels, indexes) in self.categories.items():
+            if col not in df.columns or len(levels) == 0:
+                continue
+            values = df[col]
+            present = values.notna().to_numpy()
+            # get_dummies names columns f"{col}_{value}", so match on str(value)
+            codes = levels.get_indexer(values[present].astype(str))
+            matched = codes >= 0
+            X[rows[present][matched], indexes[codes[matched]]] = 1.0
+
+        return X
+
+    def transform_frame(self, df):
+        """transform(), wrapped (without copying) in a DataFrame carrying the
+        feature names the model was fitted with."""
+        return pd.DataFrame(self.transform(df), columns=self.feature_columns, index=df.index, copy=False)
@@ -0,0 +1,114 @@
+"""Local store of the daily forecast inputs prepare_data builds: one row per
+business day with the calendar features, weather and holiday flags, in a
+SQLite file under data/processed/ keyed by date.
+
+Rows are written by prepare_data from the same build_data_features /
+merge_weather / merge_holidays path as a live computation, so a range read
+from the store is the frame prepare_data would have built. A row is only
+served while it's still valid:
+- it was built from the current holiday calendar (its data_versions counter)
+  and the current DAY_THEMES (see feature_version),
+- its weather came from the archive ("past", never changes), or it's a
+  forecast / climatology row younger than the forecast TTL for a day that
+  hasn't moved into the archive segment since.
+Bank holidays are stored too (flagged), prepare_data drops them on the way out.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils import day_themes, sqlite_store
+from utils.holiday_calendar import holiday_calendar_version
+from utils.paths import FEATURE_STORE_PATH
+from utils.weather_cache import FORECAST_TTL, PERMANENT_SOURCES
+
+FEATURE_COLUMNS = [
+    'date', 'weekday', 'month', 'day_theme',
+    'weather_icon', 'temperature_max', 'weather_condition',
+    'holiday_desc', 'is_bank_holiday', 'is_school_break', 'is_bridge_day',
+]
+_FLAG_COLUMNS = ['is_bank_holiday', 'is_school_break', 'is_bridge_day']
+
+
+def feature_version():
+    """What a stored row was built from: the holiday calendar's version and
+    a hash of the weekday -> theme config. Rows with any other version are
+    recomputed, archive-weather rows included."""
+    themes = json.dumps(day_themes.DAY_THEMES, sort_keys=True)
+    return f"{holiday_calendar_version()}:{hashlib.sha256(themes.encode()).hexdigest()[:16]}"
+
+
+def _create_tables(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(daily_features)")}
+    if columns and 'feature_version' not in columns:
+        # Written before rows carried a feature_version - none of them can be served
+        conn.execute("DROP TABLE daily_features")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS daily_features ("
+        "date TEXT PRIMARY KEY, weekday TEXT, month TEXT, day_theme TEXT, "
+        "weather_icon TEXT, temperature_max REAL, weather_condition TEXT, "
+        "holiday_desc TEXT, is_bank_holiday INTEGER, is_school_break INTEGER, is_bridge_day INTEGER, "
+        "weather_source TEXT, feature_version TEXT, computed_at TEXT)"
+    )
+
+
+class FeatureStore:
+    def __init__(self, path=FEATURE_STORE_PATH, forecast_ttl=FORECAST_TTL):
+        self.path = path
+        self.forecast_ttl = forecast_ttl
+
+    def _connect(self):
+        return sqlite_store.connect(self.path, _create_tables)
+
+    def get(self, start_date, end_date, archive_before, now=None):
+        """Valid stored rows in the range (inclusive), shaped like merge_holidays' output.
+        archive_before: first day not served by the archive (weather_utils.forecast_window)."""
+        now = now or datetime.now(timezone.utc)
+        permanent = sorted(PERMANENT_SOURCES)
+        sql_query = (f"SELECT {', '.join(FEATURE_COLUMNS)} FROM daily_features "
+                     "WHERE date >= ? AND date <= ? AND feature_version = ? "
+                     f"AND (weather_source IN ({', '.join('?' * len(permanent))}) "
+                     "OR (computed_at >= ? AND date >= ?)) ORDER BY date")
+        params = [start_date, end_date, feature_version(), *permanent,
+                  (now - self.forecast_ttl).isoformat(), archive_before]
+
+        with self._connect() as conn:
+            rows = conn.execute(sql_query, params).fetchall()
+
+        df = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+        df['date'] = pd.to_datetime(df['date'])
+        df['temperature_max'] = df['temperature_max'].astype(float)
+        for column in _FLAG_COLUMNS:
+            df[column] = df[column].astype(bool).astype('boolean')
+        df['holiday_desc'] = df['holiday_desc'].fillna('').astype(str)
+        return df
+
+    def put(self, features, weather_sources, now=None):
+        """Store merge_holidays-shaped rows. weather_sources: where each row's weather
+        came from ('past' / 'forecast' / 'climatology'), one for all rows or a Series
+        aligned with features. Days without weather aren't stored, so they're
+        computed again next time."""
+        now = now or datetime.now(timezone.utc)
+        version = feature_version()
+        if not isinstance(weather_sources, pd.Series):
+            weather_sources = pd.Series(weather_sources, index=features.index)
+        complete = features.dropna(subset=['temperature_max', 'weather_condition'])
+        records = [
+            (
+                row.date.strftime('%Y-%m-%d'), row.weekday, row.month, row.day_theme,
+                row.weather_icon, float(row.temperature_max), row.weather_condition,
+                row.holiday_desc, int(row.is_bank_holiday), int(row.is_school_break), int(row.is_bridge_day),
+                weather_source, version, now.isoformat(),
+            )
+            for row, weather_source in zip(
+                complete[FEATURE_COLUMNS].itertuples(index=False), weather_sources.loc[complete.index]
+            )
+        ]
+        if not records:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO daily_features VALUES ({', '.join('?' * 14)})", records
+            )
@@ -0,0 +1,144 @@
+"""Pure-NumPy evaluator for a trained RandomForestRegressor.
+
+scripts/train_model.py flattens the forest into packed node arrays (feature
+index, threshold, child indices, leaf value) and saves them next to the
+pickled model. FlatForest.predict walks every tree for the whole batch at
+once - one vectorized step per tree level - so the app can serve
+predictions without unpickling (or even importing) scikit-learn, and
+without sklearn's per-call validation/joblib overhead on small batches.
+
+Results match RandomForestRegressor.predict exactly: inputs are compared as
+float32 like sklearn does, NaNs follow each node's missing-value direction,
+and per-tree outputs are accumulated in tree order before averaging.
+"""
+import numpy as np
+
+# Rows evaluated per block in FlatForest.apply (see the comment there)
+ROW_BLOCK_SIZE = 512
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 feature_columns=None, training_timestamp=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_columns = list(feature_columns) if feature_columns is not None else None
+        self.training_timestamp = training_timestamp
+
+    @classmethod
+    def from_sklearn(cls, model, feature_columns=None, training_timestamp=None):
+        """Pack every tree of a fitted RandomForestRegressor into shared node arrays.
+        Leaves point to themselves, so walking max_depth steps always ends on one."""
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing.append(
+                np.asarray(tree.missing_go_to_left, dtype=bool)
+                if hasattr(tree, 'missing_go_to_left') else np.zeros(tree.node_count, dtype=bool)
+            )
+            values.append(tree.value[:, 0, 0])
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            feature_columns=feature_columns,
+            training_timestamp=training_timestamp,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Leaf node index per (tree, row) - shape (n_trees, n_rows)."""
+        # sklearn casts inputs to float32 before comparing them with the
+        # (float64) thresholds - do the same so splits land identically.
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        has_missing = bool(np.isnan(X).any())
+        # children[2 * node + go_left] - one gather per level instead of two
+        children = np.stack([self.right, self.left], axis=1).ravel()
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.intp)
+
+        # Walk all trees for a block of rows at a time: a single block keeps
+        # small batches to a handful of NumPy calls, and bounded blocks keep
+        # the (trees x rows) working arrays cache-sized for large ones.
+        for start in range(0, n_rows, ROW_BLOCK_SIZE):
+            block = X[start:start + ROW_BLOCK_SIZE].ravel()
+            row_offsets = np.arange(len(block) // n_features) * n_features
+            nodes = np.repeat(self.roots[:, None], len(row_offsets), axis=1)
+            for _ in range(self.max_depth):
+                x = block[row_offsets + self.feature[nodes]]
+                go_left = x <= self.threshold[nodes]
+                if has_missing:
+                    go_left = np.where(np.isnan(x), self.missing_left[nodes], go_left)
+                nodes = children[2 * nodes + go_left]
+            leaves[:, start:start + len(row_offsets)] = nodes
+        return leaves
+
+    def predict(self, X):
+        leaf_values = self.value[self.apply(X)]
+        # Accumulate tree by tree (not np.mean's pairwise sum) to reproduce
+        # sklearn's float rounding exactly.
+        prediction = np.zeros(leaf_values.shape[1], dtype=np.float64)
+        for tree_values in leaf_values:
+            prediction += tree_values
+        prediction /= self.n_trees
+        return prediction
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            np.savez(
+                file,
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                missing_left=self.missing_left,
+                value=self.value,
+                roots=self.roots,
+                max_depth=np.asarray(self.max_depth),
+                feature_columns=np.asarray(self.feature_columns or [], dtype=str),
+                training_timestamp=np.asarray(self.training_timestamp or ''),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(
+                feature=arrays['feature'],
+                threshold=arrays['threshold'],
+                left=arrays['left'],
+                right=arrays['right'],
+                missing_left=arrays['missing_left'],
+                value=arrays['value'],
+                roots=arrays['roots'],
+                max_depth=arrays['max_depth'],
+                feature_columns=arrays['feature_columns'].tolist() or None,
+                training_timestamp=str(arrays['training_timestamp']) or None,
+            )
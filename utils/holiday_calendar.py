@@ -0,0 +1,110 @@
+"""Process-wide, in-memory index of the holidays table.
+
+prepare_data used to run a SELECT against the holidays table for every
+forecast, although the table only changes when it's re-seeded (about once a
+year). The calendar loads the whole table once per process into sorted
+date arrays with one bit flag per holiday kind and the descriptions in a
+categorical, then answers any date-range lookup with two binary searches.
+
+The cache is keyed on the 'holidays' row of the data_versions table, which
+scripts/seed_holidays.py increments whenever it re-seeds: running apps pick
+a new calendar up within HOLIDAY_VERSION_TTL, and reload once a day anyway.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.db_utils import get_connection
+
+# How long a process trusts the data_versions counter it last read
+HOLIDAY_VERSION_TTL = timedelta(minutes=1)
+
+BANK_HOLIDAY = 1
+SCHOOL_BREAK = 2
+BRIDGE_DAY = 4
+
+_FLAG_COLUMNS = {
+    'is_bank_holiday': BANK_HOLIDAY,
+    'is_school_break': SCHOOL_BREAK,
+    'is_bridge_day': BRIDGE_DAY,
+}
+
+
+class HolidayCalendar:
+    def __init__(self, dates, flags, descriptions):
+        self.dates = dates                # sorted datetime64[D]
+        self.flags = flags                # uint8 bitmask per date
+        self.descriptions = descriptions  # pd.Categorical, one entry per date
+
+    @classmethod
+    def from_frame(cls, holidays):
+        """Build the index from rows shaped like the holidays table."""
+        holidays = holidays.assign(date=pd.to_datetime(holidays['date']).dt.normalize())
+        holidays = holidays.sort_values('date').drop_duplicates(subset='date', keep='last')
+
+        flags = np.zeros(len(holidays), dtype=np.uint8)
+        for column, bit in _FLAG_COLUMNS.items():
+            is_set = holidays[column].fillna(False).astype(bool).to_numpy()
+            flags |= np.where(is_set, bit, 0).astype(np.uint8)
+
+        return cls(
+            dates=holidays['date'].to_numpy(dtype='datetime64[D]'),
+            flags=flags,
+            descriptions=pd.Categorical(holidays['description']),
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def lookup(self, start_date, end_date):
+        """Holidays between start_date and end_date (inclusive), in the shape
+        utils.db_utils.get_holidays returns - flags as booleans."""
+        start = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+        end = np.datetime64(pd.Timestamp(end_date).date(), 'D')
+        lo = np.searchsorted(self.dates, start, side='left')
+        hi = np.searchsorted(self.dates, end, side='right')
+
+        flags = self.flags[lo:hi]
+        result = pd.DataFrame({
+            'date': self.dates[lo:hi].astype('datetime64[ns]'),
+            # Plain strings, not categorical: callers fillna('') the merged column
+            'description': np.asarray(self.descriptions[lo:hi], dtype=object),
+        })
+        for column, bit in _FLAG_COLUMNS.items():
+            result[column] = (flags & bit) != 0
+        return result
+
+
+@st.cache_data(ttl=HOLIDAY_VERSION_TTL, show_spinner=False)
+def holiday_calendar_version():
+    """The holidays table's version from data_versions, bumped by every
+    re-seed. 0 when it can't be read (e.g. migrations not applied yet), in
+    which case the calendar only refreshes with its daily TTL."""
+    try:
+        rows = get_connection().query(
+            "SELECT version FROM data_versions WHERE name = 'holidays'", ttl=0
+        )
+        return int(rows['version'].iloc[0]) if not rows.empty else 0
+    except Exception as e:
+        print(f"Error reading holiday calendar version: {e}")
+        return 0
+
+
+@st.cache_resource(ttl=timedelta(days=1), show_spinner=False)
+def _load_holiday_calendar(version, region=None):
+    conn = get_connection()
+    sql_query = "SELECT date, description, is_bank_holiday, is_school_break, is_bridge_day FROM holidays"
+    if region is None:
+        holidays = conn.query(sql_query + " WHERE region IS NULL", ttl=0)
+    else:
+        holidays = conn.query(sql_query + " WHERE region = :region", params={"region": region}, ttl=0)
+    return HolidayCalendar.from_frame(holidays)
+
+
+def get_holiday_calendar(region=None):
+    """The shared HolidayCalendar, loaded on first use. region=None is the
+    kitchen's own calendar (the rows without a region); a region name
+    selects that region's rows (seeded with scripts/seed_holidays.py --region)."""
+    return _load_holiday_calendar(holiday_calendar_version(), region)
@@ -3,6 +3,8 @@ from datetime import datetime
 from utils.paths import METADATA_PATH
 from utils.converters import normalize_datetime
 from utils.db_utils import get_connection
+from utils.circuit_breaker import CircuitBreakerOpen
+from utils.weather_utils import probe_open_meteo, weather_breaker
 import requests
 
 def load_model_metadata():
@@ -51,18 +53,14 @@ def get_last_prediction_info():
         return False
 
 
-#Testing weather API connectivity  
+#Testing weather API connectivity - through the breaker, so a known outage
+#answers immediately instead of waiting for the timeout
 def check_weather_api_status():
-    url = "https://api.open-meteo.com/v1/forecast"
-    today = datetime.now().strftime("%Y-%m-%d")
-    params = {"latitude": 50.1330,"longitude": 8.6807,"start_date": today,"end_date": today,
-    "timezone": "Europe/Berlin","daily": ["temperature_2m_max", "weather_code"]}
     try:
-        response = requests.get(url, params=params, timeout=5)
-        response.raise_for_status()
+        weather_breaker.call(probe_open_meteo)
         return True
-    except requests.exceptions.RequestException as errh:
-        return False  
+    except (requests.exceptions.RequestException, CircuitBreakerOpen):
+        return False
 
 #Checking database connection status
 def check_database_status():
@@ -0,0 +1,95 @@
+"""Persistent cache of Anthropic responses, shared by every worker process on
+the machine (a SQLite file under data/processed/), so insights survive
+redeploys and restarts instead of being paid for again.
+
+Entries are keyed by a SHA-256 of (prompt template + version, normalized data
+payload, language, model): bump a template's version whenever its prompt
+text changes. Entries expire after the TTL (30 days by default,
+LLM_CACHE_TTL_DAYS overrides it) and the least recently used ones are
+evicted beyond max_entries. Hit/miss counters live in the same file.
+Only real responses are stored, never the fallback texts.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from utils import sqlite_store
+from utils.paths import LLM_CACHE_PATH
+
+LLM_CACHE_TTL = timedelta(days=float(os.getenv("LLM_CACHE_TTL_DAYS", "30")))
+LLM_CACHE_MAX_ENTRIES = 500
+
+
+def _create_tables(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS llm_responses ("
+        "key TEXT PRIMARY KEY, response TEXT, created_at TEXT, last_used_at TEXT)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_stats (name TEXT PRIMARY KEY, value INTEGER)")
+
+
+def normalize_payload(payload):
+    """JSON payloads in a canonical form (sorted keys, no whitespace), so the
+    same data serialized differently shares one entry. Other text is stripped."""
+    try:
+        return json.dumps(json.loads(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return str(payload).strip()
+
+
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _connect(self):
+        return sqlite_store.connect(self.path, _create_tables)
+
+    @staticmethod
+    def key(template, version, payload, lang, model):
+        raw = "\x1f".join([f"{template}:v{version}", normalize_payload(payload), lang, model])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key, now=None):
+        """The cached response, or None on a miss (absent or expired)."""
+        now = now or datetime.now(timezone.utc)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ? AND created_at >= ?",
+                (key, (now - self.ttl).isoformat()),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (now.isoformat(), key))
+            self._count(conn, "hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def put(self, key, response, now=None):
+        now = now or datetime.now(timezone.utc)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?)",
+                (key, response, now.isoformat(), now.isoformat()),
+            )
+            # TTL first, then least recently used beyond max_entries
+            conn.execute("DELETE FROM llm_responses WHERE created_at < ?", ((now - self.ttl).isoformat(),))
+            conn.execute(
+                "DELETE FROM llm_responses WHERE key NOT IN "
+                "(SELECT key FROM llm_responses ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    @staticmethod
+    def _count(conn, name):
+        conn.execute(
+            "INSERT INTO llm_cache_stats VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def stats(self):
+        """{'hits', 'misses', 'entries'} across all processes sharing the file."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        return {"hits": counters.get("hits", 0), "misses": counters.get("misses", 0), "entries": entries}
@@ -1,12 +1,29 @@
-import json
+import threading
+import httpx
 import streamlit as st
-from anthropic import Anthropic, APIError
+from anthropic import Anthropic, APIConnectionError, APIError, APIStatusError, DefaultHttpxClient
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from utils.llm_cache import LLMCache
+from utils.single_flight import SingleFlight, coalesce
+from utils.streaming import shared_task
 
 MODEL = "claude-sonnet-5"
 
+# Part of the response cache key - bump when the prompt text below changes
+INSIGHTS_PROMPT_VERSION = 4
+PLANNING_PROMPT_VERSION = 4
+
+# Seconds. Connecting should be quick; a full 800-token answer can take a while.
+CONNECT_TIMEOUT = 5
+REQUEST_TIMEOUT = 60
+MAX_CONNECTIONS = 10
+
+# Responses persist on disk across restarts and worker processes
+_llm_cache = LLMCache()
+
 # Fallbacks keyed by lang — returned when the API is unreachable or fails.
-# Function 1 returns JSON so Page 3's existing json.loads handler renders it gracefully.
-# Function 2 returns plain text so Page 2's st.info renders it directly.
+# The insights fallback is JSON so Page 3 renders it as a card.
+# The planning fallback is plain text, streamed into Page 2 as is.
 _INSIGHTS_FALLBACK = {
     "EN": '[{"type": "warning", "title": "Service Unavailable", "message": "AI insights are temporarily unavailable. Please try again later."}]',
     "DE": '[{"type": "warning", "title": "Dienst nicht verfügbar", "message": "KI-Einblicke sind vorübergehend nicht verfügbar. Bitte versuchen Sie es später erneut."}]',
@@ -17,90 +34,221 @@ _PLANNING_FALLBACK = {
     "DE": "KI-Planungshinweise sind vorübergehend nicht verfügbar. Bitte versuchen Sie es später erneut.",
 }
 
+# Sessions sending the same prompt at the same time share one API call
+_llm_flight = SingleFlight("llm")
 
-@st.cache_data
-def get_llm_insights_for_actuals_vs_predicted(data_json: str, lang: str):
 
-    client = Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
+# Error types of an error event partway through a stream, which arrives on a
+# 200 response - the status code alone doesn't tell
+_OUTAGE_ERROR_TYPES = {"api_error", "overloaded_error", "rate_limit_error"}
+
+
+def _is_outage(e):
+    # Unreachable, overloaded or rate limited - not our own bad request
+    if isinstance(e, APIConnectionError):
+        return True
+    if not isinstance(e, APIStatusError):
+        return False
+    error = e.body.get("error") if isinstance(e.body, dict) else None
+    error_type = error.get("type") if isinstance(error, dict) else None
+    return e.status_code >= 500 or e.status_code == 429 or error_type in _OUTAGE_ERROR_TYPES
+
+
+@st.cache_resource
+def get_client():
+    # One client per process: its connection pool keeps connections to the
+    # API open between calls instead of a new TLS handshake every time.
+    return Anthropic(
+        api_key=st.secrets["ANTHROPIC_API_KEY"],
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        http_client=DefaultHttpxClient(limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)),
+    )
+
+
+def probe_anthropic():
+    """Cheap authenticated call (no tokens used); raises while the API is unavailable."""
+    get_client().with_options(timeout=5, max_retries=0).models.list(limit=1)
+
+
+# While open, both functions return their translated fallback right away
+llm_breaker = CircuitBreaker("anthropic", probe=probe_anthropic, is_failure=_is_outage)
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+_usage = dict.fromkeys(("calls",) + USAGE_FIELDS, 0)
+_usage_lock = threading.Lock()
+
+
+def _record_usage(template, usage):
+    # Token counts of one API call. The cache fields stay 0 while no prompt
+    # caching is requested (see _request) - logged so that would show.
+    counts = {field: getattr(usage, field, None) for field in USAGE_FIELDS}
+    counts = {field: value if isinstance(value, int) else 0 for field, value in counts.items()}
+    with _usage_lock:
+        _usage["calls"] += 1
+        for field, value in counts.items():
+            _usage[field] += value
+    print(f"LLM usage ({template}): " + ", ".join(f"{field}={value}" for field, value in counts.items()))
+
+
+def get_llm_usage():
+    """Token totals of all API calls made by this process."""
+    with _usage_lock:
+        return dict(_usage)
+
+
+# The static instructions go into the system prompt; only the language and
+# the data in the user message change between calls.
+_INSIGHTS_INSTRUCTIONS = (
+    "You help kitchen teams review how well their meal predictions performed. "
+    "This data compares past predictions against actual results, broken down into vegetarian and non-vegetarian portions. "
+    "The data is a statistical summary of the period: totals, bias and "
+    "percentage errors per meal category (total, vegetarian, non-vegetarian, salad), the error distribution, "
+    "bias per weekday and per day theme, the days with the largest errors, and a small sample of daily rows. "
+    "Look for meaningful patterns: Are certain weekdays or day themes consistently off? "
+    "Is the bias specifically in the vegetarian or non-vegetarian split rather than the total? "
+    "Do holidays or low-volume days cause problems? Is there a systematic bias in the predictions? "
+    "Only report patterns that are significant and actionable. "
+    "Return your response as a JSON array only. No other text, no markdown, no explanation. "
+    "Each insight should be an object with three fields: "
+    "type (one of: success, info, warning, error), "
+    "title (short label for the insight), "
+    "message (one sentence explanation and one sentence recommendation). "
+    "Use these types: "
+    "success = predictions working well, no action needed. "
+    "info = general observation worth noting. "
+    "warning = 3-5% error or a pattern to watch. "
+    "error = over 5% error, needs attention. "
+    "Return at most 3 insights. Fewer is fine. "
+    "If the predictions are working well and there are no clear issues, say so briefly. "
+    "Use simple language for kitchen managers. No jargon. "
+    "Return raw JSON only. DO NOT wrap in code fences or markdown. "
+    "Respond in the language named in the user message."
+)
+
+_PLANNING_INSTRUCTIONS = (
+    "You help kitchen teams plan based on meal demand forecasts. "
+    "The data is a summary of the upcoming days: predicted meal totals per category, average predicted meals "
+    "per weekday and per day theme, the weather range, days that deviate from their theme's usual level, "
+    "the number of holiday / school break / bridge days and the first few runs of them (start, end, days, flags), "
+    "and a small sample of daily rows "
+    "(date, day theme, predicted meals, temperature, weather condition, holiday flags). "
+    "List ONLY 2-3 inconsistencies or unusual patterns — "
+    "things that don't match expected conditions (weather, holiday, day of week) "
+    "or seem worth verifying. "
+    "Do NOT include daily summaries, recommendations, or risk ratings. "
+    "Keep it brief and simple, no jargon. Use bullet points. "
+    "Respond in the language named in the user message."
+)
+
+
+def _request(instructions: str, data_json: str, lang: str):
     response_language = "German" if lang == "DE" else "English"
+    return dict(
+        max_tokens=800,
+        # This is a short classification/summary task, not a reasoning task.
+        # Sonnet 5 runs adaptive thinking by default when `thinking` is
+        # omitted (unlike 4.6, which defaulted to thinking off) - left
+        # enabled, it could eat into the tight max_tokens budget and
+        # truncate the JSON output before pages/3's json.loads() sees it.
+        thinking={"type": "disabled"},
+        # No cache_control: the instructions are ~350 / ~170 tokens, and the
+        # API only caches a prefix of at least 1024 tokens on Sonnet, so
+        # marking them would never produce a cache read.
+        system=[{"type": "text", "text": instructions}],
+        messages=[
+            {
+                "role": "user",
+                "content": f"Respond in {response_language}. Here is the data: {data_json}"
+            }
+        ],
+        model=MODEL,
+    )
+
 
+def _complete(template, cache_key, request, fallback):
+    # One blocking call: cached response, or the API's, or the fallback
+    cached = _llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    client = get_client()
     try:
-        message = client.messages.create(
-            max_tokens=800,
-            # This is a short classification/summary task, not a reasoning task.
-            # Sonnet 5 runs adaptive thinking by default when `thinking` is
-            # omitted (unlike 4.6, which defaulted to thinking off) - left
-            # enabled, it could eat into the tight max_tokens budget and
-            # truncate the JSON output before pages/3's json.loads() sees it.
-            thinking={"type": "disabled"},
-            messages=[
-                {
-                    "role": "user",
-                    "content": "You help kitchen teams review how well their meal predictions performed. "
-                        "This data compares past predictions against actual results, broken down into vegetarian and non-vegetarian portions. "
-                        "The data contains dates, weekdays, day themes, predicted meals (total, vegetarian, non-vegetarian), "
-                        "actual meals (total, vegetarian, non-vegetarian), differences, and percentage errors for each. "
-                        "Look for meaningful patterns: Are certain weekdays or day themes consistently off? "
-                        "Is the bias specifically in the vegetarian or non-vegetarian split rather than the total? "
-                        "Do holidays or low-volume days cause problems? Is there a systematic bias in the predictions? "
-                        "Only report patterns that are significant and actionable. "
-                        "Return your response as a JSON array only. No other text, no markdown, no explanation. "
-                        "Each insight should be an object with three fields: "
-                        "type (one of: success, info, warning, error), "
-                        "title (short label for the insight), "
-                        "message (one sentence explanation and one sentence recommendation). "
-                        "Use these types: "
-                        "success = predictions working well, no action needed. "
-                        "info = general observation worth noting. "
-                        "warning = 3-5% error or a pattern to watch. "
-                        "error = over 5% error, needs attention. "
-                        "Return at most 3 insights. Fewer is fine."
-                        "If the predictions are working well and there are no clear issues, say so briefly. "
-                        "Use simple language for kitchen managers. No jargon."
-                        "Return raw JSON only. DO NOT wrap in code fences or markdown."
-                        f"Respond in {response_language}."
-                        f"Here is the data: {data_json}"
-                }
-            ],
-            model=MODEL,
-        )
+        message = llm_breaker.call(lambda: client.messages.create(**request))
+        _record_usage(template, message.usage)
         if not message.content:
-            return _INSIGHTS_FALLBACK.get(lang, _INSIGHTS_FALLBACK["EN"])
+            return fallback
+        _llm_cache.put(cache_key, message.content[0].text)
         return message.content[0].text
-    except APIError:
-        return _INSIGHTS_FALLBACK.get(lang, _INSIGHTS_FALLBACK["EN"])
+    except (APIError, CircuitBreakerOpen):
+        return fallback
 
 
-@st.cache_data
-def get_llm_planning_insights(data_json: str, lang: str):
+def _stream(template, cache_key, request, fallback):
+    # Same as _complete, but yields the text as it arrives. Sessions sending
+    # the same prompt at the same time read one shared stream.
+    cached = _llm_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    yield from shared_task(cache_key, _stream_response, template, cache_key, request, fallback).stream()
 
-    client = Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
-    response_language = "German" if lang == "DE" else "English"
 
+def _stream_response(template, cache_key, request, fallback):
+    # A response that broke off midway is shown as far as it got and not cached.
+    client = get_client()
+    chunks = []
+    usage = None
     try:
-        message = client.messages.create(
-            max_tokens=800,
-            thinking={"type": "disabled"},
-            messages=[
-                {
-                    "role": "user",
-                    "content": "You help kitchen teams plan based on meal demand forecasts. "
-                        "This data contains future dates, day themes, predicted meals (total, vegetarian, non-vegetarian), "
-                        "temperature, weather condition, holiday description, "
-                        "school break flag, bridge day flag, and prediction timestamp. "
-                        "List ONLY 2-3 inconsistencies or unusual patterns — "
-                        "things that don't match expected conditions (weather, holiday, day of week) "
-                        "or seem worth verifying. "
-                        "Do NOT include daily summaries, recommendations, or risk ratings. "
-                        "Keep it brief and simple, no jargon. Use bullet points."
-                        f"Respond in {response_language}."
-                        f"Here is the data: {data_json}"
-                }
-            ],
-            model=MODEL,
-        )
-        if not message.content:
-            return _PLANNING_FALLBACK.get(lang, _PLANNING_FALLBACK["EN"])
-        return message.content[0].text
-    except APIError:
-        return _PLANNING_FALLBACK.get(lang, _PLANNING_FALLBACK["EN"])
+        # Not llm_breaker.call: an error event partway through the stream
+        # counts as a failure as much as the request being refused
+        llm_breaker.check()
+        events = client.messages.create(stream=True, **request)
+        with events:
+            for event in events:
+                if event.type == "message_start":
+                    # Input and cache counts come first, output_tokens with message_delta
+                    usage = event.message.usage
+                elif event.type == "message_delta" and usage is not None:
+                    usage.output_tokens = event.usage.output_tokens
+                elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    chunks.append(event.delta.text)
+                    yield event.delta.text
+    except (APIError, CircuitBreakerOpen) as e:
+        llm_breaker.record_failure(e)
+        if not chunks:
+            yield fallback
+        return
+    finally:
+        if usage is not None:
+            _record_usage(template, usage)
+
+    llm_breaker.record_success()
+    if chunks:
+        _llm_cache.put(cache_key, "".join(chunks))
+    else:
+        yield fallback
+
+
+@coalesce(_llm_flight)
+def get_llm_insights_for_actuals_vs_predicted(data_json: str, lang: str):
+    cache_key = _llm_cache.key("insights", INSIGHTS_PROMPT_VERSION, data_json, lang, MODEL)
+    return _complete("insights", cache_key, _request(_INSIGHTS_INSTRUCTIONS, data_json, lang), _INSIGHTS_FALLBACK.get(lang, _INSIGHTS_FALLBACK["EN"]))
+
+
+@coalesce(_llm_flight)
+def get_llm_planning_insights(data_json: str, lang: str):
+    cache_key = _llm_cache.key("planning", PLANNING_PROMPT_VERSION, data_json, lang, MODEL)
+    return _complete("planning", cache_key, _request(_PLANNING_INSTRUCTIONS, data_json, lang), _PLANNING_FALLBACK.get(lang, _PLANNING_FALLBACK["EN"]))
+
+
+def stream_llm_insights_for_actuals_vs_predicted(data_json: str, lang: str):
+    """get_llm_insights_for_actuals_vs_predicted, yielding text chunks as they arrive."""
+    cache_key = _llm_cache.key("insights", INSIGHTS_PROMPT_VERSION, data_json, lang, MODEL)
+    return _stream("insights", cache_key, _request(_INSIGHTS_INSTRUCTIONS, data_json, lang), _INSIGHTS_FALLBACK.get(lang, _INSIGHTS_FALLBACK["EN"]))
+
+
+def stream_llm_planning_insights(data_json: str, lang: str):
+    """get_llm_planning_insights, yielding text chunks as they arrive."""
+    cache_key = _llm_cache.key("planning", PLANNING_PROMPT_VERSION, data_json, lang, MODEL)
+    return _stream("planning", cache_key, _request(_PLANNING_INSTRUCTIONS, data_json, lang), _PLANNING_FALLBACK.get(lang, _PLANNING_FALLBACK["EN"]))
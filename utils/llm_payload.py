@@ -0,0 +1,207 @@
+"""Compact prompt payloads for utils/llm_insights.
+
+Sending df.to_json() of a whole frame makes tokens (and latency, and cost)
+grow linearly with the date range. These summarizers send what the prompts
+actually ask about instead: bias per weekday / theme / meal category, the
+error distribution, the notable days, and a bounded sample of rows. The
+payload stays roughly the same size whatever the period length.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+MAX_SAMPLE_ROWS = 10
+MAX_OUTLIER_DAYS = 5
+# Holiday / break days go in as date runs (a two-week school break is one
+# entry), the first MAX_HOLIDAY_RUNS of them
+MAX_HOLIDAY_RUNS = 5
+# Days whose error (actuals) or deviation from their theme's median (plans) is below this aren't outliers
+OUTLIER_MIN_PCT = 0.05
+PLANNING_OUTLIER_MIN_PCT = 0.20
+
+# category -> (predicted column, actual column)
+CATEGORIES = {
+    'total': ('final_prediction', 'actual_meals'),
+    'veg': ('predicted_meals_veg', 'actual_meals_veg'),
+    'non_veg': ('predicted_meals_non_veg', 'actual_meals_non_veg'),
+    'salad': ('predicted_meals_salad', 'actual_meals_salad'),
+}
+
+_ACTUALS_SAMPLE_COLUMNS = ['date', 'weekday', 'day_theme', 'final_prediction', 'actual_meals',
+                           'predicted_meals_veg', 'actual_meals_veg',
+                           'predicted_meals_non_veg', 'actual_meals_non_veg']
+_PLANNING_SAMPLE_COLUMNS = ['date', 'day_theme', 'final_prediction', 'predicted_meals_veg',
+                            'predicted_meals_non_veg', 'predicted_meals_salad', 'temperature_max',
+                            'weather_condition', 'holiday_desc', 'is_school_break', 'is_bridge_day']
+
+
+def _round(value, digits=1):
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def _pct(value):
+    # Ratios as percentages, one decimal
+    return _round(value * 100 if value is not None and not pd.isna(value) else None)
+
+
+def _pct_error(predicted, actual):
+    return (actual - predicted) / predicted.replace(0, np.nan)
+
+
+def _bias_by(df, column):
+    predicted, actual = CATEGORIES['total']
+    grouped = df.assign(_diff=df[actual] - df[predicted], _pct=_pct_error(df[predicted], df[actual])).groupby(column)
+    return {
+        str(key): {'days': int(len(group)), 'bias': _round(group['_diff'].mean()), 'mean_pct_error': _pct(group['_pct'].mean())}
+        for key, group in grouped
+    }
+
+
+def _plain(value):
+    # numpy / pandas scalars -> JSON-ready Python values
+    if pd.isna(value):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return _round(value)
+    return value
+
+
+def _records(df, columns):
+    rows = df[[c for c in columns if c in df.columns]].copy()
+    if 'date' in rows:
+        rows['date'] = pd.to_datetime(rows['date']).dt.strftime('%Y-%m-%d')
+    return [{key: _plain(value) for key, value in row.items()} for row in rows.to_dict('records')]
+
+
+def _bounded_sample(df, priority_index):
+    """Up to MAX_SAMPLE_ROWS rows: priority rows first, then evenly spaced ones, in date order."""
+    chosen = list(dict.fromkeys(priority_index))[:MAX_SAMPLE_ROWS]
+    rest = df.index.difference(chosen)
+    slots = MAX_SAMPLE_ROWS - len(chosen)
+    if slots > 0 and len(rest):
+        picks = np.unique(np.linspace(0, len(rest) - 1, num=min(slots, len(rest))).round().astype(int))
+        chosen += list(rest[picks])
+    return df.loc[chosen].sort_values('date')
+
+
+def _flag_runs(df, flagged):
+    """The flagged days as runs of consecutive days with the same holiday
+    description and flags, in date order."""
+    if not len(flagged):
+        return []
+    columns = [c for c in ('holiday_desc', 'is_school_break', 'is_bridge_day') if c in df]
+    rows = df.loc[flagged]
+    key = rows[columns].astype(str).apply('|'.join, axis=1)
+    positions = pd.Series(flagged, index=flagged)
+    run_id = ((key != key.shift()) | (positions.diff() != 1)).cumsum()
+    runs = []
+    for _, run in rows.groupby(run_id, sort=False):
+        dates = pd.to_datetime(run['date'])
+        runs.append({
+            'start': dates.min().strftime('%Y-%m-%d'), 'end': dates.max().strftime('%Y-%m-%d'), 'days': int(len(run)),
+            **{column: _plain(run[column].iloc[0]) for column in columns},
+        })
+    return runs
+
+
+def _empty_summary():
+    return {'period': {'start': None, 'end': None, 'days': 0}, 'sample_rows': []}
+
+
+def summarize_actuals_vs_predicted(df):
+    """Statistical summary of a get_actuals_and_predictions frame."""
+    if df.empty:
+        return _empty_summary()
+    df = df.reset_index(drop=True)
+    dates = pd.to_datetime(df['date'])
+    weekday = df['weekday'] if 'weekday' in df else dates.dt.day_name()
+    df = df.assign(weekday=weekday)
+
+    overall, distribution = {}, {}
+    for category, (predicted, actual) in CATEGORIES.items():
+        if predicted not in df or actual not in df:
+            continue
+        errors = _pct_error(df[predicted], df[actual])
+        overall[category] = {
+            'predicted': _round(df[predicted].sum()),
+            'actual': _round(df[actual].sum()),
+            'bias_per_day': _round((df[actual] - df[predicted]).mean()),
+            'mean_abs_pct_error': _pct(errors.abs().mean()),
+            'share_within_5pct': _pct((errors.abs() <= 0.05).sum() / errors.notna().sum() if errors.notna().any() else None),
+        }
+        quantiles = errors.quantile([0.1, 0.5, 0.9])
+        distribution[category] = {f'p{int(q * 100)}': _pct(value) for q, value in quantiles.items()}
+
+    predicted, actual = CATEGORIES['total']
+    total_errors = _pct_error(df[predicted], df[actual]).abs()
+    outliers = total_errors[total_errors >= OUTLIER_MIN_PCT].nlargest(MAX_OUTLIER_DAYS).index
+
+    return {
+        'period': {'start': dates.min().strftime('%Y-%m-%d'), 'end': dates.max().strftime('%Y-%m-%d'), 'days': int(len(df))},
+        'note': 'bias = actual - predicted meals per day; pct errors relative to predicted, in percent',
+        'by_category': overall,
+        'pct_error_distribution': distribution,
+        'by_weekday': _bias_by(df, 'weekday'),
+        'by_theme': _bias_by(df, 'day_theme') if 'day_theme' in df else {},
+        'outlier_days': _records(df.loc[outliers].assign(pct_error=_pct_error(df[predicted], df[actual]).loc[outliers] * 100),
+                                 ['date', 'weekday', 'day_theme', predicted, actual, 'pct_error']),
+        'sample_rows': _records(_bounded_sample(df, outliers), _ACTUALS_SAMPLE_COLUMNS),
+    }
+
+
+def summarize_planning(df):
+    """Statistical summary of a get_future_predictions frame."""
+    if df.empty:
+        return _empty_summary()
+    df = df.reset_index(drop=True)
+    dates = pd.to_datetime(df['date'])
+    df = df.assign(weekday=dates.dt.day_name())
+
+    theme_median = df.groupby('day_theme')['final_prediction'].transform('median')
+    deviation = (df['final_prediction'] - theme_median) / theme_median.replace(0, np.nan)
+    outliers = deviation.abs()[deviation.abs() >= PLANNING_OUTLIER_MIN_PCT].nlargest(MAX_OUTLIER_DAYS).index
+
+    flags = pd.Series(False, index=df.index)
+    for column in ('is_school_break', 'is_bridge_day'):
+        if column in df:
+            flags |= df[column].fillna(False).astype(bool)
+    if 'holiday_desc' in df:
+        flags |= df['holiday_desc'].fillna('').astype(str).ne('')
+    flagged = df.index[flags]
+
+    weather = {}
+    if 'temperature_max' in df:
+        weather = {
+            'temperature_max_min': _round(df['temperature_max'].min()),
+            'temperature_max_max': _round(df['temperature_max'].max()),
+            'conditions': {str(k): int(v) for k, v in df['weather_condition'].value_counts().items()} if 'weather_condition' in df else {},
+        }
+
+    return {
+        'period': {'start': dates.min().strftime('%Y-%m-%d'), 'end': dates.max().strftime('%Y-%m-%d'), 'days': int(len(df))},
+        'totals': {category: _round(df[predicted].sum()) for category, (predicted, _) in CATEGORIES.items() if predicted in df},
+        'mean_meals_by_weekday': {str(k): _round(v) for k, v in df.groupby('weekday')['final_prediction'].mean().items()},
+        'mean_meals_by_theme': {str(k): _round(v) for k, v in df.groupby('day_theme')['final_prediction'].mean().items()},
+        'weather': weather,
+        'unusual_days': _records(df.loc[outliers].assign(pct_vs_theme_median=deviation.loc[outliers] * 100),
+                                 ['date', 'weekday', 'day_theme', 'final_prediction', 'pct_vs_theme_median']),
+        'holiday_or_break_days': int(len(flagged)),
+        'holiday_or_break_periods': _flag_runs(df, flagged)[:MAX_HOLIDAY_RUNS],
+        'sample_rows': _records(_bounded_sample(df, list(outliers) + list(flagged)), _PLANNING_SAMPLE_COLUMNS),
+    }
+
+
+def to_payload(summary, name=None):
+    """Compact JSON for the prompt; logs its size when a name is given."""
+    payload = json.dumps(summary, separators=(',', ':'), ensure_ascii=False)
+    if name:
+        print(f"LLM payload '{name}': {len(payload.encode('utf-8'))} bytes "
+              f"for {summary['period']['days']} days ({len(summary['sample_rows'])} sample rows)")
+    return payload
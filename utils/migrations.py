@@ -0,0 +1,196 @@
+"""Versioned schema migrations for Postgres (Supabase) and the local SQLite
+database.
+
+Every migration runs once, in its own transaction, and is recorded in
+schema_migrations; migrate() applies the ones a database hasn't seen yet and
+can be run any number of times. Each step is written to also succeed on a
+database whose schema was created by hand before the runner existed
+(IF NOT EXISTS, and columns are only added when missing).
+
+Add new migrations to the end of MIGRATIONS with the next version number;
+never edit or renumber one that has shipped.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    for name, column_type in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+
+
+def _create_base_tables(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS holidays (
+            date DATE NOT NULL, description TEXT, is_bank_holiday BOOLEAN,
+            is_school_break BOOLEAN, is_bridge_day BOOLEAN
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS predictions (
+            date DATE PRIMARY KEY, weekday TEXT, month TEXT, day_theme TEXT,
+            temperature_max FLOAT, weather_condition TEXT, is_bank_holiday BOOLEAN,
+            is_bridge_day BOOLEAN, is_school_break BOOLEAN, holiday_desc TEXT,
+            predicted_meals INTEGER, predicted_meals_veg INTEGER, predicted_meals_non_veg INTEGER,
+            prediction_timestamp TIMESTAMP
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS actual_sales (
+            date DATE PRIMARY KEY, actual_meals INTEGER,
+            actual_meals_veg INTEGER, actual_meals_non_veg INTEGER
+        )
+    """))
+
+
+def _add_prediction_overrides(conn):
+    _add_missing_columns(conn, 'predictions', [
+        ('override_meal_prediction', 'INTEGER'),
+        ('override_reason', 'TEXT'),
+        ('final_prediction', 'INTEGER'),
+    ])
+
+
+def _add_salad_columns(conn):
+    _add_missing_columns(conn, 'predictions', [('predicted_meals_salad', 'DOUBLE PRECISION')])
+    _add_missing_columns(conn, 'actual_sales', [('actual_meals_salad', 'DOUBLE PRECISION')])
+
+
+def _create_veg_ratio_by_theme(conn):
+    # Starts empty - backfill from actual_sales with scripts/rebuild_veg_ratios.py
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS veg_ratio_by_theme (
+            day_theme TEXT PRIMARY KEY,
+            veg_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            non_veg_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            day_count INTEGER NOT NULL DEFAULT 0
+        )
+    """))
+
+
+def _add_holidays_date_key(conn):
+    # Re-running seed_holidays.py used to insert every date a second time;
+    # keep one row per date so the unique index can be built.
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("DELETE FROM holidays a USING holidays b WHERE a.date = b.date AND a.ctid > b.ctid"))
+    else:
+        conn.execute(text("DELETE FROM holidays WHERE rowid NOT IN (SELECT MIN(rowid) FROM holidays GROUP BY date)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS holidays_date_key ON holidays (date)"))
+
+
+def _index_prediction_timestamp(conn):
+    # MAX(prediction_timestamp) in home_utils.get_last_prediction_info
+    conn.execute(text("CREATE INDEX IF NOT EXISTS predictions_prediction_timestamp_idx ON predictions (prediction_timestamp)"))
+
+
+_HISTORY_COLUMNS = [
+    'date', 'prediction_timestamp', 'day_theme', 'temperature_max', 'weather_condition',
+    'predicted_meals', 'predicted_meals_veg', 'predicted_meals_non_veg', 'predicted_meals_salad',
+    'override_meal_prediction', 'override_reason', 'final_prediction',
+]
+
+
+def _create_prediction_history(conn):
+    # Every saved forecast, append-only (see db_utils.save_prediction);
+    # predictions keeps only the latest one per date for the app's reads.
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS prediction_history (
+            date DATE NOT NULL, prediction_timestamp TIMESTAMP, saved_at TIMESTAMP NOT NULL,
+            day_theme TEXT, temperature_max FLOAT, weather_condition TEXT,
+            predicted_meals INTEGER, predicted_meals_veg INTEGER, predicted_meals_non_veg INTEGER,
+            predicted_meals_salad DOUBLE PRECISION, override_meal_prediction INTEGER,
+            override_reason TEXT, final_prediction INTEGER
+        )
+    """))
+    if conn.dialect.name == 'postgresql':
+        # Rows are appended roughly in date order, which is what BRIN needs:
+        # a few pages of index for years of history
+        conn.execute(text("CREATE INDEX IF NOT EXISTS prediction_history_date_brin ON prediction_history USING brin (date)"))
+    else:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS prediction_history_date_idx ON prediction_history (date)"))
+    # The forecasts saved so far become each date's first vintage (from
+    # whichever of the columns a hand-made predictions table has)
+    existing = {column['name'] for column in inspect(conn).get_columns('predictions')}
+    columns = ", ".join(column for column in _HISTORY_COLUMNS if column in existing)
+    conn.execute(text(f"""
+        INSERT INTO prediction_history ({columns}, saved_at)
+        SELECT {columns}, COALESCE(prediction_timestamp, CURRENT_TIMESTAMP) FROM predictions
+        WHERE NOT EXISTS (SELECT 1 FROM prediction_history)
+    """))
+
+
+def _add_holidays_region(conn):
+    # One calendar per region (utils/sites.py), NULL being the kitchen's own:
+    # a date is now unique within its region instead of across the table.
+    _add_missing_columns(conn, 'holidays', [('region', 'TEXT')])
+    if conn.dialect.name == 'postgresql':
+        # A hand-made UNIQUE (date) constraint gets this name too
+        conn.execute(text("ALTER TABLE holidays DROP CONSTRAINT IF EXISTS holidays_date_key"))
+    conn.execute(text("DROP INDEX IF EXISTS holidays_date_key"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS holidays_region_date_key ON holidays (COALESCE(region, ''), date)"))
+
+
+def _create_data_versions(conn):
+    # A counter per reference table that the apps cache in memory;
+    # scripts/seed_holidays.py increments 'holidays' in its transaction so
+    # the running apps know to reload the calendar (utils/holiday_calendar.py).
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at TIMESTAMP NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        INSERT INTO data_versions (name, version, updated_at)
+        SELECT 'holidays', 1, CURRENT_TIMESTAMP
+        WHERE NOT EXISTS (SELECT 1 FROM data_versions WHERE name = 'holidays')
+    """))
+
+
+# (version, name, step) - step(conn) runs inside the migration's transaction
+MIGRATIONS = [
+    (1, 'create_base_tables', _create_base_tables),
+    (2, 'add_prediction_overrides', _add_prediction_overrides),
+    (3, 'add_salad_columns', _add_salad_columns),
+    (4, 'create_veg_ratio_by_theme', _create_veg_ratio_by_theme),
+    (5, 'add_holidays_date_key', _add_holidays_date_key),
+    (6, 'index_prediction_timestamp', _index_prediction_timestamp),
+    (7, 'create_prediction_history', _create_prediction_history),
+    (8, 'add_holidays_region', _add_holidays_region),
+    (9, 'create_data_versions', _create_data_versions),
+]
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMP NOT NULL
+            )
+        """))
+        return {row.version for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migrate(engine, migrations=MIGRATIONS):
+    """Apply every migration `engine`'s database hasn't recorded yet, in
+    version order. Returns the names of the ones applied; a failing
+    migration is rolled back and raised, leaving the earlier ones in place."""
+    done = applied_versions(engine)
+    applied = []
+    for version, name, step in sorted(migrations, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                # pysqlite only opens a transaction before DML on its own, so
+                # a failed migration's DDL would otherwise stay behind
+                conn.exec_driver_sql("BEGIN")
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.now()},
+            )
+        applied.append(name)
+    return applied
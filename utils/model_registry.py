@@ -0,0 +1,132 @@
+"""Process-wide cache of the trained model artifacts in data/models/.
+
+get_prediction used to joblib.load the model and feature list on every call.
+The registry loads them once per process and only reloads when a retrain
+(scripts/train_model.py) has replaced the files on disk, detected by their
+mtimes. A reload builds a complete new ModelBundle before swapping it in, so
+a caller always gets a model and feature list from the same training run.
+
+When train_model.py has exported the forest as flat node arrays
+(utils/flat_forest.py) for the current training run, the bundle serves
+those instead of the pickled sklearn model, which is then never unpickled.
+"""
+import json
+import threading
+from dataclasses import dataclass
+
+import joblib
+
+from utils.feature_encoder import FeatureEncoder
+from utils.flat_forest import FlatForest
+from utils.paths import MODEL_PATH, FEATURES_PATH, METADATA_PATH, ENCODER_PATH, FOREST_PATH
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    # FlatForest when an up-to-date export exists, else the sklearn model -
+    # either way something with .predict(X)
+    model: object
+    feature_columns: list
+    metadata: dict
+    encoder: FeatureEncoder
+    # st_mtime_ns of (model, features, metadata, encoder, flat forest) at load time
+    version: tuple
+
+    @property
+    def training_timestamp(self):
+        return self.metadata.get('training_timestamp')
+
+
+class ModelRegistry:
+    def __init__(self, model_path=MODEL_PATH, features_path=FEATURES_PATH, metadata_path=METADATA_PATH,
+                 encoder_path=ENCODER_PATH, forest_path=FOREST_PATH):
+        self.model_path = model_path
+        self.features_path = features_path
+        self.metadata_path = metadata_path
+        self.encoder_path = encoder_path
+        self.forest_path = forest_path
+        self._lock = threading.Lock()
+        self._bundle = None
+
+    def _disk_version(self):
+        return tuple(
+            path.stat().st_mtime_ns if path.exists() else None
+            for path in (self.model_path, self.features_path, self.metadata_path, self.encoder_path,
+                         self.forest_path)
+        )
+
+    def _load(self, version):
+        feature_columns = joblib.load(self.features_path)
+        try:
+            with open(self.metadata_path, 'r') as file:
+                metadata = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            metadata = {}
+        model = self._load_flat_forest(feature_columns, metadata) or joblib.load(self.model_path)
+        return ModelBundle(model, feature_columns, metadata, self._load_encoder(feature_columns), version)
+
+    def _load_flat_forest(self, feature_columns, metadata):
+        # Only trust an export stamped with this training run - otherwise
+        # (no export yet, or one left over from an older model) fall back to
+        # the pickled sklearn model.
+        if not self.forest_path.exists():
+            return None
+        forest = FlatForest.load(self.forest_path)
+        if forest.feature_columns != list(feature_columns):
+            return None
+        if forest.training_timestamp != metadata.get('training_timestamp'):
+            return None
+        return forest
+
+    def _load_encoder(self, feature_columns):
+        # Models trained before the encoder was saved alongside them (or an
+        # encoder left over from another run) get one compiled from the
+        # feature list instead - it's fully determined by it.
+        if self.encoder_path.exists():
+            encoder = joblib.load(self.encoder_path)
+            if encoder.feature_columns == list(feature_columns):
+                return encoder
+        return FeatureEncoder(feature_columns)
+
+    @staticmethod
+    def _is_consistent(bundle):
+        # train_model.py replaces the model, then the features, then the
+        # metadata. Each replace is atomic but the three together are not:
+        # a load in between can pair a new file with an old one. The
+        # metadata records the feature list it was trained with, so a
+        # mismatch means a retrain is mid-swap.
+        expected = bundle.metadata.get('feature_columns')
+        return expected is None or list(expected) == list(bundle.feature_columns)
+
+    def get(self):
+        """The current ModelBundle, reloading it if the files changed on disk."""
+        version = self._disk_version()
+        bundle = self._bundle
+        if bundle is not None and bundle.version == version:
+            return bundle
+
+        with self._lock:
+            # Another thread may have reloaded while this one waited for the lock
+            if self._bundle is not None and self._bundle.version == version:
+                return self._bundle
+
+            candidate = self._load(version)
+            if self._is_consistent(candidate) and self._disk_version() == version:
+                self._bundle = candidate
+            elif self._bundle is None:
+                # Nothing older to fall back on - serve what was loaded, but
+                # don't cache it, so the next call picks up the finished retrain.
+                return candidate
+            return self._bundle
+
+    def clear(self):
+        with self._lock:
+            self._bundle = None
+
+
+_registry = ModelRegistry()
+
+
+def get_model_bundle():
+    """The process-wide ModelBundle for the artifacts in data/models/."""
+    return _registry.get()
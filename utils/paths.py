@@ -5,4 +5,9 @@ PROJECT_ROOT = Path(__file__).parent.parent
 MODELS_DIR = PROJECT_ROOT / 'data' / 'models'
 MODEL_PATH = MODELS_DIR / 'random_forest_model.pkl'
 FEATURES_PATH = MODELS_DIR / 'feature_columns.pkl'
-METADATA_PATH = MODELS_DIR / 'model_metadata.json'
\ No newline at end of file
+METADATA_PATH = MODELS_DIR / 'model_metadata.json'
+ENCODER_PATH = MODELS_DIR / 'feature_encoder.pkl'
+FOREST_PATH = MODELS_DIR / 'flat_forest.npz'
+WEATHER_CACHE_PATH = PROJECT_ROOT / 'data' / 'processed' / 'weather_cache.sqlite'
+FEATURE_STORE_PATH = PROJECT_ROOT / 'data' / 'processed' / 'feature_store.sqlite'
+LLM_CACHE_PATH = PROJECT_ROOT / 'data' / 'processed' / 'llm_cache.sqlite'
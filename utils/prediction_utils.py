@@ -1,46 +1,37 @@
-import pandas as pd
-import joblib
-from pathlib import Path
 from datetime import datetime, timezone
 import numpy as np
-from utils.paths import MODEL_PATH, FEATURES_PATH
-from utils.db_utils import get_empirical_veg_ratio
+from utils.model_registry import get_model_bundle
+from utils.db_utils import get_empirical_veg_ratios
+from utils.day_themes import THEME_VEG_RATIO
 import math
 
 def get_prediction(new_data):
-    # 1. Load model and features from disk
-    loaded_model = joblib.load(MODEL_PATH)
-    feature_columns = joblib.load(FEATURES_PATH)
+    # 1. Get model and feature encoder (loaded once per process, reloaded after a retrain)
+    bundle = get_model_bundle()
+    loaded_model = bundle.model
     
-    # 2. Prepare data
-    df_prepared = new_data.copy()
+    # 2. Encode features
+    # The encoder maps day_theme / month / weather_condition straight to their
+    # one-hot columns in feature_columns order (see utils/feature_encoder.py).
+    # weekday is not a feature: it's perfectly collinear with day_theme (each
+    # weekday maps to exactly one theme) - see scripts/train_model.py
+    X = bundle.encoder.transform_frame(new_data)
+
+    # 3. Predict (using the model!)
+    predictions = loaded_model.predict(X)
     
-    # 3. One-hot encode
-    # weekday is dropped: it's perfectly collinear with day_theme (each weekday maps to
-    # exactly one theme), so encoding both is redundant - see scripts/train_model.py
-    df_prepared = pd.get_dummies(
-        df_prepared.drop(columns=['weekday']),
-        columns=['month', 'weather_condition', 'day_theme']
-    )
-
-    # 4. Add missing columns (ensure all expected features are present)
-    for col in feature_columns:
-        if col not in df_prepared.columns:
-            df_prepared[col] = 0
-
-    # 5. Select and order columns to match training data
-    df_prepared = df_prepared[feature_columns]
-    
-    # 6. Predict (using the model!)
-    predictions = loaded_model.predict(df_prepared)
-    
-    # 7. Return results
+    # 4. Return results
     #Add predictions to the original DataFrame
     new_data['predicted_meals'] = np.ceil(predictions)
     new_data['prediction_timestamp'] = datetime.now(timezone.utc)
 
-    # 8. Split total into veg / non-veg using the empirical ratio per theme
-    splits = new_data.apply(_split_veg, axis=1, result_type='expand')
+    # 5. Split total into veg / non-veg using the empirical ratio per theme.
+    # All theme ratios are fetched once (by prepare_data, alongside the
+    # weather, or here) and reused for every row.
+    ratios = new_data.attrs.get('veg_ratios')
+    if ratios is None:
+        ratios = get_empirical_veg_ratios()
+    splits = new_data.apply(_split_veg, axis=1, result_type='expand', ratios=ratios)
     new_data['predicted_meals_veg'] = splits[0]
     new_data['predicted_meals_non_veg'] = splits[1]
 
@@ -48,14 +39,17 @@ def get_prediction(new_data):
     return new_data
 
 
-def split_veg_non_veg(day_theme, total):
-    """Split a meal total into veg/non-veg using the empirical ratio for the given theme."""
-    veg_r, nonveg_r = get_empirical_veg_ratio(day_theme)
+def split_veg_non_veg(day_theme, total, ratios=None):
+    """Split a meal total into veg/non-veg using the empirical ratio for the given theme.
+    Pass `ratios` (from get_empirical_veg_ratios) when splitting several rows, so the
+    ratios are read once instead of once per row."""
+    if ratios is None:
+        ratios = get_empirical_veg_ratios()
+    veg_r, nonveg_r = ratios.get(day_theme, THEME_VEG_RATIO.get(day_theme, (0.5, 0.5)))
     veg = math.ceil(total * veg_r)
     non_veg = int(total) - veg  # ensure sum == total
     return veg, non_veg
 
 
-def _split_veg(row):
-    return split_veg_non_veg(row.get('day_theme', 'Unknown'), row['predicted_meals'])
-
+def _split_veg(row, ratios=None):
+    return split_veg_non_veg(row.get('day_theme', 'Unknown'), row['predicted_meals'], ratios)
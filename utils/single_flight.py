@@ -0,0 +1,91 @@
+"""Process-wide request coalescing ("single flight").
+
+Streamlit runs every browser session in its own thread of the same process.
+When several sessions ask for the same thing at once (everyone opening page 1
+on Monday morning), only the first caller runs the call; the others wait for
+it and get the same result, or the same exception. Once the call is done the
+key is free again, so this is not a cache: a later call runs again (and can
+hit whatever cache sits underneath).
+
+Results are shared between the callers, so treat them as read-only.
+"""
+import functools
+import inspect
+import threading
+
+_groups = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.executed = 0   # calls that actually ran
+        self.coalesced = 0  # calls that shared someone else's in-flight run
+        _groups[name] = self
+
+    def do(self, key, fn):
+        """Run fn() unless a call with the same key is already running, in
+        which case wait for that one and return its result."""
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._in_flight[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight),
+            }
+
+
+def coalesce(group):
+    """Decorator: concurrent calls with the same arguments share one run.
+    Arguments are matched after binding, so f(a, b=1) and f(a, 1) coalesce."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__qualname__, tuple(bound.arguments.items()))
+            return group.do(key, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def get_single_flight_metrics():
+    """{group name: {'executed', 'coalesced', 'in_flight'}} for every group in the process."""
+    return {name: group.metrics() for name, group in _groups.items()}
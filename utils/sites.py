@@ -0,0 +1,79 @@
+"""Batch forecasting for several canteens at once.
+
+Each Site brings its own coordinates, weekday -> theme calendar and holiday
+region. forecast_sites fetches the weather of all sites in one batched
+request (with the holidays and veg ratios alongside it), builds a single
+combined feature frame and runs one model pass over it, instead of paying
+prepare_data + get_prediction's fixed costs once per site.
+"""
+from dataclasses import dataclass, field
+from functools import partial
+
+import pandas as pd
+
+from utils.concurrency import run_concurrently
+from utils.data_preparation_utils import (
+    FETCH_TIMEOUTS, build_features, compute_date_range_and_weather_type, drop_bank_holidays,
+)
+from utils.day_themes import DAY_THEMES
+from utils.db_utils import get_empirical_veg_ratios
+from utils.holiday_calendar import get_holiday_calendar
+from utils.prediction_utils import get_prediction
+from utils.weather_utils import DEFAULT_LATITUDE, DEFAULT_LONGITUDE, get_weather_range_batch
+
+
+@dataclass(frozen=True)
+class Site:
+    site_id: str
+    latitude: float = DEFAULT_LATITUDE
+    longitude: float = DEFAULT_LONGITUDE
+    day_themes: dict = field(default_factory=lambda: dict(DAY_THEMES))
+    holiday_region: str | None = None  # None = the kitchen's own calendar (rows without a region)
+
+
+def forecast_sites(sites, start_date, number_of_days):
+    """Forecast every site over the same business days.
+
+    Returns get_prediction's columns indexed by (site_id, date); bank holidays
+    of a site's region are left out for that site.
+    """
+    if len({site.site_id for site in sites}) != len(sites):
+        raise ValueError("site_id must be unique per site")
+
+    start, end, _, business_days = compute_date_range_and_weather_type(start_date, number_of_days, today=None)
+    regions = {site.holiday_region for site in sites}
+
+    calls = {
+        'veg_ratios': get_empirical_veg_ratios,
+        # A range straddling today or the forecast horizon is split into
+        # archive / forecast / climatology segments, as in prepare_data
+        'weather': partial(
+            get_weather_range_batch, {site.site_id: (site.latitude, site.longitude) for site in sites},
+            start_date=start, end_date=end,
+        ),
+    }
+    timeouts = {'veg_ratios': FETCH_TIMEOUTS['veg_ratios'], 'weather': FETCH_TIMEOUTS['weather']}
+    for region in regions:
+        calls[f'holidays:{region}'] = partial(_lookup_region_holidays, region, start, end)
+        timeouts[f'holidays:{region}'] = FETCH_TIMEOUTS['holidays']
+    results = run_concurrently(calls, timeouts=timeouts)
+
+    weather = dict(tuple(results['weather'].groupby('site_id')))
+    frames = []
+    for site in sites:
+        df = build_features(
+            business_days,
+            weather.get(site.site_id, results['weather'].iloc[:0]),
+            results[f'holidays:{site.holiday_region}'].copy(),  # shared between sites of a region
+            themes=site.day_themes,
+        )
+        frames.append(drop_bank_holidays(df).assign(site_id=site.site_id))
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined.attrs['veg_ratios'] = results['veg_ratios']
+    forecast = get_prediction(combined)
+    return forecast.set_index(['site_id', 'date'])
+
+
+def _lookup_region_holidays(region, start, end):
+    return get_holiday_calendar(region).lookup(start, end)
@@ -0,0 +1,34 @@
+"""Connections to the local SQLite stores under data/processed/ (weather
+cache, feature store, LLM cache), each a file shared by every worker process
+on the machine.
+
+The first connection a process opens to a file sets it up: creates the
+directory, switches the file to WAL journaling (a property of the file, so
+readers don't block the writer from then on, in every process) and runs the
+store's schema function. Every later connection just opens the file.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+
+_set_up = set()
+_set_up_lock = threading.Lock()
+
+
+def connect(path, create_schema):
+    """A connection to the SQLite file at `path`. create_schema(conn) runs
+    once per process and path, and should only create what's missing."""
+    path = Path(path)
+    if path not in _set_up:
+        with _set_up_lock:
+            if path not in _set_up:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(path, timeout=10)
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    with conn:
+                        create_schema(conn)
+                finally:
+                    conn.close()
+                _set_up.add(path)
+    return sqlite3.connect(path, timeout=10)
@@ -0,0 +1,136 @@
+"""Run a text-producing generator (a streamed LLM response) on a background
+thread, so a page can kick it off as soon as its data is loaded and render
+the text further down as it arrives.
+
+The chunks are kept on the task, so a rerun of the script picks up the same
+task from session state and replays what has arrived so far instead of
+calling the API again. shared_task goes one step further and lets every
+session streaming the same request read the same task.
+"""
+import json
+import threading
+
+POLL_INTERVAL = 0.1  # seconds
+
+
+class StreamingTask:
+    def __init__(self, fn, *args):
+        self.args = args
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+        # The thread may outlive the script run that started it, so it gets
+        # no script context - fn must not touch st elements.
+        self._thread = threading.Thread(target=self._run, args=(fn, args), name="kc-stream", daemon=True)
+        self._thread.start()
+
+    def _run(self, fn, args):
+        try:
+            for chunk in fn(*args):
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            print(f"Background stream failed: {e}")
+            self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    @property
+    def done(self):
+        return self._done
+
+    def stream(self):
+        """Yield every chunk from the start, waiting for new ones until the task finishes."""
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self._chunks) and not self._done:
+                    self._cond.wait(POLL_INTERVAL)
+                new = self._chunks[i:]
+                finished = self._done
+            yield from new
+            i += len(new)
+            if finished and i >= len(self._chunks):
+                return
+
+    def text(self):
+        """The text received so far."""
+        with self._cond:
+            return "".join(self._chunks)
+
+
+def start_streaming(store, key, fn, *args):
+    """Return the task stored under key, starting fn(*args) if there is none
+    or the stored one was started with different arguments.
+
+    store is usually st.session_state.
+    """
+    task = store.get(key)
+    if task is None or task.args != args:
+        task = StreamingTask(fn, *args)
+        store[key] = task
+    return task
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_task(key, fn, *args):
+    """The process-wide task for key, starting fn(*args) if no task for key
+    is still running.
+
+    Sessions streaming the same thing at the same time read one task, like
+    single_flight does for plain calls. A finished task is dropped from the
+    registry the next time a task is started, so this is not a cache either.
+    """
+    with _shared_lock:
+        task = _shared.get(key)
+        if task is None or task.done:
+            for finished in [k for k, t in _shared.items() if t.done]:
+                del _shared[finished]
+            task = _shared[key] = StreamingTask(fn, *args)
+    return task
+
+
+def iter_json_objects(chunks):
+    """Yield each complete top-level object of a streamed JSON array as a
+    dict, as soon as its closing brace arrives.
+
+    Anything outside the objects (the array brackets, commas, stray code
+    fences) is skipped. An object that doesn't parse is skipped too.
+    """
+    buffer = []
+    depth = 0
+    in_string = False
+    escaped = False
+    for chunk in chunks:
+        for ch in chunk:
+            if depth == 0:
+                if ch == "{":
+                    buffer = [ch]
+                    depth = 1
+                continue
+            buffer.append(ch)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        yield json.loads("".join(buffer))
+                    except json.JSONDecodeError:
+                        pass
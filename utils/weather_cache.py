@@ -0,0 +1,123 @@
+"""Local, persistent store of daily Open-Meteo weather, shared by every
+session and process on the machine (a SQLite file under data/processed/).
+
+Rows are keyed by (latitude, longitude, date, source), where source is the
+get_weather type ("past" = archive API, "forecast" = forecast API). Archive
+rows never change once published, so they are kept forever; forecast rows
+are only served while younger than the forecast TTL (3 hours by default,
+WEATHER_FORECAST_TTL_HOURS overrides it).
+
+The same file holds a per-location climatology (median max temperature and
+most frequent weather code per calendar day, from the archive), used for
+days beyond the forecast horizon. It is rebuilt once it's a year old.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from utils import sqlite_store
+from utils.paths import WEATHER_CACHE_PATH
+
+FORECAST_TTL = timedelta(hours=float(os.getenv("WEATHER_FORECAST_TTL_HOURS", "3")))
+# Sources that never go stale
+PERMANENT_SOURCES = {"past"}
+CLIMATOLOGY_MAX_AGE = timedelta(days=365)
+
+
+def _create_tables(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS weather_daily ("
+        "latitude REAL, longitude REAL, date TEXT, source TEXT, "
+        "temperature_max REAL, weather_code INTEGER, fetched_at TEXT, "
+        "PRIMARY KEY (latitude, longitude, date, source))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS climatology ("
+        "latitude REAL, longitude REAL, month_day TEXT, "
+        "temperature_max REAL, weather_code INTEGER, built_at TEXT, "
+        "PRIMARY KEY (latitude, longitude, month_day))"
+    )
+
+
+class WeatherCache:
+    def __init__(self, path=WEATHER_CACHE_PATH, forecast_ttl=FORECAST_TTL):
+        self.path = path
+        self.forecast_ttl = forecast_ttl
+
+    def _connect(self):
+        return sqlite_store.connect(self.path, _create_tables)
+
+    @staticmethod
+    def _key(latitude, longitude):
+        # Same point however the coordinates were typed in
+        return round(float(latitude), 4), round(float(longitude), 4)
+
+    def get(self, latitude, longitude, start_date, end_date, source, now=None, allow_stale=False):
+        """Fresh cached rows (date, temperature_max, weather_code) in the range, dates as 'YYYY-MM-DD'.
+        allow_stale=True also returns expired forecast rows (for when Open-Meteo is down)."""
+        now = now or datetime.now(timezone.utc)
+        lat, lon = self._key(latitude, longitude)
+        params = [lat, lon, source, start_date, end_date]
+        sql_query = ("SELECT date, temperature_max, weather_code FROM weather_daily "
+                     "WHERE latitude = ? AND longitude = ? AND source = ? AND date >= ? AND date <= ?")
+        if source not in PERMANENT_SOURCES and not allow_stale:
+            sql_query += " AND fetched_at >= ?"
+            params.append((now - self.forecast_ttl).isoformat())
+
+        with self._connect() as conn:
+            rows = conn.execute(sql_query + " ORDER BY date", params).fetchall()
+        return pd.DataFrame(rows, columns=["date", "temperature_max", "weather_code"])
+
+    def put(self, latitude, longitude, source, daily_df, now=None):
+        """Store rows shaped like Open-Meteo's 'daily' block (time, temperature_2m_max, weather_code).
+        Days with missing values aren't stored, so they're fetched again next time."""
+        now = now or datetime.now(timezone.utc)
+        lat, lon = self._key(latitude, longitude)
+        complete = daily_df.dropna(subset=["temperature_2m_max", "weather_code"])
+        records = [
+            (lat, lon, str(row.time)[:10], source, float(row.temperature_2m_max), int(row.weather_code), now.isoformat())
+            for row in complete.itertuples(index=False)
+        ]
+        if not records:
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO weather_daily VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+
+    def get_climatology(self, latitude, longitude, now=None):
+        """Climatology rows (month_day 'MM-DD', temperature_max, weather_code) for the point,
+        empty if it was never built or is older than CLIMATOLOGY_MAX_AGE."""
+        now = now or datetime.now(timezone.utc)
+        lat, lon = self._key(latitude, longitude)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT month_day, temperature_max, weather_code FROM climatology "
+                "WHERE latitude = ? AND longitude = ? AND built_at >= ? ORDER BY month_day",
+                (lat, lon, (now - CLIMATOLOGY_MAX_AGE).isoformat()),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["month_day", "temperature_max", "weather_code"])
+
+    def put_climatology(self, latitude, longitude, climatology_df, now=None):
+        """Replace the point's climatology with climatology_df (month_day, temperature_max, weather_code)."""
+        now = now or datetime.now(timezone.utc)
+        lat, lon = self._key(latitude, longitude)
+        records = [
+            (lat, lon, row.month_day, float(row.temperature_max), int(row.weather_code), now.isoformat())
+            for row in climatology_df.itertuples(index=False)
+        ]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM climatology WHERE latitude = ? AND longitude = ?", (lat, lon))
+            conn.executemany("INSERT INTO climatology VALUES (?, ?, ?, ?, ?, ?)", records)
+
+
+def missing_date_runs(start_date, end_date, cached_dates):
+    """Contiguous (start, end) runs of days in the range that aren't in cached_dates."""
+    runs = []
+    for day in pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d"):
+        if day in cached_dates:
+            continue
+        if runs and (pd.Timestamp(day) - pd.Timestamp(runs[-1][1])).days == 1:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
@@ -1,5 +1,54 @@
 import requests 
+import numpy as np
 import pandas as pd 
+from datetime import datetime, timedelta
+from functools import partial
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from utils.concurrency import run_concurrently
+from utils.single_flight import SingleFlight, coalesce
+from utils.weather_cache import WeatherCache, missing_date_runs
+
+# The kitchen's location (Frankfurt am Main)
+DEFAULT_LATITUDE = 50.1330
+DEFAULT_LONGITUDE = 8.6807
+
+# The archive API lags a few days behind; the forecast API also serves the
+# recent past, so those days come from there. Past the forecast horizon
+# the climatology stands in.
+ARCHIVE_DELAY_DAYS = 5
+FORECAST_HORIZON_DAYS = 16
+# Archive years the climatology is computed from
+CLIMATOLOGY_YEARS = 10
+
+# Open-Meteo takes many comma-separated coordinates per request; cap the
+# batch so the query string stays a sensible length
+MAX_LOCATIONS_PER_REQUEST = 100
+
+_WEATHER_URLS = {
+    "forecast": "https://api.open-meteo.com/v1/forecast",
+    "past": "https://archive-api.open-meteo.com/v1/archive",
+}
+
+_weather_cache = WeatherCache()
+# Sessions asking for the same weather at the same time share one fetch
+_weather_flight = SingleFlight("weather")
+
+
+def probe_open_meteo(timeout=5):
+    """Smallest useful forecast request (today, default location); raises if Open-Meteo is unreachable."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    params = {"latitude": DEFAULT_LATITUDE, "longitude": DEFAULT_LONGITUDE, "start_date": today, "end_date": today,
+              "timezone": "Europe/Berlin", "daily": ["temperature_2m_max", "weather_code"]}
+    response = requests.get(_WEATHER_URLS["forecast"], params=params, timeout=timeout)
+    response.raise_for_status()
+
+
+# Connection errors, timeouts and HTTP errors count as Open-Meteo being down.
+# While the breaker is open, get_weather serves cached rows of any age.
+weather_breaker = CircuitBreaker(
+    "open_meteo", probe=probe_open_meteo,
+    is_failure=lambda e: isinstance(e, requests.exceptions.RequestException),
+)
 
 
 def categorize_weather(code):
@@ -11,36 +60,258 @@ def categorize_weather(code):
     return "☁️", "Cloudy" # If code is unknown, show cloudy
 
 
-def get_weather(start_date: str, end_date: str, type: str):
+# Lookup table for WMO codes 0-99, generated from categorize_weather so that
+# stays the single source of truth. Last slot = the unknown-code fallback.
+_KNOWN_CODES = 100
+_ICON_TABLE, _LABEL_TABLE = (
+    np.array(column, dtype=object)
+    for column in zip(*[categorize_weather(code) for code in range(_KNOWN_CODES)], categorize_weather(np.nan))
+)
+
+
+def categorize_weather_codes(codes):
+    """Vectorized categorize_weather: (icons, labels) arrays for a whole column of codes in one pass."""
+    codes = pd.to_numeric(pd.Series(codes), errors='coerce').to_numpy(dtype=np.float64)
+    in_table = (codes >= 0) & (codes < _KNOWN_CODES) & (codes == np.floor(codes))
+    index = np.full(len(codes), _KNOWN_CODES, dtype=np.intp)
+    index[in_table] = codes[in_table].astype(np.intp)
+    icons, labels = _ICON_TABLE[index], _LABEL_TABLE[index]
+
+    # Anything else that's still a number (fractional, out of 0-99) goes
+    # through categorize_weather itself, once per distinct value.
+    other = ~in_table & ~np.isnan(codes)
+    for code in np.unique(codes[other]):
+        match = codes == code
+        icons[match], labels[match] = categorize_weather(code)
+    return icons, labels
+
+
+@coalesce(_weather_flight)
+def get_weather(start_date: str, end_date: str, type: str,
+                latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE):
+    # Serve what the local weather cache already has, and only ask Open-Meteo
+    # for the days that are missing (or whose forecast went stale) - one
+    # request per contiguous gap, against the endpoint `type` selects.
+    cached = _weather_cache.get(latitude, longitude, start_date, end_date, type)
+    weather_df = cached.rename(columns={'date': 'time', 'temperature_max': 'temperature_2m_max'})
+
+    for gap_start, gap_end in missing_date_runs(start_date, end_date, set(cached['date'])):
+        try:
+            fetched = weather_breaker.call(lambda: _fetch_weather(gap_start, gap_end, type, latitude, longitude))
+        except CircuitBreakerOpen:
+            fetched = _stale_weather(latitude, longitude, gap_start, gap_end, type)
+        else:
+            _weather_cache.put(latitude, longitude, type, fetched)
+        fetched = fetched[['time', 'temperature_2m_max', 'weather_code']]
+        weather_df = fetched if weather_df.empty else pd.concat([weather_df, fetched], ignore_index=True)
+
+    weather_df = weather_df.sort_values('time', ignore_index=True)
+
+    # Map icons and text into two new columns (one table lookup for the whole column)
+    weather_df['weather_icon'], weather_df['weather_condition'] = categorize_weather_codes(weather_df['weather_code'])
+
+    # Convert time to actual datetime objects
+    weather_df['date'] = pd.to_datetime(weather_df['time'])
+    weather_df["temperature_max"] = weather_df["temperature_2m_max"]
+
+    return weather_df
+
+
+def _stale_weather(latitude, longitude, start_date, end_date, type):
+    # Open-Meteo is down: whatever is cached for the days, however old. Fail
+    # fast if some of them were never cached.
+    stale = _weather_cache.get(latitude, longitude, start_date, end_date, type, allow_stale=True)
+    if missing_date_runs(start_date, end_date, set(stale['date'])):
+        raise CircuitBreakerOpen(f"Open-Meteo is unavailable and {start_date} to {end_date} isn't cached")
+    return stale.rename(columns={'date': 'time', 'temperature_max': 'temperature_2m_max'})
+
+
+def _fetch_weather(start_date: str, end_date: str, type: str, latitude: float, longitude: float):
     params = {
-        "latitude": 50.1330,
-        "longitude": 8.6807,
+        "latitude": latitude,
+        "longitude": longitude,
         "start_date": start_date,
         "end_date": end_date,
         "timezone": "Europe/Berlin",
         "daily": ["temperature_2m_max", "weather_code"]
      }
     
-    if type == "forecast":
-        url = "https://api.open-meteo.com/v1/forecast"
-    elif type == "past":
-        url =  "https://archive-api.open-meteo.com/v1/archive"
+    if type not in _WEATHER_URLS:
+        raise ValueError(f"Unknown weather type: {type!r}")
 
-        
-    r = requests.get(url, params=params, timeout=15)
+    r = requests.get(_WEATHER_URLS[type], params=params, timeout=15)
+    # A 429/5xx raises HTTPError here, which the breaker counts as a failure
+    r.raise_for_status()
     weather_data = r.json()
 
     # --- Main Processing ---
-    if 'daily' in weather_data:
-    # 1. Create DataFrame directly from the daily JSON
-        weather_df = pd.DataFrame(weather_data['daily'])
-    
-    # 2. Map icons and text into two new columns
-    # .apply(pd.Series) splits the (icon, condition) tuple into columns
-    weather_df[['weather_icon', 'weather_condition']] = weather_df['weather_code'].apply(lambda x: pd.Series(categorize_weather(x)))
+    if 'daily' not in weather_data:
+        raise ValueError(f"Open-Meteo returned no daily data for {start_date} to {end_date}")
+    # Create DataFrame directly from the daily JSON
+    return pd.DataFrame(weather_data['daily'])
+
+
+def get_weather_batch(locations, start_date: str, end_date: str, type: str):
+    """get_weather for many sites at once: locations maps site_id -> (latitude, longitude).
+
+    Each site is served from the weather cache first. The days still missing
+    are fetched with one Open-Meteo request per distinct date gap, covering up
+    to MAX_LOCATIONS_PER_REQUEST coordinates each. Sites at the same point
+    share their rows. Returns get_weather's columns plus site_id.
+    """
+    if type not in _WEATHER_URLS:
+        raise ValueError(f"Unknown weather type: {type!r}")
+
+    points = {site_id: WeatherCache._key(*coords) for site_id, coords in locations.items()}
+    rows = {}  # point -> DataFrame(time, temperature_2m_max, weather_code)
+    gaps = {}  # (gap_start, gap_end) -> points missing that run
+    for point in dict.fromkeys(points.values()):  # unique, in site order
+        cached = _weather_cache.get(*point, start_date, end_date, type)
+        rows[point] = cached.rename(columns={'date': 'time', 'temperature_max': 'temperature_2m_max'})
+        for gap in missing_date_runs(start_date, end_date, set(cached['date'])):
+            gaps.setdefault(gap, []).append(point)
 
-    # 3. Optional: Convert time to actual datetime objects
+    for (gap_start, gap_end), gap_points in gaps.items():
+        for offset in range(0, len(gap_points), MAX_LOCATIONS_PER_REQUEST):
+            chunk = gap_points[offset:offset + MAX_LOCATIONS_PER_REQUEST]
+            try:
+                batch = weather_breaker.call(lambda: _fetch_weather_batch(gap_start, gap_end, type, chunk))
+            except CircuitBreakerOpen:
+                batch = [_stale_weather(*point, gap_start, gap_end, type) for point in chunk]
+            else:
+                for point, fetched in zip(chunk, batch):
+                    _weather_cache.put(*point, type, fetched)
+            for point, fetched in zip(chunk, batch):
+                fetched = fetched[['time', 'temperature_2m_max', 'weather_code']]
+                rows[point] = fetched if rows[point].empty else pd.concat([rows[point], fetched], ignore_index=True)
+
+    weather_df = pd.concat(
+        [rows[point].assign(site_id=site_id) for site_id, point in points.items()], ignore_index=True
+    )
+    weather_df['time'] = weather_df['time'].astype(str).str[:10]
+    weather_df = weather_df.sort_values(['site_id', 'time'], ignore_index=True)
+
+    weather_df['weather_icon'], weather_df['weather_condition'] = categorize_weather_codes(weather_df['weather_code'])
+    weather_df['date'] = pd.to_datetime(weather_df['time'])
+    weather_df["temperature_max"] = weather_df["temperature_2m_max"]
+    return weather_df
+
+
+def _fetch_weather_batch(start_date: str, end_date: str, type: str, points):
+    """One Open-Meteo request for all points; a 'daily' DataFrame per point, in order."""
+    params = {
+        "latitude": ",".join(str(latitude) for latitude, _ in points),
+        "longitude": ",".join(str(longitude) for _, longitude in points),
+        "start_date": start_date,
+        "end_date": end_date,
+        "timezone": "Europe/Berlin",
+        "daily": ["temperature_2m_max", "weather_code"]
+    }
+    r = requests.get(_WEATHER_URLS[type], params=params, timeout=15)
+    r.raise_for_status()
+    weather_data = r.json()
+    # A single location comes back as one object, several as a list
+    if isinstance(weather_data, dict):
+        weather_data = [weather_data]
+
+    if len(weather_data) != len(points) or any('daily' not in location for location in weather_data):
+        raise ValueError(f"Open-Meteo returned no daily data for {len(points)} location(s), {start_date} to {end_date}")
+    return [pd.DataFrame(location['daily']) for location in weather_data]
+
+
+def forecast_window(today=None):
+    """(first day served by the forecast API, first day beyond its horizon) as Timestamps."""
+    today = pd.Timestamp(today if today is not None else datetime.now().date()).normalize()
+    return today - timedelta(days=ARCHIVE_DELAY_DAYS), today + timedelta(days=FORECAST_HORIZON_DAYS)
+
+
+def weather_segments(start_date, end_date, today=None):
+    """Split start_date..end_date into (type, start, end) runs - 'past' (archive API),
+    'forecast' (forecast API) and 'climatology' - in date order, empty runs left out."""
+    first_forecast_day, first_climatology_day = forecast_window(today)
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    bounds = [
+        ("past", start, min(end, first_forecast_day - timedelta(days=1))),
+        ("forecast", max(start, first_forecast_day), min(end, first_climatology_day - timedelta(days=1))),
+        ("climatology", max(start, first_climatology_day), end),
+    ]
+    return [(type, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for type, s, e in bounds if s <= e]
+
+
+def get_weather_range(start_date: str, end_date: str,
+                      latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE, today=None):
+    """Weather for any range: archive, forecast and climatology segments fetched
+    concurrently and stitched together. get_weather's columns plus weather_source
+    (the segment type each day came from)."""
+    segments = weather_segments(start_date, end_date, today)
+    calls = {
+        type: partial(get_climatology_weather if type == "climatology" else get_weather,
+                      start_date=segment_start, end_date=segment_end, type=type,
+                      latitude=latitude, longitude=longitude)
+        for type, segment_start, segment_end in segments
+    }
+    results = run_concurrently(calls)
+    weather_df = pd.concat([results[type].assign(weather_source=type) for type, _, _ in segments], ignore_index=True)
+    return weather_df.sort_values('date', ignore_index=True)
+
+
+def get_weather_range_batch(locations, start_date: str, end_date: str, today=None):
+    """get_weather_range for many sites at once: locations maps site_id -> (latitude, longitude).
+    The archive and forecast segments go through get_weather_batch, days past the
+    horizon come from each site's climatology. get_weather_batch's columns plus
+    weather_source."""
+    segments = weather_segments(start_date, end_date, today)
+    calls = {
+        type: partial(_climatology_batch if type == "climatology" else partial(get_weather_batch, type=type),
+                      locations, start_date=segment_start, end_date=segment_end)
+        for type, segment_start, segment_end in segments
+    }
+    results = run_concurrently(calls)
+    weather_df = pd.concat([results[type].assign(weather_source=type) for type, _, _ in segments], ignore_index=True)
+    return weather_df.sort_values(['site_id', 'date'], ignore_index=True)
+
+
+def _climatology_batch(locations, start_date: str, end_date: str):
+    return pd.concat(
+        [get_climatology_weather(start_date, end_date, latitude=latitude, longitude=longitude).assign(site_id=site_id)
+         for site_id, (latitude, longitude) in locations.items()],
+        ignore_index=True,
+    )
+
+
+def get_climatology_weather(start_date: str, end_date: str, type: str = "climatology",
+                            latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE):
+    """get_weather-shaped rows for the range from the point's climatology (built on first use)."""
+    climatology = _weather_cache.get_climatology(latitude, longitude)
+    if climatology.empty:
+        climatology = build_climatology(latitude, longitude)
+
+    dates = pd.date_range(start_date, end_date, freq='D')
+    weather_df = pd.DataFrame({'time': dates.strftime('%Y-%m-%d'), 'month_day': dates.strftime('%m-%d')})
+    weather_df = weather_df.merge(climatology, how='left', on='month_day').drop(columns='month_day')
+    weather_df = weather_df.rename(columns={'temperature_max': 'temperature_2m_max'})
+
+    weather_df['weather_icon'], weather_df['weather_condition'] = categorize_weather_codes(weather_df['weather_code'])
     weather_df['date'] = pd.to_datetime(weather_df['time'])
     weather_df["temperature_max"] = weather_df["temperature_2m_max"]
+    return weather_df
+
+
+def build_climatology(latitude: float = DEFAULT_LATITUDE, longitude: float = DEFAULT_LONGITUDE, today=None):
+    """Compute and store the point's climatology from the last CLIMATOLOGY_YEARS full
+    years of the archive (one request): per calendar day, the median max temperature
+    and the most frequent weather code (lowest code on ties)."""
+    last_year = pd.Timestamp(today if today is not None else datetime.now().date()).year - 1
+    start_date, end_date = f"{last_year - CLIMATOLOGY_YEARS + 1}-01-01", f"{last_year}-12-31"
+    daily = weather_breaker.call(lambda: _fetch_weather(start_date, end_date, "past", latitude, longitude))
+
+    daily = daily.dropna(subset=['temperature_2m_max', 'weather_code'])
+    daily['month_day'] = pd.to_datetime(daily['time']).dt.strftime('%m-%d')
+    by_day = daily.groupby('month_day')
+    climatology = pd.DataFrame({
+        'temperature_max': by_day['temperature_2m_max'].median().round(1),
+        'weather_code': by_day['weather_code'].agg(lambda codes: codes.mode().min()).astype(int),
+    }).reset_index()
 
-    return weather_df
\ No newline at end of file
+    _weather_cache.put_climatology(latitude, longitude, climatology)
+    return climatology